@@ -1,11 +1,15 @@
 # app.py - Monitor AR Dashboard Macroeconómico
 # Sprint 2: Integración BCRA v3.0 + Datos.gob EMAE
 
+import os
+import json
+import time
 import streamlit as st
-import requests
-import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from utils.api_helpers import crear_sesion_con_reintentos, DATOS_GOB_BASE_URL, CACHE_DIR
+from utils.snapshot import SnapshotVivo, RefrescoSegundoPlano, escribir_snapshot
+from utils.salud import MedicionConsulta
+from utils.streaming import leer_csv_streaming, leer_json_streaming
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -118,39 +122,65 @@ st.markdown("""
 # 🔌 MÓDULO: BCRA API v3.0
 # ═══════════════════════════════════════════════════════════════════════════════
 
+BCRA_BASE_URL = os.environ.get('MONITOR_AR_BCRA_V3_URL', "https://api.bcra.gob.ar/estadisticas/v3.0")
+
+# Diccionario de series monetarias clave
+SERIES_MONETARIAS = {
+    160: "Tasa de Política Monetaria (TNA %)",
+    145: "BADLAR Privados (TNA %)",
+    132: "Tasa LELIQ 28 días (%)"
+}
+
+@st.cache_resource
+def sesion_http():
+    """
+    Sesión HTTP única por proceso (no por rerun): reutiliza conexiones
+    keep-alive y pasa por el limitador por host (token bucket + AIMD).
+    """
+    return crear_sesion_con_reintentos()
+
+# Intervalos de refresco por panel (segundos)
+INTERVALO_MONETARIAS = 15 * 60
+INTERVALO_EMAE = 6 * 60 * 60
+
+def descargar_serie_monetaria(id_serie):
+    """
+    Descarga una serie monetaria del BCRA v3.0 (último año).
+    Los errores HTTP se propagan.
+    """
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+    fecha_inicio = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+    
+    url = f"{BCRA_BASE_URL}/Datos/Monetarios/{id_serie}/{fecha_inicio}/{fecha_fin}"
+    with MedicionConsulta(f'BCRA v3/{id_serie}') as medicion:
+        response = medicion.respuesta = sesion_http().get(url, verify=False, timeout=10, stream=True)
+        response.raise_for_status()
+        
+        # Parseo incremental: solo fecha/valor de cada registro de 'results'
+        return leer_json_streaming(response, 'results')
+
+@st.cache_data(ttl=INTERVALO_MONETARIAS, show_spinner=False)
+def fetch_serie_monetaria(id_serie):
+    """
+    Obtiene una serie monetaria del BCRA v3.0 (último año).
+    Cacheada entre sesiones y reruns: solo se reconsulta al vencer el TTL.
+    Los errores HTTP se propagan para no cachear fallas.
+    """
+    return descargar_serie_monetaria(id_serie)
+
 def fetch_monetarias():
     """
     Obtiene series monetarias del BCRA v3.0
     IDs curados: Tasas de interés y política monetaria
     """
-    BASE_URL = "https://api.bcra.gob.ar/estadisticas/v3.0"
-    
-    # Diccionario de series monetarias clave
-    SERIES_MONETARIAS = {
-        160: "Tasa de Política Monetaria (TNA %)",
-        145: "BADLAR Privados (TNA %)",
-        132: "Tasa LELIQ 28 días (%)"
-    }
-    
     resultados = {}
-    fecha_fin = datetime.now().strftime('%Y-%m-%d')
-    fecha_inicio = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
     
     for id_serie, nombre in SERIES_MONETARIAS.items():
         try:
-            url = f"{BASE_URL}/Datos/Monetarios/{id_serie}/{fecha_inicio}/{fecha_fin}"
-            response = requests.get(url, verify=False, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('results'):
-                    df = pd.DataFrame(data['results'])
-                    df['fecha'] = pd.to_datetime(df['fecha'])
-                    df = df.sort_values('fecha')
-                    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                    
-                    resultados[nombre] = df[['fecha', 'valor']].dropna()
-                    
+            df = fetch_serie_monetaria(id_serie)
+            if df is not None:
+                resultados[nombre] = df
+                
         except Exception as e:
             st.warning(f"⚠️ Error obteniendo {nombre}: {str(e)}")
             continue
@@ -161,50 +191,63 @@ def fetch_monetarias():
 # 🔌 MÓDULO: DATOS.GOB EMAE
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def get_emae():
+def descargar_emae():
     """
-    Obtiene EMAE desestacionalizado desde Datos.gob (API Series)
-    Con fallback a CSV si la API falla
+    Descarga EMAE desestacionalizado desde Datos.gob (API Series)
+    Con fallback a CSV si la API falla. Los errores se propagan.
     """
     # ID oficial de EMAE desestacionalizado
     EMAE_ID = "11.3_VMATC_2004_M_36"
-    API_URL = f"https://apis.datos.gob.ar/series/api/series/?ids={EMAE_ID}&format=json&limit=5000"
+    API_URL = f"{DATOS_GOB_BASE_URL}/series/?ids={EMAE_ID}&format=json&limit=5000"
     
-    try:
-        # Intento 1: API Series de Datos.gob
-        response = requests.get(API_URL, timeout=15)
+    # Intento 1: API Series de Datos.gob
+    with MedicionConsulta('datos.gob/EMAE api') as medicion:
+        response = medicion.respuesta = sesion_http().get(API_URL, timeout=15, stream=True)
         
         if response.status_code == 200:
-            data = response.json()
+            # Parseo incremental de las filas [fecha, valor] de 'data'
+            df = leer_json_streaming(response, 'data')
             
-            if 'data' in data and len(data['data']) > 0:
-                df = pd.DataFrame(data['data'], columns=['fecha', 'valor'])
-                df['fecha'] = pd.to_datetime(df['fecha'])
-                df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                df = df.dropna().sort_values('fecha')
-                
+            if df is not None and not df.empty:
                 return df
+            medicion.fallo(ValueError("Sin datos en API Series"))
+        else:
+            medicion.fallo(ValueError(f"HTTP {response.status_code}"))
+            response.close()
+    
+    # Intento 2: Fallback a CSV directo
+    CSV_URL = os.environ.get('MONITOR_AR_EMAE_CSV_URL', "https://infra.datos.gob.ar/catalog/modernizacion/dataset/1/distribution/1.2/download/emae-valores-trimestrales-base-1993-100.csv")
+    
+    # Buscar columna de EMAE desestacionalizado en el header
+    def columna_desestacionalizada(header):
+        columnas_posibles = [col for col in header if 'desestacionalizado' in col.lower()]
+        return columnas_posibles[0] if columnas_posibles else None
+    
+    with MedicionConsulta('datos.gob/EMAE csv') as medicion:
+        respuesta_csv = medicion.respuesta = sesion_http().get(CSV_URL, timeout=15, stream=True)
+        respuesta_csv.raise_for_status()
         
-        # Intento 2: Fallback a CSV directo
-        CSV_URL = "https://infra.datos.gob.ar/catalog/modernizacion/dataset/1/distribution/1.2/download/emae-valores-trimestrales-base-1993-100.csv"
-        df = pd.read_csv(CSV_URL)
-        
-        # Buscar columna de EMAE desestacionalizado
-        columnas_posibles = [col for col in df.columns if 'desestacionalizado' in col.lower()]
-        
-        if columnas_posibles:
-            df_limpio = df[['indice_tiempo', columnas_posibles[0]]].copy()
-            df_limpio.columns = ['fecha', 'valor']
-            df_limpio['fecha'] = pd.to_datetime(df_limpio['fecha'])
-            df_limpio['valor'] = pd.to_numeric(df_limpio['valor'], errors='coerce')
-            
-            return df_limpio.dropna().sort_values('fecha')
-        
+        try:
+            return leer_csv_streaming(respuesta_csv, 'indice_tiempo', columna_desestacionalizada)
+        except ValueError as e:
+            medicion.fallo(e)
+            return None
+
+@st.cache_data(ttl=INTERVALO_EMAE, show_spinner=False)
+def emae_cacheado():
+    """EMAE cacheado entre sesiones y reruns; las fallas no se cachean."""
+    return descargar_emae()
+
+def get_emae():
+    """
+    Obtiene EMAE desestacionalizado desde Datos.gob (API Series)
+    Con fallback a CSV si la API falla
+    """
+    try:
+        return emae_cacheado()
     except Exception as e:
         st.error(f"⚠️ No se pudo obtener EMAE: {str(e)}")
         return None
-    
-    return None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 📊 FUNCIÓN: GRÁFICO PLOTLY ESTILO BLOOMBERG
@@ -214,6 +257,9 @@ def crear_grafico_bloomberg(df, titulo, y_label, color="#2E8BFF"):
     """
     Genera gráfico interactivo con estética Bloomberg Terminal
     """
+    import plotly.graph_objects as go
+    from utils.graficos import optimizar_payload
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -251,7 +297,284 @@ def crear_grafico_bloomberg(df, titulo, y_label, color="#2E8BFF"):
         margin=dict(l=60, r=40, t=80, b=60)
     )
     
-    return fig
+    return optimizar_payload(fig, etiqueta=titulo)
+
+def crear_grafico_tasas(series_bcra):
+    """
+    Gráfico integrado de todas las tasas BCRA
+    """
+    import plotly.graph_objects as go
+    from utils.graficos import optimizar_payload
+
+    fig_tasas = go.Figure()
+    
+    colores = ['#2E8BFF', '#FF6B6B', '#4ECDC4']
+    
+    for idx, (nombre, df) in enumerate(series_bcra.items()):
+        if not df.empty:
+            fig_tasas.add_trace(go.Scatter(
+                x=df['fecha'],
+                y=df['valor'],
+                mode='lines',
+                name=nombre.split('(')[0].strip(),
+                line=dict(color=colores[idx % len(colores)], width=2),
+                hovertemplate='<b>%{x|%Y-%m-%d}</b><br>%{y:.2f}%<extra></extra>'
+            ))
+    
+    fig_tasas.update_layout(
+        template="plotly_dark",
+        title=dict(
+            text="Evolución de Tasas de Interés",
+            font=dict(size=18, color='#2E8BFF', family='JetBrains Mono'),
+            x=0.5,
+            xanchor='center'
+        ),
+        xaxis=dict(title="Fecha", gridcolor='#1a1a1a', showgrid=True),
+        yaxis=dict(title="Tasa (%)", gridcolor='#1a1a1a', showgrid=True),
+        plot_bgcolor='#0a0a0a',
+        paper_bgcolor='#0a0a0a',
+        font=dict(color='#dddddd', family='JetBrains Mono'),
+        hovermode='x unified',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        ),
+        height=500,
+        margin=dict(l=60, r=40, t=100, b=60)
+    )
+    return optimizar_payload(fig_tasas, etiqueta="Tasas BCRA")
+
+def variacion_interanual(df_emae):
+    """Variación % contra el mismo mes del año anterior (None si faltan datos)."""
+    try:
+        ultimo = df_emae.iloc[-1]['valor']
+        hace_12_meses = df_emae.iloc[-13]['valor']
+        return float(((ultimo - hace_12_meses) / hace_12_meses) * 100)
+    except Exception:
+        return None
+
+def crear_grafico_emae(df_emae):
+    """Gráfico EMAE del dashboard"""
+    fig_emae = crear_grafico_bloomberg(
+        df_emae,
+        "Evolución del EMAE Desestacionalizado",
+        "Índice (Base 2004=100)",
+        "#2E8BFF"
+    )
+    fig_emae.update_layout(height=500)
+    return fig_emae
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 🧊 SNAPSHOT DE ARRANQUE (render inmediato + refresco en segundo plano)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+RUTA_SNAPSHOT = os.path.join(CACHE_DIR, 'snapshot_app.bin')
+# MONITOR_AR_REFRESCO_SNAPSHOT=0 apaga el hilo de refresco (ej. en la prueba de
+# carga, para no mezclar sus solicitudes upstream con las de las sesiones)
+REFRESCO_SNAPSHOT = os.environ.get('MONITOR_AR_REFRESCO_SNAPSHOT', '1') == '1'
+
+def _serie_para_snapshot(previo, nombre, descargar, intervalo):
+    """
+    Reutiliza la serie del snapshot previo si todavía está vigente; si no, la
+    descarga. Ante una falla conserva la previa marcada como caché.
+    """
+    info_previa = previo.info_serie(nombre) if previo else None
+    if info_previa and time.time() - info_previa['actualizado'] < intervalo:
+        return {'data': previo.serie(nombre), 'desde_cache': info_previa['desde_cache'],
+                'actualizado': info_previa['actualizado']}
+    try:
+        df = descargar()
+        if df is not None and not df.empty:
+            return {'data': df, 'desde_cache': False, 'actualizado': time.time()}
+    except Exception as e:
+        print(f"❌ Snapshot: error obteniendo {nombre}: {e}")
+    if info_previa:
+        return {'data': previo.serie(nombre), 'desde_cache': True,
+                'actualizado': info_previa['actualizado']}
+    return None
+
+def construir_snapshot(vivo):
+    """Descarga lo vencido, calcula derivados y figuras, y reescribe el bundle."""
+    previo = vivo.actual()
+    series = {}
+    
+    for id_serie, nombre in SERIES_MONETARIAS.items():
+        info = _serie_para_snapshot(previo, nombre, lambda i=id_serie: descargar_serie_monetaria(i),
+                                    INTERVALO_MONETARIAS)
+        if info:
+            series[nombre] = info
+    
+    info_emae = _serie_para_snapshot(previo, 'EMAE', descargar_emae, INTERVALO_EMAE)
+    if info_emae:
+        series['EMAE'] = info_emae
+    
+    series_bcra = {n: i['data'] for n, i in series.items() if n != 'EMAE'}
+    derivados = {}
+    figuras = {}
+    if series_bcra:
+        figuras['tasas'] = crear_grafico_tasas(series_bcra).to_json()
+    if info_emae:
+        derivados['emae_var_interanual'] = variacion_interanual(info_emae['data'])
+        figuras['emae'] = crear_grafico_emae(info_emae['data']).to_json()
+    
+    escribir_snapshot(RUTA_SNAPSHOT, series, derivados, figuras)
+    print(f"🧊 Snapshot actualizado: {len(series)} series, {len(figuras)} figuras")
+
+@st.cache_resource
+def snapshot_vivo():
+    """Acceso compartido (por proceso) al snapshot vigente, mapeado en memoria."""
+    return SnapshotVivo(RUTA_SNAPSHOT)
+
+@st.cache_resource
+def iniciar_refresco_snapshot():
+    """
+    Un único hilo de refresco por proceso; arranca al primer render. Sin
+    snapshot en disco ese primer render descarga las series por su cuenta,
+    así que el primer refresco espera al intervalo en vez de repetir la
+    descarga en el mismo momento.
+    """
+    if not REFRESCO_SNAPSHOT:
+        return None
+    vivo = snapshot_vivo()
+    return RefrescoSegundoPlano(lambda: construir_snapshot(vivo), INTERVALO_MONETARIAS,
+                                inmediato=vivo.actual() is not None).iniciar()
+
+iniciar_refresco_snapshot()
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 🧩 PANELES DEL DASHBOARD (fragmentos con rerun independiente)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@st.fragment(run_every=INTERVALO_MONETARIAS)
+def panel_tasas_monetarias():
+    """Panel de tasas BCRA. Se recalcula solo, sin rerun del resto de la página."""
+    snap = snapshot_vivo().actual()
+    series_bcra = {}
+    if snap is not None:
+        series_bcra = {n: snap.serie(n) for n in SERIES_MONETARIAS.values() if snap.info_serie(n)}
+    desde_snapshot = bool(series_bcra)
+    
+    if not desde_snapshot:
+        with st.spinner("📡 Conectando con BCRA API v3.0..."):
+            series_bcra = fetch_monetarias()
+    
+    if series_bcra:
+        # Mostrar último valor de cada tasa en tarjetas
+        cols_tasas = st.columns(len(series_bcra))
+        
+        for idx, (nombre, df) in enumerate(series_bcra.items()):
+            if not df.empty:
+                ultimo_valor = df.iloc[-1]['valor']
+                ultima_fecha = df.iloc[-1]['fecha'].strftime('%d/%m/%Y')
+                
+                with cols_tasas[idx]:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <div class='metric-title'>{nombre.split('(')[0].strip()}</div>
+                        <div class='metric-value'>{ultimo_valor:.2f}%</div>
+                        <div class='info-text'>Actualizado: {ultima_fecha}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Gráfico integrado de todas las tasas (del snapshot si está disponible)
+        fig_json = snap.figura_json('tasas') if desde_snapshot else None
+        fig_tasas = json.loads(fig_json) if fig_json else crear_grafico_tasas(series_bcra)
+        
+        st.plotly_chart(fig_tasas, use_container_width=True)
+        
+        st.markdown("""
+        <div class='info-text' style='text-align: center;'>
+            Fuente: Banco Central de la República Argentina (BCRA) - API v3.0 Estadísticas | 
+            Las tasas se expresan en TNA (Tasa Nominal Anual)
+        </div>
+        """, unsafe_allow_html=True)
+        
+    else:
+        st.error("⚠️ Series monetarias no disponibles en este momento. Verifique conectividad con BCRA.")
+
+@st.fragment(run_every=INTERVALO_EMAE)
+def panel_emae():
+    """Panel EMAE. Se recalcula solo, sin rerun del resto de la página."""
+    snap = snapshot_vivo().actual()
+    desde_snapshot = snap is not None and snap.info_serie('EMAE') is not None
+    
+    if desde_snapshot:
+        df_emae = snap.serie('EMAE')
+    else:
+        with st.spinner("📡 Conectando con Datos.gob Argentina..."):
+            df_emae = get_emae()
+    
+    if df_emae is not None and not df_emae.empty:
+        
+        # Tarjeta con último valor
+        ultimo_emae = df_emae.iloc[-1]['valor']
+        fecha_emae = df_emae.iloc[-1]['fecha'].strftime('%m/%Y')
+        
+        # Variación interanual (precalculada en el snapshot)
+        if desde_snapshot:
+            var_interanual = snap.derivado('emae_var_interanual')
+        else:
+            var_interanual = variacion_interanual(df_emae)
+        
+        if var_interanual is not None:
+            var_color = "#4ECDC4" if var_interanual >= 0 else "#FF6B6B"
+            var_simbolo = "▲" if var_interanual >= 0 else "▼"
+        else:
+            var_color = "#888"
+            var_simbolo = "—"
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <div class='metric-title'>Nivel EMAE (Base 2004=100)</div>
+                <div class='metric-value'>{ultimo_emae:.2f}</div>
+                <div class='info-text'>Período: {fecha_emae}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            if var_interanual is not None:
+                st.markdown(f"""
+                <div class='metric-card'>
+                    <div class='metric-title'>Variación Interanual</div>
+                    <div class='metric-value' style='color: {var_color};'>{var_simbolo} {var_interanual:+.2f}%</div>
+                    <div class='info-text'>vs mismo mes año anterior</div>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown("""
+                <div class='metric-card'>
+                    <div class='metric-title'>Variación Interanual</div>
+                    <div class='metric-value' style='color: #888;'>— N/D</div>
+                    <div class='info-text'>Datos insuficientes</div>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Gráfico EMAE (del snapshot si está disponible)
+        fig_json = snap.figura_json('emae') if desde_snapshot else None
+        fig_emae = json.loads(fig_json) if fig_json else crear_grafico_emae(df_emae)
+        
+        st.plotly_chart(fig_emae, use_container_width=True)
+        
+        st.markdown("""
+        <div class='info-text' style='text-align: center;'>
+            Fuente: INDEC vía Datos.gob Argentina | 
+            Serie desestacionalizada Base 2004=100 | 
+            Actualización mensual con rezago de ~30 días
+        </div>
+        """, unsafe_allow_html=True)
+        
+    else:
+        st.error("⚠️ EMAE no disponible en este momento. Endpoint fuera de servicio o sin datos.")
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 🧭 SIDEBAR NAVEGACIÓN
@@ -268,9 +591,16 @@ st.sidebar.markdown("""
 st.sidebar.markdown("---")
 
 # Selector de sección
+SECCIONES = ["🏠 Inicio", "📊 Dashboard Macro", "💹 Mercado"]
+
+def ir_al_dashboard():
+    """Callback del botón de inicio: cambia de sección antes del rerun."""
+    st.session_state['seccion'] = "📊 Dashboard Macro"
+
 seccion = st.sidebar.radio(
     "NAVEGACIÓN",
-    ["🏠 Inicio", "📊 Dashboard Macro", "💹 Mercado"],
+    SECCIONES,
+    key="seccion",
     label_visibility="collapsed"
 )
 
@@ -350,8 +680,7 @@ if seccion == "🏠 Inicio":
     
     col_a, col_b, col_c = st.columns([1, 2, 1])
     with col_b:
-        if st.button("🚀 IR AL DASHBOARD", use_container_width=True):
-            st.rerun()
+        st.button("🚀 IR AL DASHBOARD", use_container_width=True, on_click=ir_al_dashboard)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 📊 SECCIÓN: DASHBOARD MACRO
@@ -370,81 +699,7 @@ elif seccion == "📊 Dashboard Macro":
     
     st.markdown("### 🏦 Tasas de Interés y Política Monetaria")
     
-    with st.spinner("📡 Conectando con BCRA API v3.0..."):
-        series_bcra = fetch_monetarias()
-    
-    if series_bcra:
-        # Mostrar último valor de cada tasa en tarjetas
-        cols_tasas = st.columns(len(series_bcra))
-        
-        for idx, (nombre, df) in enumerate(series_bcra.items()):
-            if not df.empty:
-                ultimo_valor = df.iloc[-1]['valor']
-                ultima_fecha = df.iloc[-1]['fecha'].strftime('%d/%m/%Y')
-                
-                with cols_tasas[idx]:
-                    st.markdown(f"""
-                    <div class='metric-card'>
-                        <div class='metric-title'>{nombre.split('(')[0].strip()}</div>
-                        <div class='metric-value'>{ultimo_valor:.2f}%</div>
-                        <div class='info-text'>Actualizado: {ultima_fecha}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        
-        # Gráfico integrado de todas las tasas
-        fig_tasas = go.Figure()
-        
-        colores = ['#2E8BFF', '#FF6B6B', '#4ECDC4']
-        
-        for idx, (nombre, df) in enumerate(series_bcra.items()):
-            if not df.empty:
-                fig_tasas.add_trace(go.Scatter(
-                    x=df['fecha'],
-                    y=df['valor'],
-                    mode='lines',
-                    name=nombre.split('(')[0].strip(),
-                    line=dict(color=colores[idx % len(colores)], width=2),
-                    hovertemplate='<b>%{x|%Y-%m-%d}</b><br>%{y:.2f}%<extra></extra>'
-                ))
-        
-        fig_tasas.update_layout(
-            template="plotly_dark",
-            title=dict(
-                text="Evolución de Tasas de Interés",
-                font=dict(size=18, color='#2E8BFF', family='JetBrains Mono'),
-                x=0.5,
-                xanchor='center'
-            ),
-            xaxis=dict(title="Fecha", gridcolor='#1a1a1a', showgrid=True),
-            yaxis=dict(title="Tasa (%)", gridcolor='#1a1a1a', showgrid=True),
-            plot_bgcolor='#0a0a0a',
-            paper_bgcolor='#0a0a0a',
-            font=dict(color='#dddddd', family='JetBrains Mono'),
-            hovermode='x unified',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5
-            ),
-            height=500,
-            margin=dict(l=60, r=40, t=100, b=60)
-        )
-        
-        st.plotly_chart(fig_tasas, use_container_width=True)
-        
-        st.markdown("""
-        <div class='info-text' style='text-align: center;'>
-            Fuente: Banco Central de la República Argentina (BCRA) - API v3.0 Estadísticas | 
-            Las tasas se expresan en TNA (Tasa Nominal Anual)
-        </div>
-        """, unsafe_allow_html=True)
-        
-    else:
-        st.error("⚠️ Series monetarias no disponibles en este momento. Verifique conectividad con BCRA.")
+    panel_tasas_monetarias()
     
     st.markdown("<br><br>", unsafe_allow_html=True)
     
@@ -454,79 +709,7 @@ elif seccion == "📊 Dashboard Macro":
     
     st.markdown("### 📈 Estimador Mensual de Actividad Económica (EMAE)")
     
-    with st.spinner("📡 Conectando con Datos.gob Argentina..."):
-        df_emae = get_emae()
-    
-    if df_emae is not None and not df_emae.empty:
-        
-        # Tarjeta con último valor
-        ultimo_emae = df_emae.iloc[-1]['valor']
-        fecha_emae = df_emae.iloc[-1]['fecha'].strftime('%m/%Y')
-        
-        # Calcular variación interanual
-        try:
-            hace_12_meses = df_emae.iloc[-13]['valor']
-            var_interanual = ((ultimo_emae - hace_12_meses) / hace_12_meses) * 100
-            var_color = "#4ECDC4" if var_interanual >= 0 else "#FF6B6B"
-            var_simbolo = "▲" if var_interanual >= 0 else "▼"
-        except:
-            var_interanual = None
-            var_color = "#888"
-            var_simbolo = "—"
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <div class='metric-title'>Nivel EMAE (Base 2004=100)</div>
-                <div class='metric-value'>{ultimo_emae:.2f}</div>
-                <div class='info-text'>Período: {fecha_emae}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            if var_interanual is not None:
-                st.markdown(f"""
-                <div class='metric-card'>
-                    <div class='metric-title'>Variación Interanual</div>
-                    <div class='metric-value' style='color: {var_color};'>{var_simbolo} {var_interanual:+.2f}%</div>
-                    <div class='info-text'>vs mismo mes año anterior</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div class='metric-card'>
-                    <div class='metric-title'>Variación Interanual</div>
-                    <div class='metric-value' style='color: #888;'>— N/D</div>
-                    <div class='info-text'>Datos insuficientes</div>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        
-        # Gráfico EMAE
-        fig_emae = crear_grafico_bloomberg(
-            df_emae,
-            "Evolución del EMAE Desestacionalizado",
-            "Índice (Base 2004=100)",
-            "#2E8BFF"
-        )
-        
-        fig_emae.update_layout(height=500)
-        
-        st.plotly_chart(fig_emae, use_container_width=True)
-        
-        st.markdown("""
-        <div class='info-text' style='text-align: center;'>
-            Fuente: INDEC vía Datos.gob Argentina | 
-            Serie desestacionalizada Base 2004=100 | 
-            Actualización mensual con rezago de ~30 días
-        </div>
-        """, unsafe_allow_html=True)
-        
-    else:
-        st.error("⚠️ EMAE no disponible en este momento. Endpoint fuera de servicio o sin datos.")
+    panel_emae()
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 💹 SECCIÓN: MERCADO (Placeholder)
@@ -0,0 +1,48 @@
+"""
+Exporta las series cacheadas a un ZIP (CSV o Parquet), con filtro de fechas.
+
+Uso:
+    python exportar_series.py
+    python exportar_series.py --series TPM BADLAR --desde 2024-01-01 --formato parquet
+    python exportar_series.py --salida - > series.zip
+"""
+import sys
+import argparse
+from datetime import date
+
+from utils.api_helpers import series_registradas
+from utils.exportacion import FORMATOS, exportar_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta series cacheadas de Monitor AR")
+    parser.add_argument('--series', nargs='+', choices=series_registradas(),
+                        help="series a exportar (por defecto, todas)")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv')
+    parser.add_argument('--desde', help="fecha inicial inclusiva (YYYY-MM-DD)")
+    parser.add_argument('--hasta', help="fecha final inclusiva (YYYY-MM-DD)")
+    parser.add_argument('--salida', help="archivo ZIP de salida ('-' para stdout)")
+    args = parser.parse_args()
+
+    salida = args.salida or f"monitor_ar_series_{date.today():%Y%m%d}.zip"
+    if salida == '-':
+        destino = sys.stdout.buffer
+        # Los mensajes de progreso van a stderr para no mezclarse con el ZIP
+        sys.stdout = sys.stderr
+    else:
+        destino = salida
+
+    resumen = exportar_series(destino, args.series, args.formato, args.desde, args.hasta)
+
+    for nombre in resumen['omitidas']:
+        print(f"⚠️ {nombre}: sin caché, se omite")
+    if not resumen['series']:
+        print("❌ No hay series en caché para exportar")
+        return 1
+    if salida != '-':
+        print(f"✅ Exportación guardada en {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Costo de importación del data layer, medido con `python -X importtime`.
+
+Cada módulo se importa en un proceso nuevo (intérprete frío) y se reporta el
+tiempo acumulado y qué dependencias pesadas arrastró. Los workers y los CLI
+importan estos módulos: no deben cargar pandas/plotly/streamlit/requests hasta
+el primer uso.
+
+Uso:
+    python medir_importacion.py
+    python medir_importacion.py --repeticiones 5 --json importacion.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+DIR_MONITOR = os.path.dirname(os.path.abspath(__file__))
+
+# Presupuesto de importación en frío por módulo (ms, holgado para CI)
+PRESUPUESTOS_MS = {
+    'utils.cache_manager': 100,
+    'utils.streaming': 100,
+    'utils.snapshot': 100,
+    'utils.revisiones': 100,
+    'utils.trabajos': 100,
+    'utils.api_helpers': 150,
+    'verificar_apis': 150,
+}
+
+# Paquetes que ningún módulo presupuestado puede cargar al importarse
+PESADOS = {'pandas', 'numpy', 'plotly', 'streamlit', 'requests'}
+
+
+def _parsear_importtime(salida):
+    """Líneas `import time: self | acumulado | módulo` -> {módulo: acumulado_us}."""
+    tiempos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        tiempos[partes[2].strip()] = int(partes[1])
+    return tiempos
+
+
+def medir(modulo, repeticiones=3):
+    """
+    Importa `modulo` en `repeticiones` procesos nuevos.
+    Retorna dict: {'modulo', 'total_ms' (mejor corrida), 'pesados' (lista)}
+    """
+    mejor = None
+    pesados = set()
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+            cwd=DIR_MONITOR, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {modulo}: {proceso.stderr.strip().splitlines()[-1]}")
+        tiempos = _parsear_importtime(proceso.stderr)
+        total_ms = tiempos.get(modulo, 0) / 1000
+        mejor = total_ms if mejor is None else min(mejor, total_ms)
+        pesados |= PESADOS & {nombre.split('.')[0] for nombre in tiempos}
+    return {'modulo': modulo, 'total_ms': round(mejor, 1), 'pesados': sorted(pesados)}
+
+
+def verificar(resultado):
+    """Lista de problemas del resultado frente a su presupuesto (vacía si está OK)."""
+    problemas = []
+    presupuesto = PRESUPUESTOS_MS.get(resultado['modulo'])
+    if presupuesto is not None and resultado['total_ms'] > presupuesto:
+        problemas.append(f"{resultado['total_ms']:.1f} ms > {presupuesto} ms")
+    if resultado['pesados']:
+        problemas.append(f"carga {', '.join(resultado['pesados'])} al importar")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el costo de importación del data layer")
+    parser.add_argument('modulos', nargs='*', help="módulos a medir (por defecto, los presupuestados)")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--json', help="guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    resultados = []
+    fallas = 0
+    print(f"{'Módulo':<24}{'ms':>8}{'Presup.':>10}  Estado")
+    print("-" * 60)
+    for modulo in args.modulos or PRESUPUESTOS_MS:
+        resultado = medir(modulo, args.repeticiones)
+        resultado['problemas'] = verificar(resultado)
+        resultados.append(resultado)
+        fallas += bool(resultado['problemas'])
+        presupuesto = PRESUPUESTOS_MS.get(modulo, '-')
+        estado = '✅' if not resultado['problemas'] else '❌ ' + '; '.join(resultado['problemas'])
+        print(f"{modulo:<24}{resultado['total_ms']:>8.1f}{presupuesto:>10}  {estado}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
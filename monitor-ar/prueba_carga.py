@@ -0,0 +1,272 @@
+"""
+Prueba de carga: N sesiones concurrentes de los dashboards contra el stub local.
+
+Todas las sesiones corren como hilos de un mismo proceso, cada una con su
+streamlit.testing (AppTest), y comparten un único runtime: las mismas cachés
+(st.cache_data/st.cache_resource), la misma sesión HTTP y el mismo limitador,
+igual que los usuarios de un `streamlit run`. El CPU y el RSS por sesión son
+el delta sobre una línea de base (proceso con los módulos ya importados y sin
+sesiones) dividido por la cantidad de sesiones. El hilo de refresco del
+snapshot se apaga durante la prueba para que las solicitudes upstream sean
+solo las de las sesiones.
+
+Uso:
+    python prueba_carga.py --sesiones 8 --rondas 3
+    python prueba_carga.py --pagina macro --latencia-ms 200 --json carga.json --max-p95-ms 4000
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+
+DIR_MONITOR = os.path.dirname(os.path.abspath(__file__))
+DIR_RAIZ = os.path.dirname(DIR_MONITOR)
+
+PAGINAS = {
+    'app': os.path.join(DIR_RAIZ, 'app.py'),
+    'macro': os.path.join(DIR_RAIZ, 'pages', 'dashboard_macro.py'),
+}
+
+SECCION_DASHBOARD = "📊 Dashboard Macro"
+
+# Intervalo de muestreo del RSS durante la prueba (segundos)
+INTERVALO_MUESTREO = 0.05
+
+
+def percentil(valores, p):
+    """Percentil por interpolación lineal (p en 0-100)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    bajo = int(k)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (k - bajo)
+
+
+def rss_mb():
+    """RSS actual del proceso en MB (en Linux, de /proc; si no, el máximo histórico)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo / 2**20 if sys.platform == 'darwin' else maximo / 1024
+
+
+class MuestreoRSS:
+    """Hilo que registra el RSS máximo del proceso mientras corre la prueba."""
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.maximo = rss_mb()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name='muestreo-rss', daemon=True)
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            self.maximo = max(self.maximo, rss_mb())
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+        self.maximo = max(self.maximo, rss_mb())
+
+
+def precalentar():
+    """
+    Importa lo que cualquier sesión necesita (Streamlit, pandas, Plotly, utils)
+    para que la línea de base no le cargue las importaciones a la primera sesión.
+    """
+    if DIR_MONITOR not in sys.path:
+        sys.path.insert(0, DIR_MONITOR)
+    import pandas  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest  # noqa: F401
+    import utils.api_helpers  # noqa: F401
+
+
+def limpiar_runtime():
+    """Vacía las cachés de Streamlit del proceso: cada página arranca en frío."""
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    gc.collect()
+
+
+def correr_sesion(pagina, rondas, timeout, barrera, apps):
+    """
+    Una sesión de usuario: render inicial + `rondas` reruns (en app.py, el
+    primer rerun navega al dashboard). Retorna métricas de la sesión y deja su
+    AppTest en `apps` para que siga viva (y cuente en el RSS) hasta el final.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    latencias = []
+    errores = []
+    barrera.wait()
+
+    at = AppTest.from_file(PAGINAS[pagina], default_timeout=timeout)
+    apps.append(at)
+    for ronda in range(rondas + 1):
+        if pagina == 'app' and ronda == 1:
+            at.sidebar.radio[0].set_value(SECCION_DASHBOARD)
+        inicio = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:
+            errores.append(f"{type(e).__name__}: {e}")
+            break
+        latencias.append(time.perf_counter() - inicio)
+        if at.exception:
+            errores.extend(e.message for e in at.exception)
+
+    return {'pagina': pagina, 'latencias': latencias, 'errores': errores}
+
+
+def correr_pagina(pagina, sesiones, rondas, timeout):
+    """Corre `sesiones` hilos concurrentes sobre la página y mide CPU/RSS contra la base."""
+    limpiar_runtime()
+    base_rss = rss_mb()
+    base_cpu = time.process_time()
+
+    barrera = threading.Barrier(sesiones)
+    apps = []
+    resultados = [None] * sesiones
+
+    def sesion(i):
+        resultados[i] = correr_sesion(pagina, rondas, timeout, barrera, apps)
+
+    hilos = [threading.Thread(target=sesion, args=(i,), name=f'sesion-{i}') for i in range(sesiones)]
+    inicio = time.perf_counter()
+    with MuestreoRSS() as muestreo:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        cpu = time.process_time() - base_cpu
+        rss_final = rss_mb()
+
+    del apps[:]
+    return {
+        'resultados': [r for r in resultados if r is not None],
+        'duracion_s': duracion,
+        'cpu_s': cpu,
+        'rss_base_mb': base_rss,
+        'rss_delta_mb': max(rss_final - base_rss, 0.0),
+        'rss_pico_delta_mb': max(muestreo.maximo - base_rss, 0.0),
+    }
+
+
+def resumir(corrida, stub_total):
+    resultados = corrida['resultados']
+    sesiones = max(len(resultados), 1)
+    latencias = [l for r in resultados for l in r['latencias']]
+    return {
+        'sesiones': len(resultados),
+        'renders': len(latencias),
+        'duracion_s': corrida['duracion_s'],
+        'latencia_ms': {
+            'p50': percentil(latencias, 50) * 1000,
+            'p95': percentil(latencias, 95) * 1000,
+            'p99': percentil(latencias, 99) * 1000,
+            'max': max(latencias, default=0) * 1000,
+        },
+        'solicitudes_upstream': {
+            'total_stub': stub_total,
+            'por_sesion_promedio': stub_total / sesiones,
+        },
+        'cpu_s': {
+            'total': corrida['cpu_s'],
+            'por_sesion': corrida['cpu_s'] / sesiones,
+        },
+        'rss_mb': {
+            'base': corrida['rss_base_mb'],
+            'delta_por_sesion': corrida['rss_delta_mb'] / sesiones,
+            'pico_delta_por_sesion': corrida['rss_pico_delta_mb'] / sesiones,
+        },
+        'errores': [e for r in resultados for e in r['errores']],
+    }
+
+
+def ejecutar_carga(paginas, sesiones, rondas, latencia_ms=0, tasa_429=0.0, timeout=30):
+    """Levanta el stub, corre las sesiones concurrentes de cada página y retorna el resumen."""
+    from stub_api import ServidorStub
+
+    resumen = {}
+    with ServidorStub(latencia_ms=latencia_ms, tasa_429=tasa_429) as stub, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        # Antes de importar utils: las URLs y el directorio de caché se leen al importar
+        os.environ.update(stub.variables_entorno())
+        os.environ['MONITOR_AR_CACHE_DIR'] = cache_dir
+        os.environ['MONITOR_AR_REFRESCO_SNAPSHOT'] = '0'
+        precalentar()
+
+        for pagina in paginas:
+            stub.reiniciar_conteos()
+            corrida = correr_pagina(pagina, sesiones, rondas, timeout)
+            resumen[pagina] = resumir(corrida, stub.total_solicitudes())
+    return resumen
+
+
+def imprimir_resumen(resumen):
+    for pagina, r in resumen.items():
+        lat = r['latencia_ms']
+        print(f"\n📊 {pagina}: {r['sesiones']} sesiones, {r['renders']} renders en {r['duracion_s']:.1f}s")
+        print(f"   Latencia render   p50 {lat['p50']:.0f} ms | p95 {lat['p95']:.0f} ms | p99 {lat['p99']:.0f} ms | max {lat['max']:.0f} ms")
+        print(f"   Upstream          {r['solicitudes_upstream']['total_stub']} total | "
+              f"{r['solicitudes_upstream']['por_sesion_promedio']:.1f} por sesión")
+        print(f"   CPU por sesión    {r['cpu_s']['por_sesion']:.2f} s ({r['cpu_s']['total']:.2f} s en total)")
+        print(f"   RSS por sesión    +{r['rss_mb']['delta_por_sesion']:.1f} MB al final | "
+              f"+{r['rss_mb']['pico_delta_por_sesion']:.1f} MB en el pico (base {r['rss_mb']['base']:.0f} MB)")
+        if r['errores']:
+            print(f"   ❌ {len(r['errores'])} errores de script: {r['errores'][0][:200]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los dashboards contra el stub local")
+    parser.add_argument('--sesiones', type=int, default=4)
+    parser.add_argument('--rondas', type=int, default=2, help="reruns por sesión después del render inicial")
+    parser.add_argument('--pagina', choices=['app', 'macro', 'ambas'], default='ambas')
+    parser.add_argument('--latencia-ms', type=float, default=0, help="latencia simulada del upstream")
+    parser.add_argument('--tasa-429', type=float, default=0.0, help="fracción de respuestas 429 del stub")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', help="guardar el resumen en este archivo")
+    parser.add_argument('--max-p95-ms', type=float, help="falla (exit 1) si el p95 supera este valor")
+    args = parser.parse_args()
+
+    paginas = list(PAGINAS) if args.pagina == 'ambas' else [args.pagina]
+    print("\n" + "🚀 MONITOR AR - PRUEBA DE CARGA ".center(70, "="))
+    print(f"   Sesiones: {args.sesiones} | Rondas: {args.rondas} | Latencia upstream: {args.latencia_ms} ms")
+
+    resumen = ejecutar_carga(paginas, args.sesiones, args.rondas, args.latencia_ms, args.tasa_429, args.timeout)
+    imprimir_resumen(resumen)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+
+    fallas = [p for p, r in resumen.items() if r['errores']]
+    if args.max_p95_ms is not None:
+        fallas += [p for p, r in resumen.items() if r['latencia_ms']['p95'] > args.max_p95_ms]
+    if fallas:
+        print(f"\n⚠️  Regresión o errores en: {', '.join(sorted(set(fallas)))}")
+        return 1
+    print("\n✅ Prueba de carga completada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
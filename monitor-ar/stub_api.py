@@ -0,0 +1,279 @@
+"""
+Servidor local que imita las APIs de BCRA y datos.gob.ar con datos sintéticos
+deterministas. Sirve para pruebas offline, pruebas de carga y desarrollo sin red.
+
+Uso:
+    python stub_api.py --puerto 8765
+    # y en otra terminal, con las variables que imprime:
+    streamlit run ../app.py
+"""
+import io
+import re
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Endpoints BCRA (estadísticas cambiarias v1.0) → nivel de la serie sintética
+SERIES_BCRA = {
+    '/datos/tpm': 40.0,
+    '/datos/badlar': 35.0,
+    '/datos/tasasPasivas': 1.0,
+}
+
+# Series monetarias BCRA v3.0 por id
+SERIES_BCRA_V3 = {
+    160: 40.0,
+    145: 35.0,
+    132: 38.0,
+}
+
+
+def serie_diaria(nivel, dias=365, semilla=0, hasta=None):
+    """Serie diaria [(fecha_iso, valor)] tipo random walk alrededor de `nivel`."""
+    rnd = random.Random(semilla)
+    hasta = hasta or date.today()
+    valor = nivel
+    filas = []
+    for i in range(dias):
+        valor = max(0.01, valor + rnd.gauss(0, nivel * 0.005))
+        filas.append(((hasta - timedelta(days=dias - 1 - i)).isoformat(), round(valor, 4)))
+    return filas
+
+
+def serie_mensual(nivel=100.0, desde=date(2004, 1, 1), meses=260, semilla=0):
+    """Serie mensual [(fecha_iso, valor)] con tendencia y estacionalidad suaves."""
+    rnd = random.Random(semilla)
+    filas = []
+    for i in range(meses):
+        anio, mes = desde.year + (desde.month - 1 + i) // 12, (desde.month - 1 + i) % 12 + 1
+        valor = nivel * (1 + 0.002 * i) + 3 * ((mes % 12) - 6) / 6 + rnd.gauss(0, 0.8)
+        filas.append((date(anio, mes, 1).isoformat(), round(valor, 4)))
+    return filas
+
+
+# Catálogo sintético: algunas series reales más relleno para volumen
+CATALOGO_BASE = [
+    ('143.3_NO_PR_2004_A_21', 'EMAE original', 'Estimador Mensual de Actividad Económica', 'R/P1M', 'INDEC'),
+    ('11.3_VMATC_2004_M_36', 'EMAE desestacionalizado', 'EMAE serie desestacionalizada', 'R/P1M', 'INDEC'),
+    ('148.3_INIVELNAL_DICI_M_26', 'IPC nivel general nacional', 'Índice de precios al consumidor', 'R/P1M', 'INDEC'),
+    ('168.1_T_CAMBIOR_D_0_0_26', 'Tipo de cambio BNA vendedor', 'Tipo de cambio de referencia', 'R/P1D', 'BCRA'),
+    ('89.2_TS_INTELAR_0_A_21', 'Tasa de interés BADLAR', 'Depósitos a plazo fijo de más de un millón', 'R/P1D', 'BCRA'),
+    ('4.2_OGP_2004_T_17', 'PIB a precios de 2004', 'Oferta y demanda globales trimestral', 'R/P3M', 'INDEC'),
+]
+
+COLUMNAS_CATALOGO = ['serie_id', 'serie_titulo', 'serie_descripcion', 'serie_unidades',
+                     'indice_tiempo_frecuencia', 'dataset_fuente', 'dataset_titulo', 'dataset_tema',
+                     'serie_indice_inicio', 'serie_indice_final', 'serie_discontinuada']
+
+
+def catalogo_csv(relleno=0):
+    """Dump de metadatos con el formato de datos.gob (series-tiempo-metadatos.csv)."""
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(COLUMNAS_CATALOGO)
+    filas = list(CATALOGO_BASE) + [
+        (f'999.{i}_SINTETICA_{i}', f'Serie sintética {i}', f'Indicador de relleno número {i}',
+         'R/P1M' if i % 3 else 'R/P1D', 'Ministerio de Economía' if i % 2 else 'INDEC')
+        for i in range(relleno)
+    ]
+    for serie_id, titulo, descripcion, frecuencia, fuente in filas:
+        escritor.writerow([serie_id, titulo, descripcion, 'Índice', frecuencia, fuente,
+                           descripcion, 'Economía', '2004-01-01', '2025-12-01', 'False'])
+    return salida.getvalue()
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    servidor_stub = None  # asignado por ServidorStub
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, cuerpo, tipo='application/json', headers=None):
+        datos = cuerpo.encode('utf-8') if isinstance(cuerpo, str) else cuerpo
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(datos)))
+        for clave, valor in (headers or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        stub = self.servidor_stub
+        url = urlparse(self.path)
+        ruta = url.path
+
+        if ruta == '/__stats':
+            return self._responder(200, json.dumps(stub.estadisticas()))
+
+        stub.registrar(ruta)
+        if stub.latencia:
+            time.sleep(stub.latencia)
+        if stub.falla_todo:
+            return self._responder(503, '{"error": "stub caído"}', headers={'Retry-After': '0'})
+        if stub.tasa_429 and stub._rnd.random() < stub.tasa_429:
+            return self._responder(429, '{"error": "too many requests"}', headers={'Retry-After': '1'})
+
+        # BCRA cambiarias v1.0
+        for sufijo, nivel in SERIES_BCRA.items():
+            if ruta.endswith(sufijo):
+                filas = serie_diaria(nivel, stub.dias, semilla=sum(map(ord, sufijo)))
+                cuerpo = {'status': 200, 'results': [
+                    {'fecha': f, 'valor': v, 'idVariable': sufijo} for f, v in filas
+                ]}
+                return self._responder(200, json.dumps(cuerpo))
+
+        # BCRA v3.0: /Datos/Monetarios/{id}/{desde}/{hasta}
+        m = re.search(r'/Datos/Monetarios/(\d+)/', ruta)
+        if m and int(m.group(1)) in SERIES_BCRA_V3:
+            id_serie = int(m.group(1))
+            filas = serie_diaria(SERIES_BCRA_V3[id_serie], stub.dias, semilla=id_serie)
+            cuerpo = {'status': 200, 'metadata': {'resultset': {'count': len(filas)}}, 'results': [
+                {'idVariable': id_serie, 'fecha': f, 'valor': v} for f, v in filas
+            ]}
+            return self._responder(200, json.dumps(cuerpo))
+
+        # datos.gob.ar dump de metadatos del catálogo
+        if ruta.endswith('/dump/series-tiempo-metadatos.csv'):
+            return self._responder(200, catalogo_csv(stub.catalogo_relleno), tipo='text/csv')
+
+        # datos.gob.ar API series: /series/?ids=...&format=csv|json
+        if ruta.rstrip('/').endswith('/series'):
+            params = parse_qs(url.query)
+            ids = params.get('ids', ['serie'])[0]
+            filas = serie_mensual(meses=stub.meses, semilla=len(ids))
+            # Revisión tipo INDEC: los últimos `meses_revisados` meses cambian de valor
+            if stub.meses_revisados:
+                corte = len(filas) - stub.meses_revisados
+                filas = filas[:corte] + [(f, round(v + 0.5, 4)) for f, v in filas[corte:]]
+            if params.get('format', ['json'])[0] == 'csv':
+                lineas = [f'indice_tiempo,{ids}'] + [f'{f},{v}' for f, v in filas]
+                return self._responder(200, '\n'.join(lineas) + '\n', tipo='text/csv')
+            cuerpo = {'data': [[f, v] for f, v in filas], 'count': len(filas), 'meta': [{'ids': ids}]}
+            return self._responder(200, json.dumps(cuerpo))
+
+        # Descarga CSV directa (fallback EMAE de app.py)
+        if ruta.endswith('.csv'):
+            filas = serie_mensual(meses=stub.meses)
+            lineas = ['indice_tiempo,emae_original,emae_desestacionalizado'] + [
+                f'{f},{v},{v}' for f, v in filas
+            ]
+            return self._responder(200, '\n'.join(lineas) + '\n', tipo='text/csv')
+
+        return self._responder(404, '{"error": "ruta desconocida"}')
+
+    def do_POST(self):
+        # Webhook de prueba: guarda el cuerpo JSON recibido
+        stub = self.servidor_stub
+        if urlparse(self.path).path != '/__webhook':
+            return self._responder(404, '{"error": "ruta desconocida"}')
+        largo = int(self.headers.get('Content-Length', 0))
+        with stub._lock:
+            stub.webhooks.append(json.loads(self.rfile.read(largo) or b'null'))
+        return self._responder(200, '{"ok": true}')
+
+
+class ServidorStub:
+    """
+    Servidor stub en un hilo de fondo. Usable como context manager:
+
+        with ServidorStub() as stub:
+            os.environ.update(stub.variables_entorno())
+            ...
+            stub.conteos  # solicitudes recibidas por ruta
+            stub.webhooks  # cuerpos JSON recibidos en POST /__webhook
+    """
+
+    def __init__(self, puerto=0, latencia_ms=0, tasa_429=0.0, dias=365, meses=260, semilla=0):
+        self.latencia = latencia_ms / 1000
+        self.tasa_429 = tasa_429
+        self.falla_todo = False
+        self.dias = dias
+        self.meses = meses
+        self.meses_revisados = 0
+        self.conteos = Counter()
+        self.webhooks = []
+        self.catalogo_relleno = 200
+        self._rnd = random.Random(semilla)
+        self._lock = threading.Lock()
+        manejador = type('Manejador', (_Manejador,), {'servidor_stub': self})
+        self._http = ThreadingHTTPServer(('127.0.0.1', puerto), manejador)
+        self._http.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._http.server_address[:2]
+        return f'http://{host}:{puerto}'
+
+    def registrar(self, ruta):
+        with self._lock:
+            self.conteos[ruta] += 1
+
+    def total_solicitudes(self):
+        with self._lock:
+            return sum(self.conteos.values())
+
+    def reiniciar_conteos(self):
+        with self._lock:
+            self.conteos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return {'total': sum(self.conteos.values()), 'por_ruta': dict(self.conteos)}
+
+    def variables_entorno(self):
+        """Variables MONITOR_AR_* que apuntan la app y el data layer a este stub."""
+        return {
+            'MONITOR_AR_BCRA_URL': f'{self.url}/bcra/estadisticascambiarias/v1.0',
+            'MONITOR_AR_BCRA_V3_URL': f'{self.url}/bcra/estadisticas/v3.0',
+            'MONITOR_AR_DATOS_GOB_URL': f'{self.url}/datosgob/series/api',
+            'MONITOR_AR_EMAE_CSV_URL': f'{self.url}/infra/emae.csv',
+        }
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local de las APIs BCRA y datos.gob.ar")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia-ms', type=float, default=0)
+    parser.add_argument('--tasa-429', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = ServidorStub(args.puerto, args.latencia_ms, args.tasa_429).iniciar()
+    print(f"🧪 Stub escuchando en {stub.url}")
+    print("   Exportar antes de iniciar la app:")
+    for clave, valor in stub.variables_entorno().items():
+        print(f"   export {clave}={valor}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
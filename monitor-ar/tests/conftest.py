@@ -0,0 +1,38 @@
+import pytest
+
+from stub_api import ServidorStub
+from utils import api_helpers, limitador
+
+
+@pytest.fixture(scope='session')
+def stub():
+    """Stub local de BCRA/datos.gob compartido por toda la sesión de pruebas."""
+    with ServidorStub() as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Directorio de caché aislado por prueba."""
+    directorio = tmp_path / 'cache'
+    directorio.mkdir()
+    monkeypatch.setattr(api_helpers, 'CACHE_DIR', str(directorio))
+    return directorio
+
+
+@pytest.fixture
+def api_stub(stub, cache_dir, monkeypatch):
+    """Data layer apuntando al stub, con caché vacía y conteos en cero."""
+    entorno = stub.variables_entorno()
+    for clave, valor in entorno.items():
+        monkeypatch.setenv(clave, valor)
+    monkeypatch.setattr(api_helpers, 'BCRA_BASE_URL', entorno['MONITOR_AR_BCRA_URL'])
+    monkeypatch.setattr(api_helpers, 'DATOS_GOB_BASE_URL', entorno['MONITOR_AR_DATOS_GOB_URL'])
+    # Sin throttling local: las pruebas miden el código, no el limitador
+    monkeypatch.setitem(limitador.LIMITES_HOST, '127.0.0.1',
+                        {'tasa': 1000.0, 'rafaga': 1000, 'max_concurrencia': 16, 'latencia_objetivo': 5.0})
+    monkeypatch.setattr(limitador, '_limitadores', {})
+    stub.reiniciar_conteos()
+    stub.falla_todo = False
+    yield stub
+    stub.falla_todo = False
@@ -0,0 +1,126 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils.alertas import (MotorAlertas, Regla, ReglaCambio, ReglaCambioSigno, ReglaMovimiento,
+                           SinkArchivo, SinkWebhook, cargar_reglas, crear_regla, obtener_motor)
+
+
+def _df(valores, inicio='2024-01-01', freq='D'):
+    return pd.DataFrame({'fecha': pd.date_range(inicio, periods=len(valores), freq=freq),
+                         'valor': [float(v) for v in valores]})
+
+
+def test_reglas_sobre_ventana():
+    assert ReglaMovimiento('BADLAR', umbral_pb=50).evaluar([30.0], 30.6) is not None
+    assert ReglaMovimiento('BADLAR', umbral_pb=50).evaluar([30.0], 30.4) is None
+    assert ReglaMovimiento('BADLAR', umbral_pb=50, ventana=3).evaluar([30.0, 30.3, 30.4], 30.5) is not None
+
+    regla = ReglaCambioSigno('EMAE', periodos=2)
+    # interanual previa: 101/100 (+1%), actual: 99/102 (-2.9%)
+    assert regla.evaluar([100.0, 102.0, 101.0], 99.0) is not None
+    assert regla.evaluar([100.0, 98.0, 101.0], 99.0) is None
+
+
+def test_regla_sin_evaluar_no_se_instancia():
+    class ReglaIncompleta(Regla):
+        tipo = 'incompleta'
+
+    with pytest.raises(TypeError):
+        Regla('TPM')
+    with pytest.raises(TypeError):
+        ReglaIncompleta('TPM')
+
+
+def test_crear_regla_desde_config():
+    assert [r.nombre for r in cargar_reglas()] == ['cambio:TPM', 'movimiento:BADLAR:100pb/1', 'cambio_signo:EMAE']
+    with pytest.raises(ValueError):
+        crear_regla({'tipo': 'magia', 'serie': 'TPM'})
+
+
+def test_motor_evalua_solo_observaciones_nuevas(tmp_path):
+    emitidas = []
+    motor = MotorAlertas([ReglaCambio('TPM')], sinks=[emitidas.append], directorio=str(tmp_path))
+
+    assert motor.evaluar_serie('TPM', _df([40, 40, 35])) == []  # línea base
+    assert motor.cursor('TPM') == '2024-01-03'
+
+    alertas = motor.evaluar_serie('TPM', _df([40, 40, 35, 35, 32, 32]))
+    assert [a['fecha'] for a in alertas] == ['2024-01-05']
+    assert emitidas == alertas
+
+    # Reevaluar lo mismo no repite la alerta
+    assert motor.evaluar_serie('TPM', _df([40, 40, 35, 35, 32, 32])) == []
+
+
+def test_motor_no_repite_alertas_tras_perder_el_cursor(tmp_path):
+    motor = MotorAlertas([ReglaCambio('TPM')], sinks=[], directorio=str(tmp_path), alertar_historia=True)
+    assert len(motor.evaluar_serie('TPM', _df([40, 35, 30]))) == 2
+
+    estado = json.loads((tmp_path / '_alertas_estado.json').read_text())
+    estado['series'] = {}
+    (tmp_path / '_alertas_estado.json').write_text(json.dumps(estado))
+
+    otro = MotorAlertas([ReglaCambio('TPM')], sinks=[], directorio=str(tmp_path), alertar_historia=True)
+    assert otro.evaluar_serie('TPM', _df([40, 35, 30, 25]))[0]['fecha'] == '2024-01-04'
+
+
+def test_motor_escala_a_muchas_reglas(tmp_path):
+    reglas = [ReglaMovimiento('BADLAR', umbral_pb=pb) for pb in range(1, 301)]
+    motor = MotorAlertas(reglas, sinks=[], directorio=str(tmp_path), alertar_historia=True)
+
+    alertas = motor.evaluar_serie('BADLAR', _df([30.0, 31.5]))
+
+    assert len(alertas) == 150
+    with pytest.raises(ValueError):
+        motor.agregar(ReglaMovimiento('BADLAR', umbral_pb=1))
+
+
+def test_destinos_archivo_y_webhook(tmp_path, api_stub):
+    api_stub.webhooks.clear()
+    archivo = tmp_path / 'alertas.jsonl'
+    sinks = [SinkArchivo(str(archivo)), SinkWebhook(f'{api_stub.url}/__webhook'),
+             SinkWebhook(f'{api_stub.url}/no-existe')]
+    motor = MotorAlertas([ReglaCambio('TPM')], sinks=sinks, directorio=str(tmp_path), alertar_historia=True)
+
+    alertas = motor.evaluar_serie('TPM', _df([40, 35]))
+
+    assert [json.loads(l) for l in archivo.read_text().splitlines()] == alertas
+    assert api_stub.webhooks == alertas
+
+
+def test_motor_sobre_cache_saltea_series_sin_cambios(api_stub, cache_dir, monkeypatch):
+    from utils import api_helpers
+    api_helpers.obtener_tasas_bcra()
+    motor = MotorAlertas(cargar_reglas(), sinks=[], directorio=str(cache_dir))
+    motor.evaluar()
+    assert motor.cursor('TPM') is not None and motor.cursor('EMAE') is None
+
+    lecturas = []
+    original = api_helpers.leer_serie_cache
+    monkeypatch.setattr(api_helpers, 'leer_serie_cache', lambda n: lecturas.append(n) or original(n))
+    motor.evaluar()
+
+    assert lecturas == ['EMAE']
+
+
+def test_escritura_en_cache_dispara_alertas(api_stub, cache_dir):
+    from utils import api_helpers
+    emitidas = []
+    obtener_motor(str(cache_dir)).sinks.append(emitidas.append)
+
+    api_helpers.obtener_tasa_bcra('TPM')   # primera escritura: línea base, sin alertas
+    assert obtener_motor(str(cache_dir)).cursor('TPM') is not None and emitidas == []
+
+    df = api_helpers.leer_serie_cache('TPM')
+    nueva = pd.DataFrame({'fecha': [df['fecha'].iloc[-1] + pd.Timedelta(days=1)],
+                          'valor': [df['valor'].iloc[-1] + 0.5]})
+    api_helpers.escribir_serie_cache(pd.concat([df, nueva]), api_helpers.SERIES_BCRA['TPM']['cache'])
+
+    assert [a['regla'] for a in emitidas] == ['cambio:TPM']
+    assert emitidas[0]['fecha'] == nueva['fecha'].iloc[0].strftime('%Y-%m-%d')
+
+    # Reescribir los mismos datos no cambia la versión ni vuelve a evaluar
+    api_helpers.escribir_serie_cache(pd.concat([df, nueva]), api_helpers.SERIES_BCRA['TPM']['cache'])
+    assert len(emitidas) == 1
@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.analitica import (alinear_series, correlacion_movil, matriz_alineada, matriz_correlacion,
+                             mejor_rezago, spreads)
+
+
+def _serie(fechas, valores):
+    return pd.DataFrame({'fecha': pd.to_datetime(fechas), 'valor': valores})
+
+
+def _matriz_aleatoria(filas, columnas, semilla=0, nan=0.1):
+    rnd = np.random.default_rng(semilla)
+    x = rnd.normal(size=(filas, columnas)).cumsum(axis=0)
+    x[rnd.random(x.shape) < nan] = np.nan
+    indice = pd.date_range('2005-01-01', periods=filas, freq='D')
+    return pd.DataFrame(x, index=indice, columns=[f's{i}' for i in range(columnas)])
+
+
+def test_alinea_diaria_con_mensual_por_asof():
+    diaria = _serie(['2024-01-30', '2024-01-31', '2024-02-29', '2024-03-28'], [10.0, 11.0, 12.0, 13.0])
+    mensual = _serie(['2024-01-01', '2024-02-01'], [100.0, 101.0])
+
+    matriz = alinear_series({'tasa': diaria, 'emae': mensual}, frecuencia='mensual')
+
+    assert matriz.index.strftime('%Y-%m').tolist() == ['2024-01', '2024-02', '2024-03']
+    assert matriz['tasa'].tolist() == [11.0, 12.0, 13.0]
+    # Marzo toma el dato de febrero (as-of dentro de la tolerancia)
+    assert matriz['emae'].tolist() == [100.0, 101.0, 101.0]
+
+    sin_arrastre = alinear_series({'tasa': diaria, 'emae': mensual}, tolerancia='0D')
+    assert np.isnan(sin_arrastre['emae'].iloc[-1])
+
+
+def test_correlaciones_coinciden_con_pandas():
+    matriz = _matriz_aleatoria(400, 5)
+
+    movil = correlacion_movil(matriz, ventana=60, min_obs=30)
+    esperado = matriz['s0'].rolling(60, min_periods=30).corr(matriz['s3'])
+    np.testing.assert_allclose(movil['s0~s3'], esperado, atol=1e-8)
+    assert movil.shape[1] == 10
+
+    np.testing.assert_allclose(matriz_correlacion(matriz), matriz.corr(), atol=1e-10)
+
+
+def test_mejor_rezago_y_spreads():
+    rnd = np.random.default_rng(1)
+    base = rnd.normal(size=300).cumsum()
+    matriz = pd.DataFrame({'a': np.r_[np.zeros(3), base[:-3]], 'b': base},
+                          index=pd.date_range('2000-01-01', periods=300, freq='MS'))
+
+    assert mejor_rezago(matriz, 'a', 'b', max_rezago=6)['rezago'] == 3
+    assert spreads(matriz, [('a', 'b')], puntos_basicos=True)['a-b'].iloc[-1] == pytest.approx(
+        (matriz['a'].iloc[-1] - matriz['b'].iloc[-1]) * 100)
+
+
+def test_matriz_alineada_se_memoriza_por_version(api_stub):
+    from utils import api_helpers
+    api_helpers.obtener_tasas_bcra()
+    api_helpers.obtener_emae()
+
+    primera = matriz_alineada(['TPM', 'BADLAR', 'EMAE'])
+    assert matriz_alineada(['TPM', 'BADLAR', 'EMAE']) is primera
+    assert list(primera.columns) == ['TPM', 'BADLAR', 'EMAE']
+    assert primera.notna().any().all()
+
+    # Una versión nueva de cualquiera de las series invalida la matriz
+    df = api_helpers.leer_serie_cache('TPM')
+    df.loc[df.index[-1], 'valor'] += 1
+    api_helpers.escribir_cache_csv(df, 'bcra_tpm.csv')
+    assert matriz_alineada(['TPM', 'BADLAR', 'EMAE']) is not primera
+
+
+def test_decenas_de_series_veinte_anios_rapido():
+    series = {f's{i}': pd.DataFrame({'fecha': pd.date_range('2005-01-01', periods=7300, freq='D'),
+                                     'valor': np.random.default_rng(i).normal(size=7300).cumsum()})
+              for i in range(40)}
+    inicio = time.perf_counter()
+
+    matriz = alinear_series(series, frecuencia='diaria')
+    movil = correlacion_movil(matriz, ventana=250)
+
+    assert movil.shape == (7300, 780)
+    assert time.perf_counter() - inicio < 5
@@ -0,0 +1,91 @@
+import pandas as pd
+
+from utils import api_helpers
+from utils.api_helpers import (
+    obtener_tasas_bcra, obtener_tasa_bcra, obtener_emae,
+    leer_serie_cache, version_serie, escribir_cache_csv,
+)
+
+
+def _normalizada(df):
+    assert list(df.columns) == ['fecha', 'valor']
+    assert pd.api.types.is_datetime64_any_dtype(df['fecha'])
+    assert pd.api.types.is_float_dtype(df['valor'])
+    assert df['fecha'].is_monotonic_increasing
+    assert not df.isna().any().any()
+
+
+def test_tasas_desde_api_normalizadas_y_cacheadas(api_stub, cache_dir):
+    tasas = obtener_tasas_bcra()
+
+    assert set(tasas) == {'TPM', 'BADLAR', 'PF_USD'}
+    for nombre, info in tasas.items():
+        assert info['desde_cache'] is False
+        assert len(info['data']) == api_stub.dias
+        _normalizada(info['data'])
+        assert (cache_dir / api_helpers.SERIES_BCRA[nombre]['cache']).exists()
+    assert api_stub.total_solicitudes() == 3
+
+
+def test_emae_desde_api_normalizado(api_stub):
+    info = obtener_emae()
+
+    assert info['desde_cache'] is False
+    assert len(info['data']) == api_stub.meses
+    _normalizada(info['data'])
+
+
+def test_fallback_a_cache_cuando_la_api_falla(api_stub):
+    en_linea = obtener_tasa_bcra('TPM')['data']
+
+    api_stub.falla_todo = True
+    info = obtener_tasa_bcra('TPM')
+
+    assert info['desde_cache'] is True
+    _normalizada(info['data'])
+    pd.testing.assert_series_equal(
+        info['data']['valor'].reset_index(drop=True),
+        en_linea['valor'].reset_index(drop=True),
+    )
+
+
+def test_emae_fallback_a_cache(api_stub):
+    obtener_emae()
+    api_stub.falla_todo = True
+
+    info = obtener_emae()
+
+    assert info['desde_cache'] is True
+    assert len(info['data']) == api_stub.meses
+
+
+def test_sin_api_ni_cache_retorna_none(api_stub):
+    api_stub.falla_todo = True
+
+    info = obtener_tasa_bcra('BADLAR')
+
+    assert info == {'data': None, 'desde_cache': False}
+
+
+def test_cache_corrupta_no_rompe(api_stub, cache_dir):
+    (cache_dir / 'emae.csv').write_text('columna,rara\n1,2\n')
+    api_stub.falla_todo = True
+
+    info = obtener_emae()
+
+    assert info['data'] is None
+    assert info['desde_cache'] is False
+
+
+def test_version_avanza_solo_con_datos_nuevos(cache_dir):
+    df = pd.DataFrame({'fecha': pd.to_datetime(['2024-01-01', '2024-01-02']), 'valor': [1.0, 2.0]})
+    assert version_serie('TPM') == 0
+
+    escribir_cache_csv(df, 'bcra_tpm.csv')
+    version = version_serie('TPM')
+    escribir_cache_csv(df, 'bcra_tpm.csv')
+    assert version_serie('TPM') == version > 0
+
+    escribir_cache_csv(pd.concat([df, df.tail(1).assign(valor=3.0)]), 'bcra_tpm.csv')
+    assert version_serie('TPM') == version + 1
+    assert len(leer_serie_cache('TPM')) == 3
@@ -0,0 +1,134 @@
+import os
+import time
+import multiprocessing
+
+from utils.cache_manager import GestorCache
+
+
+def _escribir(gestor, nombre, contenido):
+    with open(os.path.join(gestor.directorio, nombre), 'w') as f:
+        f.write(contenido)
+    gestor.registrar_escritura(nombre, fuente='test')
+
+
+def test_desaloja_lru_respetando_fijadas(tmp_path):
+    # El presupuesto incluye el propio índice (unos cientos de bytes)
+    gestor = GestorCache(str(tmp_path), max_bytes=30_900, ttl_segundos=0, fijadas={'emae.csv'})
+    _escribir(gestor, 'emae.csv', 'x' * 10_000)
+    _escribir(gestor, 'vieja.csv', 'x' * 10_000)
+    _escribir(gestor, 'nueva.csv', 'x' * 10_000)
+    gestor.registrar_acceso('vieja.csv')
+
+    _escribir(gestor, 'otra.csv', 'x' * 1_000)
+
+    assert set(gestor.entradas()) == {'emae.csv', 'vieja.csv', 'otra.csv'}
+    assert not (tmp_path / 'nueva.csv').exists()
+
+
+def test_ttl_no_toca_fijadas(tmp_path):
+    gestor = GestorCache(str(tmp_path), max_bytes=0, ttl_segundos=60, fijadas={'emae.csv'})
+    _escribir(gestor, 'emae.csv', 'a')
+    _escribir(gestor, 'temporal.csv', 'b')
+
+    eliminados = gestor.aplicar_politica(ahora=time.time() + 120)
+
+    assert eliminados == ['temporal.csv']
+    assert set(gestor.entradas()) == {'emae.csv'}
+
+
+def test_version_solo_cambia_con_contenido(tmp_path):
+    gestor = GestorCache(str(tmp_path), max_bytes=0, ttl_segundos=0)
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,1\n')
+    version = gestor.version('s.csv')
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,1\n')
+    assert gestor.version('s.csv') == version > 0
+
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,2\n')
+    assert gestor.version('s.csv') == version + 1
+    # Otro proceso ve la misma versión a través del índice en disco
+    assert GestorCache(str(tmp_path)).version('s.csv') == version + 1
+
+
+def test_version_no_se_repite_tras_desalojo_ni_perdida_del_indice(tmp_path):
+    gestor = GestorCache(str(tmp_path), max_bytes=0, ttl_segundos=60)
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,1\n')
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,2\n')
+    vista = gestor.version('s.csv')
+
+    gestor.aplicar_politica(ahora=time.time() + 120)
+    assert gestor.version('s.csv') == 0
+    _escribir(gestor, 's.csv', 'fecha,valor\n2024-01-01,3\n')
+    assert gestor.version('s.csv') > vista
+
+    # Ni siquiera si se borra el índice
+    vista = gestor.version('s.csv')
+    os.remove(tmp_path / '_indice.json')
+    time.sleep(0.01)
+    otro = GestorCache(str(tmp_path), max_bytes=0, ttl_segundos=0)
+    otro.sincronizar()
+    assert otro.version('s.csv') > vista
+
+
+def _escribir_en_proceso(directorio, prefijo, cantidad):
+    gestor = GestorCache(directorio, max_bytes=0, ttl_segundos=0)
+    for i in range(cantidad):
+        _escribir(gestor, f'{prefijo}_{i}.csv', f'{prefijo},{i}\n')
+        gestor.registrar_acceso(f'{prefijo}_{i}.csv')
+
+
+def test_procesos_concurrentes_no_pierden_entradas(tmp_path):
+    contexto = multiprocessing.get_context('spawn')
+    procesos = [contexto.Process(target=_escribir_en_proceso, args=(str(tmp_path), f'p{n}', 25))
+                for n in range(4)]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(60)
+
+    assert [p.exitcode for p in procesos] == [0] * 4
+    assert len(GestorCache(str(tmp_path)).entradas()) == 100
+
+
+def test_accesos_se_vuelcan_por_lotes(tmp_path):
+    gestor = GestorCache(str(tmp_path), max_bytes=0, ttl_segundos=0, intervalo_accesos=3600)
+    _escribir(gestor, 's.csv', 'x')
+    gestor.volcar_accesos()
+    firma = gestor._firma_indice()
+
+    for _ in range(50):
+        gestor.registrar_acceso('s.csv')
+
+    # El índice en disco no se reescribió, pero el acceso reciente es visible y se vuelca
+    assert gestor._firma_indice() == firma
+    antes = GestorCache(str(tmp_path)).entradas()['s.csv']['ultimo_acceso']
+    assert gestor.entradas()['s.csv']['ultimo_acceso'] > antes
+    gestor.volcar_accesos()
+    assert GestorCache(str(tmp_path)).entradas()['s.csv']['ultimo_acceso'] > antes
+
+
+def _bytes_en_disco(directorio):
+    return sum(os.path.getsize(os.path.join(raiz, a)) for raiz, _, archivos in os.walk(directorio) for a in archivos)
+
+
+def test_revisiones_repetidas_no_exceden_el_presupuesto(tmp_path):
+    import pandas as pd
+    from utils.revisiones import MAX_VINTAGES, HistorialRevisiones
+
+    gestor = GestorCache(str(tmp_path), max_bytes=60_000, ttl_segundos=0, fijadas={'fijada.csv'})
+    os.makedirs(tmp_path / '_trabajos')
+    (tmp_path / '_trabajos' / 'viejo.pkl').write_bytes(b'x' * 20_000)
+
+    fechas = pd.date_range('2000-01-01', periods=500, freq='D')
+    for vintage in range(1, 41):
+        for nombre in ('fijada.csv', 'a.csv', 'b.csv'):
+            # Cada refresco revisa las últimas 12 observaciones
+            valores = [100.0 + i / 4 + (vintage if i >= 488 else 0) for i in range(500)]
+            resumen = HistorialRevisiones(str(tmp_path), nombre).fusionar(
+                pd.DataFrame({'fecha': fechas, 'valor': valores}), vintage=vintage)
+            gestor.registrar_escritura(nombre, fuente='test', hash_contenido=resumen['hash'])
+            assert _bytes_en_disco(tmp_path) <= gestor.max_bytes
+
+    assert not (tmp_path / '_trabajos' / 'viejo.pkl').exists()
+    fijada = HistorialRevisiones(str(tmp_path), 'fijada.csv')
+    assert len(fijada.vintages()) == MAX_VINTAGES
+    assert fijada.al(40)['valor'].iloc[-1] == 100.0 + 499 / 4 + 40
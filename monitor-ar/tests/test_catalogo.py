@@ -0,0 +1,109 @@
+import io
+import os
+import time
+import threading
+
+import pytest
+
+from stub_api import catalogo_csv
+from utils import api_helpers, catalogo
+from utils.cache_manager import GestorCache
+
+PAGINA_MACRO = os.path.join(os.path.dirname(__file__), '..', '..', 'pages', 'dashboard_macro.py')
+
+
+@pytest.fixture
+def indice(cache_dir):
+    catalogo.construir_indice(io.StringIO(catalogo_csv(relleno=20_000)))
+    return cache_dir
+
+
+def test_busqueda_por_texto_frecuencia_y_fuente(indice):
+    resultados = catalogo.buscar('emae desest')
+    assert [r['serie_id'] for r in resultados] == ['11.3_VMATC_2004_M_36']
+    assert resultados[0]['frecuencia'] == 'mensual'
+
+    # Sin tildes, por prefijo y en la descripción
+    assert catalogo.buscar('indice precios')[0]['serie_id'] == '148.3_INIVELNAL_DICI_M_26'
+
+    diarias_bcra = catalogo.buscar('', frecuencia='diaria', fuente='BCRA')
+    assert {r['serie_id'] for r in diarias_bcra} == {'168.1_T_CAMBIOR_D_0_0_26', '89.2_TS_INTELAR_0_A_21'}
+    assert catalogo.valores_filtro('frecuencia')[:2] == ['mensual', 'diaria']
+
+
+def test_busqueda_en_milisegundos(indice):
+    catalogo.buscar('sintética')
+    inicio = time.perf_counter()
+    for consulta in ('sintética 1234', 'tipo de cambio', 'relleno número', 'pib'):
+        catalogo.buscar(consulta, frecuencia='mensual')
+    assert (time.perf_counter() - inicio) / 4 < 0.05
+
+
+def test_consultas_no_dejan_conexiones_abiertas(indice):
+    hilos = [threading.Thread(target=catalogo.buscar, args=('emae',)) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    catalogo.obtener_metadatos('148.3_INIVELNAL_DICI_M_26')
+
+    abiertos = [os.readlink(f'/proc/self/fd/{fd}') for fd in os.listdir('/proc/self/fd')
+                if os.path.exists(f'/proc/self/fd/{fd}')]
+    assert not [r for r in abiertos if r.endswith(catalogo.CATALOGO_NOMBRE)]
+
+
+def test_escritores_concurrentes_no_se_pisan(indice):
+    dump = catalogo_csv(relleno=2_000)
+    hilos = [threading.Thread(target=catalogo.construir_indice, args=(io.StringIO(dump),)) for _ in range(3)]
+    hilos += [threading.Thread(target=catalogo.agregar_serie_usuario, args=(f'serie_{i}',)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert catalogo.buscar('emae desest')[0]['serie_id'] == '11.3_VMATC_2004_M_36'
+    assert {s['id'] for s in catalogo.series_usuario()} == {f'serie_{i}' for i in range(8)}
+    assert not [n for n in os.listdir(indice) if n.endswith('.tmp')]
+
+
+def test_sin_indice_no_falla(cache_dir):
+    assert not catalogo.indice_disponible()
+    assert catalogo.buscar('emae') == []
+
+
+def test_serie_agregada_queda_registrada_y_se_obtiene(api_stub, indice):
+    catalogo.agregar_serie_usuario('148.3_INIVELNAL_DICI_M_26')
+    assert catalogo.series_usuario()[0]['titulo'] == 'IPC nivel general nacional'
+    assert '148.3_INIVELNAL_DICI_M_26' in api_helpers.series_registradas()
+
+    resultados = api_helpers.obtener_series_usuario()
+
+    assert not resultados['148.3_INIVELNAL_DICI_M_26']['desde_cache']
+    assert len(api_helpers.leer_serie_cache('148.3_INIVELNAL_DICI_M_26')) == 260
+
+    # Mientras esté agregada, ni el TTL ni el presupuesto la desalojan
+    archivo = api_helpers.archivo_serie('148.3_INIVELNAL_DICI_M_26')
+    gestor = GestorCache(str(indice), max_bytes=1, ttl_segundos=1, fijadas=set())
+    gestor.sincronizar()
+    gestor.aplicar_politica(ahora=time.time() + 3600)
+    assert (indice / archivo).exists()
+
+    catalogo.quitar_serie_usuario('148.3_INIVELNAL_DICI_M_26')
+    assert api_helpers.series_registradas() == ['TPM', 'BADLAR', 'PF_USD', 'EMAE']
+    assert archivo in gestor.aplicar_politica(ahora=time.time() + 3600)
+
+
+def test_dashboard_descarga_catalogo_y_agrega_serie(api_stub):
+    streamlit = pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+
+    streamlit.cache_data.clear()
+    at = AppTest.from_file(PAGINA_MACRO, default_timeout=30)
+    at.run()
+    next(b for b in at.button if 'catálogo' in b.label).click().run()
+    at.text_input[0].input('ipc').run()
+    next(b for b in at.button if 'Agregar' in b.label).click().run()
+
+    assert not at.exception
+    assert [s['id'] for s in catalogo.series_usuario()] == ['148.3_INIVELNAL_DICI_M_26']
+    assert len(at.get('plotly_chart')) == 3
@@ -0,0 +1,83 @@
+import io
+import os
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from utils import api_helpers
+from utils.exportacion import EXPORTACIONES_DIR, exportacion_en_disco, exportar_series
+
+PAGINA_MACRO = os.path.join(os.path.dirname(__file__), '..', '..', 'pages', 'dashboard_macro.py')
+
+
+@pytest.fixture
+def series_cacheadas(api_stub):
+    api_helpers.obtener_tasas_bcra()
+    return api_stub
+
+
+def test_exporta_csv_filtrado_por_fechas(series_cacheadas):
+    completa = api_helpers.leer_serie_cache('TPM')
+    desde, hasta = completa['fecha'].iloc[10], completa['fecha'].iloc[40]
+    buffer = io.BytesIO()
+
+    resumen = exportar_series(buffer, ['TPM', 'EMAE'], desde=desde, hasta=hasta, filas_por_bloque=7)
+
+    assert resumen == {'series': {'TPM': 31}, 'omitidas': ['EMAE']}
+    with zipfile.ZipFile(buffer) as z:
+        assert sorted(z.namelist()) == ['TPM.csv', 'metadata.json']
+        exportada = pd.read_csv(z.open('TPM.csv'), parse_dates=['fecha'])
+        metadata = json.loads(z.read('metadata.json'))
+    pd.testing.assert_frame_equal(exportada, completa.iloc[10:41].reset_index(drop=True),
+                                  check_dtype=False)
+    assert metadata['series']['TPM']['filas'] == 31
+
+
+def test_exporta_parquet_por_bloques(series_cacheadas):
+    pq = pytest.importorskip('pyarrow.parquet')
+    buffer = io.BytesIO()
+
+    resumen = exportar_series(buffer, formato='parquet', filas_por_bloque=100)
+
+    assert set(resumen['series']) == {'TPM', 'BADLAR', 'PF_USD'}
+    with zipfile.ZipFile(buffer) as z:
+        archivo = pq.ParquetFile(io.BytesIO(z.read('BADLAR.parquet')))
+    assert archivo.metadata.num_rows == 365
+    assert archivo.metadata.num_row_groups == 4
+    tabla = archivo.read().to_pandas()
+    assert tabla['valor'].tolist() == api_helpers.leer_serie_cache('BADLAR')['valor'].tolist()
+
+
+def test_formato_invalido(series_cacheadas):
+    with pytest.raises(ValueError):
+        exportar_series(io.BytesIO(), formato='xlsx')
+
+
+def test_dashboard_prepara_exportacion(series_cacheadas):
+    streamlit = pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+
+    streamlit.cache_data.clear()
+    at = AppTest.from_file(PAGINA_MACRO, default_timeout=30)
+    at.run()
+    next(b for b in at.button if 'exportación' in b.label).click().run()
+
+    assert not at.exception
+    # La sesión guarda la ruta del ZIP en disco, no sus bytes
+    exportacion = at.session_state['exportacion']
+    assert 'datos' not in exportacion
+    with zipfile.ZipFile(exportacion['ruta']) as z:
+        assert 'EMAE.csv' in z.namelist()
+
+
+def test_exportacion_en_disco_se_reutiliza_y_poda(series_cacheadas, cache_dir):
+    ruta = exportacion_en_disco(['TPM'])
+    assert exportacion_en_disco(['TPM']) == ruta
+    assert os.path.dirname(ruta) == os.path.join(str(cache_dir), EXPORTACIONES_DIR)
+
+    otras = [exportacion_en_disco(['TPM'], desde=f'2024-01-{d:02d}', max_exportaciones=2) for d in (1, 2)]
+    assert sorted(os.listdir(os.path.dirname(ruta))) == sorted(os.path.basename(r) for r in otras)
+    with zipfile.ZipFile(otras[-1]) as z:
+        assert sorted(z.namelist()) == ['TPM.csv', 'metadata.json']
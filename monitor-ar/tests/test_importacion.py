@@ -0,0 +1,16 @@
+import pytest
+
+from medir_importacion import PRESUPUESTOS_MS, medir, verificar
+
+
+@pytest.mark.parametrize('modulo', sorted(PRESUPUESTOS_MS))
+def test_importacion_liviana_y_en_presupuesto(modulo):
+    resultado = medir(modulo, repeticiones=2)
+
+    assert verificar(resultado) == []
+
+
+def test_verificar_detecta_pesados_y_exceso():
+    resultado = {'modulo': 'utils.api_helpers', 'total_ms': 900.0, 'pesados': ['pandas']}
+
+    assert len(verificar(resultado)) == 2
@@ -0,0 +1,49 @@
+import threading
+
+from utils import limitador
+from utils.api_helpers import crear_sesion_con_reintentos
+
+
+def _limitador_stub(api_stub, monkeypatch, max_concurrencia):
+    monkeypatch.setitem(limitador.LIMITES_HOST, '127.0.0.1',
+                        {'tasa': 1000.0, 'rafaga': 1000, 'max_concurrencia': max_concurrencia,
+                         'latencia_objetivo': 5.0})
+    monkeypatch.setattr(limitador, '_limitadores', {})
+    return limitador.obtener_limitador('127.0.0.1')
+
+
+def test_cupo_se_retiene_hasta_consumir_el_cuerpo(api_stub, monkeypatch):
+    lim = _limitador_stub(api_stub, monkeypatch, 2)
+    sesion = crear_sesion_con_reintentos()
+    url = api_stub.url + '/datos/tpm'
+
+    respuesta = sesion.get(url, stream=True)
+    assert lim.concurrencia._en_curso == 1 and lim.solicitudes == 0
+    respuesta.content
+    assert lim.concurrencia._en_curso == 0 and lim.solicitudes == 1
+
+    respuesta = sesion.get(url, stream=True)
+    respuesta.close()
+    assert lim.concurrencia._en_curso == 0 and lim.solicitudes == 2
+
+    # Sin stream, requests lee el cuerpo antes de retornar
+    sesion.get(url)
+    assert lim.concurrencia._en_curso == 0 and lim.solicitudes == 3
+
+
+def test_descargas_simultaneas_respetan_el_limite(api_stub, monkeypatch):
+    _limitador_stub(api_stub, monkeypatch, 1)
+    sesion = crear_sesion_con_reintentos()
+    url = api_stub.url + '/datos/tpm'
+    primera = sesion.get(url, stream=True)
+
+    segunda = {}
+    hilo = threading.Thread(target=lambda: segunda.update(r=sesion.get(url)))
+    hilo.start()
+    hilo.join(0.5)
+    # La segunda espera mientras el cuerpo de la primera siga sin leer
+    assert hilo.is_alive()
+
+    primera.close()
+    hilo.join(5)
+    assert not hilo.is_alive() and segunda['r'].status_code == 200
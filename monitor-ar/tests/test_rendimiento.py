@@ -0,0 +1,95 @@
+"""
+Presupuestos de rendimiento: una regresión de velocidad o de tamaño de payload
+hace fallar la suite en lugar de aparecer en producción.
+"""
+import os
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+from utils.api_helpers import obtener_tasas_bcra, obtener_emae, leer_serie_cache
+from utils.graficos import crear_panel_multiple, optimizar_payload, medir_payload
+
+PAGINA_MACRO = os.path.join(os.path.dirname(__file__), '..', '..', 'pages', 'dashboard_macro.py')
+
+# Presupuestos (holgados respecto de lo medido para no ser frágiles en CI)
+PRESUPUESTO_CACHE_TIBIA_MS = 250      # leer las 4 series del dashboard desde caché
+PRESUPUESTO_RENDER_TIBIO_MS = 3000    # rerun completo de la página con datos frescos
+PRESUPUESTO_PAYLOAD_TASAS = 30_000    # bytes JSON del panel de tasas (3 x 365 puntos)
+PRESUPUESTO_PAYLOAD_EMAE = 8_000      # bytes JSON del gráfico EMAE (260 puntos)
+
+
+def _mejor_de(n, funcion):
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def test_cache_tibia_dentro_de_presupuesto(api_stub):
+    obtener_tasas_bcra()
+    obtener_emae()
+
+    def leer_todo():
+        for nombre in ('TPM', 'BADLAR', 'PF_USD', 'EMAE'):
+            assert leer_serie_cache(nombre) is not None
+
+    assert _mejor_de(3, leer_todo) < PRESUPUESTO_CACHE_TIBIA_MS
+
+
+def test_pagina_sin_upstream_con_datos_frescos(api_stub):
+    streamlit = pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+
+    streamlit.cache_data.clear()
+    at = AppTest.from_file(PAGINA_MACRO, default_timeout=30)
+    at.run()
+    assert not at.exception
+    assert api_stub.total_solicitudes() == 4
+
+    api_stub.reiniciar_conteos()
+    inicio = time.perf_counter()
+    at.run()
+    render_ms = (time.perf_counter() - inicio) * 1000
+
+    assert not at.exception
+    assert api_stub.total_solicitudes() == 0
+    assert render_ms < PRESUPUESTO_RENDER_TIBIO_MS
+
+
+def test_pagina_sin_escritura_en_cache(api_stub, monkeypatch):
+    streamlit = pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+    from utils import api_helpers
+
+    # Sin caché no hay versión: las figuras se cachean por contenido, no bajo una versión 0 fija
+    monkeypatch.setattr(api_helpers, 'escribir_serie_cache', lambda *args, **kwargs: None)
+    streamlit.cache_data.clear()
+    at = AppTest.from_file(PAGINA_MACRO, default_timeout=30)
+    at.run()
+
+    assert not at.exception
+    assert api_helpers.version_serie('EMAE') == 0
+    assert len(at.get('plotly_chart')) == 2
+
+
+def test_payload_panel_tasas_acotado(api_stub):
+    tasas = obtener_tasas_bcra()
+    series = [{'nombre': n, 'titulo': n, 'df': info['data']} for n, info in tasas.items()]
+
+    assert medir_payload(crear_panel_multiple(series)) < PRESUPUESTO_PAYLOAD_TASAS
+
+
+def test_payload_emae_acotado(api_stub):
+    df = obtener_emae()['data']
+    fig = go.Figure(go.Scatter(x=df['fecha'], y=df['valor'], mode='lines', fill='tozeroy'))
+    fig.update_layout(template='plotly_dark', height=400)
+    antes = medir_payload(fig)
+
+    despues = medir_payload(optimizar_payload(fig))
+
+    assert despues < PRESUPUESTO_PAYLOAD_EMAE
+    assert antes / despues > 2.5
@@ -0,0 +1,134 @@
+import os
+
+import pandas as pd
+
+from utils.api_helpers import obtener_emae, leer_serie_cache, version_serie, EMAE_CACHE
+from utils.cache_manager import GestorCache
+from utils.revisiones import HistorialRevisiones
+
+
+def _serie(n, desde='2000-01-01', freq='D', offset=0.0):
+    fechas = pd.date_range(desde, periods=n, freq=freq)
+    return pd.DataFrame({'fecha': fechas, 'valor': [100.0 + i * 0.25 + offset for i in range(n)]})
+
+
+def test_revision_reescribe_solo_los_meses_tocados_y_anota_deltas(tmp_path):
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+    base = _serie(20_000)
+    assert historial.fusionar(base, vintage=1000)['cambio']
+
+    revisada = pd.concat([base, _serie(1, desde=base['fecha'].iloc[-1] + pd.Timedelta(days=1))])
+    revisada.iloc[-6:-1, 1] += 1.0
+    resumen = historial.fusionar(revisada, vintage=2000)
+
+    assert (resumen['nuevas'], resumen['revisadas'], resumen['eliminadas']) == (1, 5, 0)
+    # Solo se serializan los dos últimos meses; el resto se copia tal cual
+    assert 0 < resumen['bytes_escritos'] < 62 * 30
+    assert resumen['bytes_escritos'] + resumen['bytes_copiados'] == os.path.getsize(tmp_path / 's.csv') - len('fecha,valor\n')
+    assert len(historial.deltas()) == 6
+    # El CSV queda idéntico a escribirlo entero
+    esperado = pd.read_csv(tmp_path / 's.csv', parse_dates=['fecha'])
+    pd.testing.assert_frame_equal(esperado, revisada.reset_index(drop=True))
+    assert historial.indice() is not None
+    assert not [n for n in os.listdir(tmp_path) if n.endswith('.tmp')]
+
+
+def test_ventana_movil_avanza_un_dia_sin_bajas(tmp_path):
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+    completa = _serie(366, desde='2024-01-01')
+    historial.fusionar(completa.iloc[:365], vintage=1000)
+
+    # La descarga del día siguiente: el primer día sale del rango, entra uno nuevo
+    resumen = historial.fusionar(completa.iloc[1:], vintage=2000)
+
+    assert (resumen['nuevas'], resumen['revisadas'], resumen['eliminadas']) == (1, 0, 0)
+    assert resumen['bytes_escritos'] < 31 * 30
+    # Lo que quedó fuera del rango descargado se conserva
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 's.csv', parse_dates=['fecha']), completa)
+    pd.testing.assert_frame_equal(historial.al(1500), completa.iloc[:365], check_dtype=False)
+
+
+def test_refresco_sin_cambios_no_escribe(tmp_path):
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+    historial.fusionar(_serie(500), vintage=1000)
+    mtime = os.stat(tmp_path / 's.csv').st_mtime_ns
+
+    resumen = historial.fusionar(_serie(500), vintage=2000)
+
+    assert not resumen['cambio'] and resumen['bytes_escritos'] == 0
+    assert os.stat(tmp_path / 's.csv').st_mtime_ns == mtime
+    assert historial.vintages() == []
+
+
+def test_consulta_al_vintage(tmp_path):
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+    v1 = _serie(200, freq='MS')
+    v2 = _serie(201, freq='MS', offset=0.5)        # rebase total + un mes nuevo
+    v3 = v2.drop(index=100).reset_index(drop=True)  # se retira un dato dentro del rango
+    historial.fusionar(v1, vintage=1000)
+    historial.fusionar(v2, vintage=2000)
+    historial.fusionar(v3, vintage=3000)
+
+    assert historial.al(500).empty
+    pd.testing.assert_frame_equal(historial.al(1500), v1, check_dtype=False)
+    pd.testing.assert_frame_equal(historial.al(2500), v2, check_dtype=False)
+    pd.testing.assert_frame_equal(historial.al(3500), v3, check_dtype=False)
+    assert [v['revisadas'] for v in historial.vintages()] == [200, 0]
+
+
+def test_adopta_csv_previo_y_sobrevive_a_reescrituras_externas(tmp_path):
+    # Caché escrito antes de tener historia (formato pandas, con una fecha repetida)
+    previo = _serie(100)
+    pd.concat([previo.iloc[[5]].assign(valor=0.0), previo]).to_csv(tmp_path / 's.csv', index=False)
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+
+    revisada = _serie(100)
+    revisada.loc[99, 'valor'] = -1.0
+    resumen = historial.fusionar(revisada, vintage=2e9)
+
+    assert (resumen['nuevas'], resumen['revisadas']) == (0, 1)
+    # Adoptarlo lo compacta: una observación por fecha
+    assert len(pd.read_csv(tmp_path / 's.csv')) == 100
+    assert historial.al(2e9 - 1)['valor'].iloc[-1] == _serie(100)['valor'].iloc[-1]
+
+    # Si algo externo reescribe el CSV, el índice se invalida y se rearma sin deltas espurios
+    pd.read_csv(tmp_path / 's.csv').to_csv(tmp_path / 's.csv', index=False, float_format='%.6f')
+    assert historial.indice() is None
+    assert not historial.fusionar(revisada, vintage=3e9)['nuevas']
+    assert len(historial.deltas()) == 1
+
+
+def test_emae_revisado_desde_api(api_stub, cache_dir, monkeypatch):
+    original = obtener_emae()['data']
+    version = version_serie('EMAE')
+    antes = pd.Timestamp.now('UTC').tz_localize(None)
+
+    monkeypatch.setattr(api_stub, 'meses_revisados', 3)
+    revisado = obtener_emae()['data']
+
+    assert version_serie('EMAE') == version + 1
+    assert (revisado['valor'].values[-3:] != original['valor'].values[-3:]).all()
+    pd.testing.assert_frame_equal(leer_serie_cache('EMAE', al=antes), original, check_dtype=False)
+    pd.testing.assert_frame_equal(leer_serie_cache('EMAE').reset_index(drop=True), revisado, check_dtype=False)
+
+    # Desalojar la serie se lleva su historia
+    gestor = GestorCache(str(cache_dir), max_bytes=0, ttl_segundos=0, fijadas=set())
+    gestor.sincronizar()
+    gestor._eliminar(EMAE_CACHE)
+    assert not any(n.startswith('emae.') for n in os.listdir(cache_dir / '_revisiones'))
+
+
+def test_compactar_conserva_los_ultimos_vintages(tmp_path):
+    historial = HistorialRevisiones(str(tmp_path), 's.csv')
+    for vintage in range(1, 6):
+        historial.fusionar(_serie(50, offset=vintage), vintage=vintage * 1000)
+    tamanio = historial.bytes_en_disco()
+
+    assert historial.compactar(max_vintages=2) > 0
+
+    assert historial.bytes_en_disco() < tamanio
+    assert [v['vintage'] for v in historial.vintages()] == [4000, 5000]
+    assert set(historial.deltas()['vintage'].map(pd.Timestamp.timestamp)) == {4000, 5000}
+    pd.testing.assert_frame_equal(historial.al(3500), _serie(50, offset=3), check_dtype=False)
+    assert historial.al(2500).empty
+    assert historial.compactar(max_vintages=2) == 0
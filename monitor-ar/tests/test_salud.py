@@ -0,0 +1,119 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from utils import api_helpers
+from utils.salud import LARGO_FUENTE, RegistroSalud, antiguedad_series, clave_fuente, latencia_en_el_tiempo, obtener_registro, resumen_fuentes
+
+PAGINA_SALUD = os.path.join(os.path.dirname(__file__), '..', '..', 'pages', 'salud_fuentes.py')
+
+
+def test_buffer_circular_pisa_los_mas_viejos(tmp_path):
+    ruta = str(tmp_path / '_salud.bin')
+    registro = RegistroSalud(ruta, capacidad=4)
+    for i in range(6):
+        registro.registrar(f'F{i % 2}', latencia_ms=10 * i, status=200, bytes_recibidos=i, ts=1000 + i)
+
+    df = registro.leer()
+    assert len(registro) == 4 and registro.escritos() == 6
+    assert df['latencia_ms'].tolist() == [20, 30, 40, 50]
+    assert df['fuente'].tolist() == ['F0', 'F1', 'F0', 'F1']
+
+    # Persistente: otro proceso (u otra instancia) ve lo mismo
+    assert RegistroSalud(ruta, capacidad=99).leer()['bytes'].tolist() == [2, 3, 4, 5]
+    assert registro.leer(desde=1004)['bytes'].tolist() == [4, 5]
+
+
+def test_archivo_invalido_se_reinicia(tmp_path):
+    ruta = tmp_path / '_salud.bin'
+    ruta.write_bytes(b'basura' * 10)
+
+    assert len(RegistroSalud(str(ruta), capacidad=8)) == 0
+
+
+def test_fuentes_largas_no_se_mezclan(tmp_path):
+    registro = RegistroSalud(str(tmp_path / '_salud.bin'), capacidad=8)
+    largas = ['datos.gob/143.3_NO_PR_2004_A_21_PRIMARIO', 'datos.gob/143.3_NO_PR_2004_A_21_SECUNDARIO']
+    for i, fuente in enumerate(largas + ['BCRA/TPM']):
+        registro.registrar(fuente, latencia_ms=1, status=200, ts=1000 + i)
+
+    fuentes = registro.leer()['fuente'].tolist()
+    assert fuentes[2] == 'BCRA/TPM'
+    assert fuentes[0] != fuentes[1]
+    assert fuentes[:2] == [clave_fuente(f) for f in largas]
+    assert all(f.startswith('datos.gob/143.3_NO_PR') for f in fuentes[:2])
+    assert len(clave_fuente('datos.gob/índice_' + 'ñ' * 30).encode('utf-8')) <= LARGO_FUENTE
+
+
+def test_latencia_no_incluye_la_escritura_en_cache(api_stub, cache_dir, monkeypatch):
+    escribir = api_helpers.escribir_serie_cache
+
+    def escribir_lento(*args, **kwargs):
+        time.sleep(0.5)
+        return escribir(*args, **kwargs)
+
+    monkeypatch.setattr(api_helpers, 'escribir_serie_cache', escribir_lento)
+    api_helpers.obtener_tasa_bcra('TPM')
+    api_helpers.obtener_emae()
+
+    df = obtener_registro(str(cache_dir)).leer()
+    assert df['ok'].all() and len(df) == 2
+    assert (df['latencia_ms'] < 500).all()
+
+
+def test_resumen_y_series_de_tiempo():
+    df = pd.DataFrame({
+        'ts': pd.to_datetime([0, 60, 120, 3700], unit='s'),
+        'latencia_ms': [100.0, 200.0, 300.0, 50.0],
+        'bytes': [10, 10, 0, 10],
+        'status': [200, 200, 503, 200],
+        'ok': [True, True, False, True],
+        'desde_cache': [False, False, True, False],
+        'fuente': ['BCRA/TPM'] * 4,
+    })
+
+    resumen = resumen_fuentes(df).loc['BCRA/TPM']
+    assert resumen['consultas'] == 4
+    assert resumen['tasa_error'] == pytest.approx(0.25)
+    assert resumen['tasa_cache'] == pytest.approx(0.25)
+    assert resumen['ultimo_ok'] == pd.Timestamp(3700, unit='s')
+
+    por_hora = latencia_en_el_tiempo(df, '1h')
+    assert por_hora['consultas'].tolist() == [3, 1]
+    assert por_hora['p50_ms'].tolist() == [200.0, 50.0]
+
+
+def test_fetchers_anotan_resultados(api_stub, cache_dir):
+    api_helpers.obtener_tasa_bcra('TPM')
+    api_stub.falla_todo = True
+    api_helpers.obtener_tasa_bcra('TPM')
+
+    df = obtener_registro(str(cache_dir)).leer()
+
+    assert df['fuente'].tolist() == ['BCRA/TPM', 'BCRA/TPM']
+    assert df['status'].tolist() == [200, 503]
+    assert df['ok'].tolist() == [True, False]
+    assert df['desde_cache'].tolist() == [False, True]
+    assert df['bytes'].iloc[0] > 1000
+    assert '_salud_fuentes.bin' not in api_helpers.obtener_gestor(str(cache_dir)).entradas()
+
+    antiguedad = antiguedad_series().set_index('serie')
+    assert antiguedad.loc['TPM', 'dias_desde_observacion'] <= 1
+    assert pd.isna(antiguedad.loc['EMAE', 'ultima_observacion'])
+
+
+def test_pagina_salud(api_stub):
+    pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(PAGINA_SALUD, default_timeout=30)
+    at.run()
+    assert not at.exception
+    assert at.info
+
+    api_helpers.obtener_tasas_bcra()
+    at.run()
+    assert not at.exception
+    assert len(at.get('plotly_chart')) == 2
@@ -0,0 +1,80 @@
+import os
+import time
+import threading
+
+import pandas as pd
+
+from utils.snapshot import RefrescoSegundoPlano, SnapshotVivo, abrir_snapshot, escribir_snapshot
+
+
+def _serie(n, inicio='2024-01-01'):
+    return pd.DataFrame({'fecha': pd.date_range(inicio, periods=n, freq='D'),
+                         'valor': [i / 4 for i in range(n)]})
+
+
+def test_ida_y_vuelta(tmp_path):
+    ruta = str(tmp_path / 'snap.bin')
+    df = _serie(30)
+    escribir_snapshot(ruta, {'TPM': {'data': df, 'desde_cache': True, 'actualizado': 123.0},
+                             'VACIA': {'data': pd.DataFrame(columns=['fecha', 'valor'])}},
+                      derivados={'var': 1.5}, figuras={'tasas': '{"data": []}'})
+
+    snap = abrir_snapshot(ruta)
+
+    assert snap.series_disponibles() == ['TPM']
+    assert snap.info_serie('TPM')['desde_cache'] is True
+    assert snap.info_serie('TPM')['actualizado'] == 123.0
+    pd.testing.assert_frame_equal(snap.serie('TPM'), df, check_freq=False, check_dtype=False)
+    assert snap.serie('TPM') is snap.serie('TPM')
+    assert snap.serie('OTRA') is None
+    assert snap.derivado('var') == 1.5
+    assert snap.figura_json('tasas') == '{"data": []}'
+    assert snap.figura_json('emae') is None
+
+
+def test_archivo_invalido_o_ausente(tmp_path):
+    assert abrir_snapshot(str(tmp_path / 'no_existe.bin')) is None
+
+    ruta = tmp_path / 'basura.bin'
+    ruta.write_bytes(b'x' * 64)
+    assert abrir_snapshot(str(ruta)) is None
+
+
+def test_vivo_remapea_solo_si_cambia(tmp_path):
+    ruta = str(tmp_path / 'snap.bin')
+    vivo = SnapshotVivo(ruta)
+    assert vivo.actual() is None
+
+    escribir_snapshot(ruta, {'TPM': {'data': _serie(5)}})
+    primero = vivo.actual()
+    assert vivo.actual() is primero
+
+    escribir_snapshot(ruta, {'TPM': {'data': _serie(8)}})
+    os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    segundo = vivo.actual()
+
+    assert segundo is not primero
+    assert len(segundo.serie('TPM')) == 8
+    # El mapa viejo sigue siendo legible tras el reemplazo atómico
+    assert len(primero.serie('TPM')) == 5
+
+
+def test_escritores_concurrentes_no_se_pisan(tmp_path):
+    ruta = str(tmp_path / 'snap.bin')
+    hilos = [threading.Thread(target=escribir_snapshot, args=(ruta, {'TPM': {'data': _serie(n)}}))
+             for n in range(5, 25)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert 5 <= len(abrir_snapshot(ruta).serie('TPM')) < 25
+    assert os.listdir(tmp_path) == ['snap.bin']
+
+
+def test_refresco_sin_corrida_inmediata():
+    llamadas = []
+    refresco = RefrescoSegundoPlano(lambda: llamadas.append(1), intervalo=60, inmediato=False).iniciar()
+    time.sleep(0.1)
+    refresco.detener()
+    assert llamadas == []
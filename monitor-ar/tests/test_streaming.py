@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from utils.streaming import SerieTipada, iterar_array_json
+
+
+def _bloques(texto, tamanio):
+    return [texto[i:i + tamanio] for i in range(0, len(texto), tamanio)]
+
+
+@pytest.mark.parametrize('tamanio', [1, 7, 4096])
+def test_array_json_en_bloques(tamanio):
+    registros = [{'idVariable': 1, 'fecha': f'2024-01-{d:02d}', 'valor': d / 2} for d in range(1, 29)]
+    doc = json.dumps({'status': 200, 'metadata': {'nota': '"results": ['}, 'results': registros})
+
+    assert list(iterar_array_json(_bloques(doc, tamanio), 'results')) == registros
+
+
+def test_array_json_ausente_o_vacio():
+    assert list(iterar_array_json(['{"status": 200}'], 'results')) == []
+    assert list(iterar_array_json(['{"data": []}'], 'data')) == []
+
+
+def test_array_json_truncado_falla():
+    with pytest.raises(json.JSONDecodeError):
+        list(iterar_array_json(['{"data": [["2024-01-01", 1], ["2024-'], 'data'))
+
+
+def test_serie_tipada_descarta_invalidos_y_ordena():
+    serie = SerieTipada()
+    for fecha, valor in [('2024-03-01', '3'), ('2024-01-01', 1), (None, 2), ('2024-02-01', None),
+                         ('no-fecha', 5), ('2024-02-01T00:00:00', 'x'), ('2024-02-01T00:00:00', 2.5)]:
+        serie.agregar(fecha, valor)
+
+    df = serie.a_dataframe()
+
+    assert df['fecha'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert df['valor'].tolist() == [1.0, 2.5, 3.0]
+    assert SerieTipada().a_dataframe() is None
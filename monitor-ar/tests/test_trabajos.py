@@ -0,0 +1,139 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.analitica import descomposicion_estacional, regresion_movil
+from utils.api_helpers import EMAE_CACHE, hash_serie, obtener_emae, obtener_tasas_bcra, version_serie
+from utils.cache_manager import GestorCache
+from utils.trabajos import GestorTrabajos, _ejecutar
+
+PAGINA_ANALITICA = os.path.join(os.path.dirname(__file__), '..', '..', 'pages', 'analitica.py')
+
+
+@pytest.fixture
+def gestor(cache_dir):
+    gestor = GestorTrabajos(str(cache_dir), max_workers=2)
+    yield gestor
+    gestor.cerrar()
+
+
+def test_descomposicion_recupera_estacionalidad():
+    meses = 120
+    patron = np.tile(np.r_[np.arange(6), np.arange(6)[::-1]] - 2.5, meses // 12)
+    df = pd.DataFrame({'fecha': pd.date_range('2010-01-01', periods=meses, freq='MS'),
+                       'valor': 100 + 0.3 * np.arange(meses) + patron})
+
+    resultado = descomposicion_estacional(df)
+
+    np.testing.assert_allclose(resultado['estacional'].to_numpy()[:12], patron[:12] - patron[:12].mean(), atol=1e-9)
+    assert resultado['tendencia'].isna().sum() == 12
+    assert resultado['residuo'].abs().max() < 1e-9
+
+
+def test_descomposicion_con_hueco_y_arranque_a_mitad_de_anio():
+    fechas = pd.date_range('2010-07-01', periods=120, freq='MS')
+    patron_anual = np.r_[np.arange(6), np.arange(6)[::-1]] - 2.5   # por mes calendario (enero = 0)
+    df = pd.DataFrame({'fecha': fechas, 'valor': 100 + 0.3 * np.arange(120) + patron_anual[fechas.month - 1]})
+    df = df.drop(index=[40, 41, 42])   # faltan tres meses seguidos
+
+    resultado = descomposicion_estacional(df)
+
+    assert len(resultado) == 117 and resultado.index.equals(pd.DatetimeIndex(df['fecha'], name='fecha'))
+    np.testing.assert_allclose(resultado['estacional'].to_numpy(),
+                               patron_anual[resultado.index.month - 1] - patron_anual.mean(), atol=1e-9)
+    assert resultado['residuo'].abs().max() < 1e-9
+
+
+def test_regresion_movil_recupera_coeficientes():
+    x = np.random.default_rng(0).normal(40, 5, 300)
+    matriz = pd.DataFrame({'y': 1.5 + 2 * x, 'x': x}, index=pd.date_range('2024-01-01', periods=300))
+    matriz.iloc[10, 0] = np.nan
+
+    resultado = regresion_movil(matriz, 'y', 'x', ventana=30)
+
+    validas = resultado.dropna()
+    np.testing.assert_allclose(validas['beta'], 2)
+    np.testing.assert_allclose(validas['alfa'], 1.5)
+    np.testing.assert_allclose(validas['r2'], 1)
+    assert resultado.index.equals(matriz.index)
+
+
+def test_trabajo_en_pool_se_cachea_por_contenido(api_stub, gestor, cache_dir, monkeypatch):
+    obtener_emae()
+    clave = gestor.enviar('descomposicion', ['EMAE'])
+
+    assert gestor.estado(clave) in ('en_curso', 'listo')
+    assert gestor.esperar(clave, timeout=60) == 'listo'
+    resultado = gestor.resultado(clave)
+    assert list(resultado.columns) == ['valor', 'tendencia', 'estacional', 'residuo']
+
+    # Mismo trabajo y datos: no se recalcula, y otro proceso lo encuentra en disco
+    assert gestor.enviar('descomposicion', ['EMAE']) == clave
+    assert GestorTrabajos(str(cache_dir)).estado(clave) == 'listo'
+
+    # Desalojar la serie y volver a descargarla igual avanza la versión, no la clave
+    version = version_serie('EMAE')
+    desalojadas = GestorCache(str(cache_dir), ttl_segundos=1, fijadas=set()).aplicar_politica(ahora=time.time() + 3600)
+    assert EMAE_CACHE in desalojadas
+    obtener_emae()
+    assert version_serie('EMAE') > version
+    assert gestor.enviar('descomposicion', ['EMAE']) == clave
+
+    # Una revisión de la serie cambia la clave
+    monkeypatch.setattr(api_stub, 'meses_revisados', 2)
+    obtener_emae()
+    assert gestor.enviar('descomposicion', ['EMAE']) != clave
+
+
+def test_worker_rechaza_serie_cambiada_desde_el_envio(api_stub, cache_dir, tmp_path):
+    obtener_emae()
+    hash_envio = hash_serie('EMAE')
+    ruta = str(tmp_path / 'resultado.pkl')
+    assert _ejecutar('descomposicion', ['EMAE'], {}, str(cache_dir), ruta, [hash_envio]) > 0
+
+    with pytest.raises(ValueError, match='cambió'):
+        _ejecutar('descomposicion', ['EMAE'], {}, str(cache_dir), ruta, ['otro-hash'])
+
+
+def test_trabajos_en_paralelo_y_error_sin_reintento(api_stub, gestor):
+    obtener_tasas_bcra()
+    claves = [gestor.enviar('regresion_movil', [y, x], ventana=20)
+              for y, x in [('BADLAR', 'TPM'), ('PF_USD', 'TPM'), ('BADLAR', 'PF_USD')]]
+    fallida = gestor.enviar('descomposicion', ['EMAE'])   # EMAE sin caché
+
+    assert [gestor.esperar(c, timeout=60) for c in claves] == ['listo'] * 3
+    assert gestor.esperar(fallida, timeout=60) == 'error'
+    assert 'EMAE' in gestor.error(fallida)
+    assert gestor.enviar('descomposicion', ['EMAE']) == fallida
+    assert gestor.estado(fallida) == 'error'
+    with pytest.raises(ValueError):
+        gestor.enviar('regresion_movil', ['TPM'])
+
+
+def test_pagina_sondea_y_muestra_resultados(api_stub, monkeypatch):
+    import streamlit
+    from streamlit.testing.v1 import AppTest
+    from utils import trabajos
+
+    monkeypatch.setattr(trabajos, '_gestores', {})
+    obtener_emae()
+    obtener_tasas_bcra()
+    streamlit.cache_data.clear()
+
+    at = AppTest.from_file(PAGINA_ANALITICA, default_timeout=30)
+    at.run()
+    assert not at.exception
+    assert any('calculando' in i.value for i in at.info)
+
+    gestor = trabajos.obtener_gestor_trabajos()
+    for clave in list(gestor._futuros):
+        assert gestor.esperar(clave, timeout=60) == 'listo'
+    at.run()
+
+    assert not at.exception
+    assert len(at.get('plotly_chart')) == 2
+    assert len(at.dataframe) == 1
+    gestor.cerrar()
@@ -0,0 +1,431 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+# Estado del motor (cursor por serie + alertas ya emitidas), junto a la caché
+ESTADO_NOMBRE = '_alertas_estado.json'
+
+# Ids de alertas emitidas que se recuerdan por regla para no repetirlas
+MAX_IDS_POR_REGLA = 500
+
+# Evaluación automática tras cada escritura de caché que cambia una serie
+# (MONITOR_AR_ALERTAS=0 la desactiva). Reglas y destinos, por entorno.
+ALERTAS_AUTOMATICAS = os.environ.get('MONITOR_AR_ALERTAS', '1') != '0'
+REGLAS_ARCHIVO = os.environ.get('MONITOR_AR_ALERTAS_REGLAS')
+ALERTAS_ARCHIVO = os.environ.get('MONITOR_AR_ALERTAS_ARCHIVO')
+ALERTAS_WEBHOOK = os.environ.get('MONITOR_AR_ALERTAS_WEBHOOK')
+
+# Reglas que se cargan si no se indica un archivo de reglas
+UMBRAL_BADLAR_PB = float(os.environ.get('MONITOR_AR_ALERTA_BADLAR_PB', '100'))
+REGLAS_POR_DEFECTO = [
+    {'tipo': 'cambio', 'serie': 'TPM'},
+    {'tipo': 'movimiento', 'serie': 'BADLAR', 'umbral_pb': UMBRAL_BADLAR_PB},
+    {'tipo': 'cambio_signo', 'serie': 'EMAE', 'periodos': 12},
+]
+
+
+# ─── Reglas ────────────────────────────────────────────────────────────────
+
+class Regla(ABC):
+    """
+    Regla sobre una serie. `historia` es cuántas observaciones previas necesita;
+    `evaluar(previas, valor)` recibe los últimos valores en orden cronológico y
+    retorna el mensaje de la alerta o None. Cada tipo de regla la implementa.
+    """
+    tipo = None
+    historia = 1
+
+    def __init__(self, serie, nombre=None):
+        self.serie = serie
+        self.nombre = nombre or f'{self.tipo}:{serie}'
+
+    @abstractmethod
+    def evaluar(self, previas, valor):
+        ...
+
+
+class ReglaCambio(Regla):
+    """Cualquier cambio de valor respecto de la observación anterior (ej. TPM)."""
+    tipo = 'cambio'
+
+    def __init__(self, serie, nombre=None, minimo=0.0):
+        super().__init__(serie, nombre)
+        self.minimo = minimo
+
+    def evaluar(self, previas, valor):
+        anterior = previas[-1]
+        if abs(valor - anterior) > self.minimo:
+            return f"{self.serie} cambió de {anterior:.2f} a {valor:.2f} ({(valor - anterior) * 100:+.0f} pb)"
+        return None
+
+
+class ReglaMovimiento(Regla):
+    """Movimiento de al menos `umbral_pb` puntos básicos en `ventana` observaciones."""
+    tipo = 'movimiento'
+
+    def __init__(self, serie, umbral_pb, ventana=1, nombre=None):
+        self.umbral_pb = umbral_pb
+        self.historia = ventana
+        super().__init__(serie, nombre or f'movimiento:{serie}:{umbral_pb:g}pb/{ventana}')
+
+    def evaluar(self, previas, valor):
+        delta_pb = (valor - previas[-self.historia]) * 100
+        if abs(delta_pb) >= self.umbral_pb:
+            return f"{self.serie} se movió {delta_pb:+.0f} pb en {self.historia} obs. (a {valor:.2f})"
+        return None
+
+
+class ReglaCambioSigno(Regla):
+    """La variación contra `periodos` observaciones atrás (interanual) cambia de signo."""
+    tipo = 'cambio_signo'
+
+    def __init__(self, serie, periodos=12, nombre=None):
+        self.periodos = periodos
+        self.historia = periodos + 1
+        super().__init__(serie, nombre)
+
+    def evaluar(self, previas, valor):
+        base_actual, base_previa = previas[-self.periodos], previas[-self.periodos - 1]
+        if not base_actual or not base_previa:
+            return None
+        actual = (valor / base_actual - 1) * 100
+        previa = (previas[-1] / base_previa - 1) * 100
+        if actual * previa < 0:
+            return f"{self.serie}: la variación interanual pasó de {previa:+.2f}% a {actual:+.2f}%"
+        return None
+
+
+class ReglaUmbral(Regla):
+    """La serie cruza `umbral` hacia arriba, hacia abajo o en ambos sentidos."""
+    tipo = 'umbral'
+
+    def __init__(self, serie, umbral, direccion='ambas', nombre=None):
+        if direccion not in ('arriba', 'abajo', 'ambas'):
+            raise ValueError(f"Dirección inválida: {direccion}")
+        self.umbral = umbral
+        self.direccion = direccion
+        super().__init__(serie, nombre or f'umbral:{serie}:{umbral:g}:{direccion}')
+
+    def evaluar(self, previas, valor):
+        anterior = previas[-1]
+        if self.direccion != 'abajo' and anterior < self.umbral <= valor:
+            return f"{self.serie} superó {self.umbral:g} ({valor:.2f})"
+        if self.direccion != 'arriba' and anterior >= self.umbral > valor:
+            return f"{self.serie} perforó {self.umbral:g} ({valor:.2f})"
+        return None
+
+
+TIPOS_REGLA = {clase.tipo: clase for clase in (ReglaCambio, ReglaMovimiento, ReglaCambioSigno, ReglaUmbral)}
+
+
+def crear_regla(config):
+    """Crea una regla desde un dict {'tipo': ..., 'serie': ..., parámetros}."""
+    config = dict(config)
+    tipo = config.pop('tipo')
+    if tipo not in TIPOS_REGLA:
+        raise ValueError(f"Tipo de regla desconocido: {tipo}")
+    return TIPOS_REGLA[tipo](**config)
+
+
+def cargar_reglas(ruta=None):
+    """Reglas desde un archivo JSON (lista de configs) o las reglas por defecto."""
+    if ruta is None:
+        return [crear_regla(c) for c in REGLAS_POR_DEFECTO]
+    with open(ruta, encoding='utf-8') as f:
+        return [crear_regla(c) for c in json.load(f)]
+
+
+# ─── Destinos ──────────────────────────────────────────────────────────────
+
+class SinkLog:
+    """Imprime cada alerta en el log del proceso."""
+
+    def __call__(self, alerta):
+        print(f"🔔 [{alerta['serie']}] {alerta['fecha']}: {alerta['mensaje']}")
+
+
+class SinkArchivo:
+    """Agrega cada alerta como una línea JSON al final del archivo."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def __call__(self, alerta):
+        with self._lock, open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alerta, ensure_ascii=False) + '\n')
+
+
+class SinkWebhook:
+    """Envía cada alerta como JSON por POST a `url`."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self._sesion = None
+
+    def __call__(self, alerta):
+        if self._sesion is None:
+            from .api_helpers import crear_sesion_con_reintentos
+            self._sesion = crear_sesion_con_reintentos()
+        respuesta = self._sesion.post(self.url, json=alerta, timeout=self.timeout)
+        respuesta.raise_for_status()
+
+
+# ─── Motor ─────────────────────────────────────────────────────────────────
+
+class MotorAlertas:
+    """
+    Evalúa reglas sobre las series cacheadas de forma incremental.
+
+    Por serie guarda un cursor (última fecha evaluada y versión de caché): si la
+    versión no cambió ni siquiera se lee el CSV, y si cambió solo se evalúan las
+    observaciones posteriores al cursor, con una ventana de historia del tamaño
+    que pide la regla más exigente de esa serie. Las reglas se indexan por serie.
+    Cada alerta tiene un id (regla + fecha) y no se vuelve a emitir.
+
+    La primera vez que ve una serie fija el cursor en su última observación sin
+    alertar (línea base), salvo con `alertar_historia=True`.
+    """
+
+    def __init__(self, reglas=(), sinks=None, directorio=None, alertar_historia=False):
+        if directorio is None:
+            from .api_helpers import CACHE_DIR
+            directorio = CACHE_DIR
+        self.directorio = directorio
+        self.sinks = list(sinks) if sinks is not None else [SinkLog()]
+        self.alertar_historia = alertar_historia
+        self._por_serie = {}
+        self._nombres = set()
+        self._lock = threading.RLock()
+        self._estado = self._cargar_estado()
+        for regla in reglas:
+            self.agregar(regla)
+
+    @property
+    def ruta_estado(self):
+        return os.path.join(self.directorio, ESTADO_NOMBRE)
+
+    def _cargar_estado(self):
+        try:
+            with open(self.ruta_estado, encoding='utf-8') as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            estado = {}
+        except Exception as e:
+            print(f"⚠️ Estado de alertas corrupto, se reinicia: {e}")
+            estado = {}
+        estado.setdefault('series', {})
+        estado.setdefault('emitidas', {})
+        return estado
+
+    def _guardar_estado(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        # Temporal único: el motor también corre en los hilos que escriben la caché
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, prefix=ESTADO_NOMBRE + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._estado, f, indent=1, sort_keys=True)
+            os.replace(temporal, self.ruta_estado)
+        except BaseException:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+    def agregar(self, regla):
+        with self._lock:
+            if regla.nombre in self._nombres:
+                raise ValueError(f"Regla duplicada: {regla.nombre}")
+            self._nombres.add(regla.nombre)
+            self._por_serie.setdefault(regla.serie, []).append(regla)
+
+    def reglas(self, serie=None):
+        if serie is not None:
+            return list(self._por_serie.get(serie, []))
+        return [r for reglas in self._por_serie.values() for r in reglas]
+
+    def series(self):
+        return list(self._por_serie)
+
+    def cursor(self, serie):
+        """Última fecha evaluada de la serie ('YYYY-MM-DD') o None."""
+        return self._estado['series'].get(serie, {}).get('ultima_fecha')
+
+    def _registrar_id(self, regla, id_alerta):
+        emitidas = self._estado['emitidas'].setdefault(regla.nombre, [])
+        if id_alerta in emitidas:
+            return False
+        emitidas.append(id_alerta)
+        del emitidas[:-MAX_IDS_POR_REGLA]
+        return True
+
+    def _emitir(self, alerta):
+        for sink in self.sinks:
+            try:
+                sink(alerta)
+            except Exception as e:
+                print(f"⚠️ Error enviando alerta a {type(sink).__name__}: {e}")
+
+    def evaluar_serie(self, serie, df, version=None):
+        """
+        Evalúa las observaciones de `df` (fecha, valor) posteriores al cursor.
+        Retorna la lista de alertas emitidas.
+        """
+        reglas = self._por_serie.get(serie)
+        if not reglas or df is None or df.empty:
+            return []
+        import pandas as pd
+
+        with self._lock:
+            estado = self._estado['series'].setdefault(serie, {})
+            cursor = estado.get('ultima_fecha')
+            df = df.sort_values('fecha')
+
+            if cursor is None and not self.alertar_historia:
+                estado['ultima_fecha'] = df['fecha'].iloc[-1].strftime('%Y-%m-%d')
+                estado['version'] = version
+                self._guardar_estado()
+                print(f"📍 Alertas {serie}: línea base en {estado['ultima_fecha']}")
+                return []
+
+            if cursor is None:
+                previas, nuevas = df.iloc[:0], df
+            else:
+                corte = df['fecha'] > pd.Timestamp(cursor)
+                previas, nuevas = df[~corte], df[corte]
+
+            historia = max(r.historia for r in reglas)
+            ventana = deque(previas['valor'].tail(historia).tolist(), maxlen=historia)
+            alertas = []
+            for fecha, valor in zip(nuevas['fecha'], nuevas['valor'].tolist()):
+                fecha_txt = fecha.strftime('%Y-%m-%d')
+                previos = list(ventana)
+                for regla in reglas:
+                    if len(previos) < regla.historia:
+                        continue
+                    mensaje = regla.evaluar(previos, valor)
+                    if mensaje is None:
+                        continue
+                    id_alerta = f'{regla.nombre}|{fecha_txt}'
+                    if not self._registrar_id(regla, id_alerta):
+                        continue
+                    alertas.append({
+                        'id': id_alerta,
+                        'regla': regla.nombre,
+                        'tipo': regla.tipo,
+                        'serie': serie,
+                        'fecha': fecha_txt,
+                        'valor': valor,
+                        'mensaje': mensaje,
+                        'emitida': time.time(),
+                    })
+                ventana.append(valor)
+
+            if not nuevas.empty:
+                estado['ultima_fecha'] = nuevas['fecha'].iloc[-1].strftime('%Y-%m-%d')
+            estado['version'] = version
+            self._guardar_estado()
+
+        for alerta in alertas:
+            self._emitir(alerta)
+        return alertas
+
+    def evaluar(self, series=None):
+        """
+        Evalúa las series con reglas (todas, o las de `series`) a partir de la
+        caché. Las series cuya versión de caché no cambió desde la última
+        evaluación se saltean sin leerlas.
+        """
+        from .api_helpers import leer_serie_cache, version_serie
+
+        alertas = []
+        for serie in (self.series() if series is None else series):
+            version = version_serie(serie)
+            if version and self._estado['series'].get(serie, {}).get('version') == version:
+                continue
+            alertas.extend(self.evaluar_serie(serie, leer_serie_cache(serie), version))
+        return alertas
+
+
+# ─── Evaluación automática ─────────────────────────────────────────────────
+
+_motores = {}
+_motores_lock = threading.Lock()
+
+
+def obtener_motor(directorio=None):
+    """
+    Motor compartido para un directorio de caché (por defecto CACHE_DIR), con
+    las reglas de MONITOR_AR_ALERTAS_REGLAS (o las por defecto) y los destinos
+    del entorno: log, y archivo JSONL / webhook si están configurados.
+    """
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    clave = os.path.abspath(directorio)
+    with _motores_lock:
+        if clave not in _motores:
+            sinks = [SinkLog()]
+            if ALERTAS_ARCHIVO:
+                sinks.append(SinkArchivo(ALERTAS_ARCHIVO))
+            if ALERTAS_WEBHOOK:
+                sinks.append(SinkWebhook(ALERTAS_WEBHOOK))
+            _motores[clave] = MotorAlertas(cargar_reglas(REGLAS_ARCHIVO), sinks, directorio)
+        return _motores[clave]
+
+
+def evaluar_escritura(nombre_archivo, directorio=None):
+    """
+    Evalúa las reglas de la serie guardada en `nombre_archivo`; la llama
+    escribir_serie_cache cada vez que una escritura cambia la serie.
+    Retorna la lista de alertas emitidas.
+    """
+    from .api_helpers import archivo_serie
+
+    if not ALERTAS_AUTOMATICAS:
+        return []
+    motor = obtener_motor(directorio)
+    series = [serie for serie in motor.series() if archivo_serie(serie) == nombre_archivo]
+    return motor.evaluar(series) if series else []
+
+
+def main():
+    """Evalúa las reglas sobre la caché (opcionalmente actualizándola antes)."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Motor de alertas de Monitor AR")
+    parser.add_argument('--reglas', help="archivo JSON con la lista de reglas")
+    parser.add_argument('--archivo', help="agregar las alertas a este archivo JSONL")
+    parser.add_argument('--webhook', help="enviar las alertas por POST a esta URL")
+    parser.add_argument('--actualizar', action='store_true', help="consultar las APIs antes de evaluar")
+    args = parser.parse_args()
+
+    alertas = []
+    sinks = [SinkLog(), alertas.append]
+    if args.archivo:
+        sinks.append(SinkArchivo(args.archivo))
+    if args.webhook:
+        sinks.append(SinkWebhook(args.webhook))
+
+    motor = MotorAlertas(cargar_reglas(args.reglas), sinks)
+    # Las escrituras de --actualizar se evalúan con este motor (y sus destinos)
+    with _motores_lock:
+        _motores[os.path.abspath(motor.directorio)] = motor
+    if args.actualizar:
+        from .api_helpers import obtener_tasas_bcra, obtener_emae
+        obtener_tasas_bcra()
+        obtener_emae()
+
+    motor.evaluar()
+    print(f"🔔 {len(alertas)} alertas nuevas ({len(motor.reglas())} reglas, {len(motor.series())} series)")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
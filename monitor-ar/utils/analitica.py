@@ -0,0 +1,334 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Frecuencias de alineación -> alias de pandas (etiqueta al inicio del período)
+FRECUENCIAS = {
+    'diaria': 'D',
+    'habil': 'B',
+    'semanal': 'W-FRI',
+    'mensual': 'MS',
+    'trimestral': 'QS',
+}
+
+# Agregación dentro de cada período
+METODOS = {'ultimo': 'last', 'promedio': 'mean'}
+
+# Máxima antigüedad del dato que el as-of join arrastra hacia adelante
+# (alcanza para una serie mensual publicada con rezago)
+TOLERANCIA_POR_DEFECTO = '62D'
+
+# Pares por bloque en las correlaciones móviles (acota la memoria: T x bloque)
+PARES_POR_BLOQUE = 256
+
+MAX_MATRICES_CACHEADAS = 16
+
+
+# ─── Alineación ────────────────────────────────────────────────────────────
+
+def alinear_series(series, frecuencia='mensual', metodo='ultimo', tolerancia=TOLERANCIA_POR_DEFECTO,
+                   desde=None, hasta=None):
+    """
+    Alinea series de distinta frecuencia y calendario en una sola matriz.
+
+    Cada serie se agrega a la frecuencia pedida (último valor o promedio del
+    período) y se une al calendario común con un as-of join hacia atrás: un
+    período sin dato toma el último disponible si no es más viejo que
+    `tolerancia`. Así una serie mensual se puede comparar contra una diaria.
+
+    series: {nombre: DataFrame fecha/valor}
+    Retorna DataFrame indexado por fecha, una columna float64 por serie.
+    """
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia inválida: {frecuencia}")
+    if metodo not in METODOS:
+        raise ValueError(f"Método inválido: {metodo}")
+    alias = FRECUENCIAS[frecuencia]
+
+    agregadas = {}
+    for nombre, df in series.items():
+        if df is None or df.empty:
+            continue
+        s = pd.Series(df['valor'].to_numpy(dtype=np.float64),
+                      index=pd.DatetimeIndex(df['fecha']).as_unit('ns'))
+        s = s[~s.index.duplicated(keep='last')].sort_index().dropna()
+        agregadas[nombre] = s.resample(alias).agg(METODOS[metodo]).dropna()
+
+    if not agregadas:
+        return pd.DataFrame(columns=list(series), dtype=np.float64)
+
+    inicio = pd.Timestamp(desde) if desde is not None else min(s.index[0] for s in agregadas.values())
+    fin = pd.Timestamp(hasta) if hasta is not None else max(s.index[-1] for s in agregadas.values())
+    calendario = pd.DataFrame({'fecha': pd.date_range(inicio, fin, freq=alias, unit='ns')})
+    limite = pd.Timedelta(tolerancia) if tolerancia is not None else None
+
+    columnas = {}
+    for nombre in series:
+        s = agregadas.get(nombre)
+        if s is None:
+            columnas[nombre] = np.full(len(calendario), np.nan)
+            continue
+        unida = pd.merge_asof(calendario, s.rename('valor').rename_axis('fecha').reset_index(),
+                              on='fecha', direction='backward', tolerance=limite)
+        columnas[nombre] = unida['valor'].to_numpy(dtype=np.float64)
+
+    return pd.DataFrame(columnas, index=pd.DatetimeIndex(calendario['fecha'], name='fecha'))
+
+
+_matrices = OrderedDict()
+_matrices_lock = threading.Lock()
+
+
+def matriz_alineada(nombres, frecuencia='mensual', metodo='ultimo', tolerancia=TOLERANCIA_POR_DEFECTO):
+    """
+    Matriz alineada de series cacheadas ('TPM', 'BADLAR', 'PF_USD', 'EMAE').
+
+    Se memoriza por (nombres, versiones de caché, parámetros): mientras ninguna
+    serie cambie de versión se devuelve la misma matriz sin releer los CSV.
+    El resultado es compartido: no modificarlo.
+    """
+    from .api_helpers import leer_serie_cache, version_serie
+
+    nombres = tuple(nombres)
+    versiones = tuple(version_serie(n) for n in nombres)
+    clave = (nombres, versiones, frecuencia, metodo, tolerancia)
+    with _matrices_lock:
+        if clave in _matrices:
+            _matrices.move_to_end(clave)
+            return _matrices[clave]
+
+    matriz = alinear_series({n: leer_serie_cache(n) for n in nombres}, frecuencia, metodo, tolerancia)
+
+    with _matrices_lock:
+        _matrices[clave] = matriz
+        while len(_matrices) > MAX_MATRICES_CACHEADAS:
+            _matrices.popitem(last=False)
+    return matriz
+
+
+# ─── Métricas vectorizadas ─────────────────────────────────────────────────
+
+def _pares(columnas, pares=None):
+    if pares is None:
+        i, j = np.triu_indices(len(columnas), k=1)
+        return list(zip(i.tolist(), j.tolist()))
+    posicion = {c: k for k, c in enumerate(columnas)}
+    return [(posicion[a], posicion[b]) for a, b in pares]
+
+
+def _sumas_moviles(x, ventana):
+    """Suma móvil por columna vía suma acumulada (x sin NaN)."""
+    acumulada = np.cumsum(x, axis=0)
+    acumulada[ventana:] = acumulada[ventana:] - acumulada[:-ventana]
+    return acumulada
+
+
+def correlacion_movil(matriz, ventana, pares=None, min_obs=None):
+    """
+    Correlación de Pearson móvil entre pares de columnas.
+
+    Usa sumas acumuladas sobre todos los pares a la vez (en bloques de
+    PARES_POR_BLOQUE), descartando los NaN de cada par. Cada fila usa las
+    `ventana` filas que terminan en ella; con menos de `min_obs` observaciones
+    válidas (por defecto, media ventana) el resultado es NaN.
+
+    Retorna DataFrame con una columna 'A~B' por par.
+    """
+    min_obs = max(2, min_obs if min_obs is not None else ventana // 2)
+    columnas = list(matriz.columns)
+    x = matriz.to_numpy(dtype=np.float64)
+    # Centrar cada columna reduce la cancelación numérica de las sumas acumuladas
+    x = x - np.nanmean(x, axis=0)
+    indices = _pares(columnas, pares)
+
+    resultado = np.full((len(x), len(indices)), np.nan)
+    for inicio in range(0, len(indices), PARES_POR_BLOQUE):
+        bloque = np.array(indices[inicio:inicio + PARES_POR_BLOQUE]).reshape(-1, 2)
+        a, b = x[:, bloque[:, 0]], x[:, bloque[:, 1]]
+        validos = ~(np.isnan(a) | np.isnan(b))
+        a = np.where(validos, a, 0.0)
+        b = np.where(validos, b, 0.0)
+
+        n = _sumas_moviles(validos.astype(np.float64), ventana)
+        sa, sb = _sumas_moviles(a, ventana), _sumas_moviles(b, ventana)
+        saa, sbb = _sumas_moviles(a * a, ventana), _sumas_moviles(b * b, ventana)
+        sab = _sumas_moviles(a * b, ventana)
+
+        cov = n * sab - sa * sb
+        var = (n * saa - sa * sa) * (n * sbb - sb * sb)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var)
+        corr[(n < min_obs) | (var <= 0)] = np.nan
+        resultado[:, inicio:inicio + len(bloque)] = np.clip(corr, -1.0, 1.0)
+
+    nombres = [f'{columnas[i]}~{columnas[j]}' for i, j in indices]
+    return pd.DataFrame(resultado, index=matriz.index, columns=nombres)
+
+
+def matriz_correlacion(matriz, min_obs=3):
+    """
+    Matriz de correlación con observaciones completas por par, en una sola
+    pasada de productos matriciales.
+    """
+    x = matriz.to_numpy(dtype=np.float64)
+    x = x - np.nanmean(x, axis=0)
+    validos = (~np.isnan(x)).astype(np.float64)
+    x = np.nan_to_num(x)
+
+    n = validos.T @ validos
+    sx = x.T @ validos            # sx[i, j]: suma de i donde j también es válido
+    sxx = (x * x).T @ validos
+    sxy = x.T @ x
+
+    cov = n * sxy - sx * sx.T
+    var = (n * sxx - sx * sx) * (n * sxx.T - sx.T * sx.T)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var)
+    corr[(n < min_obs) | (var <= 0)] = np.nan
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=matriz.columns, columns=matriz.columns)
+
+
+def correlacion_rezagos(matriz, a, b, max_rezago=12, min_obs=3):
+    """
+    Correlación entre a[t] y b[t - k] para k en [-max_rezago, max_rezago].
+    Un k positivo con correlación alta indica que b anticipa a `a` en k períodos.
+
+    Retorna DataFrame indexado por rezago con columnas correlacion y n.
+    """
+    x = matriz[a].to_numpy(dtype=np.float64)
+    y = matriz[b].to_numpy(dtype=np.float64)
+    rezagos = np.arange(-max_rezago, max_rezago + 1)
+    correlaciones = np.full(len(rezagos), np.nan)
+    observaciones = np.zeros(len(rezagos), dtype=np.int64)
+
+    for k, rezago in enumerate(rezagos):
+        if rezago >= 0:
+            xs, ys = x[rezago:], y[:len(y) - rezago]
+        else:
+            xs, ys = x[:rezago], y[-rezago:]
+        validos = ~(np.isnan(xs) | np.isnan(ys))
+        observaciones[k] = validos.sum()
+        if observaciones[k] >= min_obs:
+            xv, yv = xs[validos], ys[validos]
+            xv, yv = xv - xv.mean(), yv - yv.mean()
+            denominador = np.sqrt((xv * xv).sum() * (yv * yv).sum())
+            if denominador > 0:
+                correlaciones[k] = (xv * yv).sum() / denominador
+
+    return pd.DataFrame({'correlacion': correlaciones, 'n': observaciones},
+                        index=pd.Index(rezagos, name='rezago'))
+
+
+def mejor_rezago(matriz, a, b, max_rezago=12, min_obs=3):
+    """Rezago con mayor |correlación| entre a y b: {'rezago', 'correlacion'} o None."""
+    tabla = correlacion_rezagos(matriz, a, b, max_rezago, min_obs)['correlacion'].dropna()
+    if tabla.empty:
+        return None
+    rezago = int(tabla.abs().idxmax())
+    return {'rezago': rezago, 'correlacion': float(tabla[rezago])}
+
+
+def spreads(matriz, pares=None, puntos_basicos=False):
+    """
+    Diferenciales a - b para los pares pedidos (por defecto, todos).
+    Con `puntos_basicos=True` se expresan en pb (series en %).
+
+    Retorna DataFrame con una columna 'A-B' por par.
+    """
+    columnas = list(matriz.columns)
+    indices = np.array(_pares(columnas, pares), dtype=np.int64).reshape(-1, 2)
+    x = matriz.to_numpy(dtype=np.float64)
+    diferencias = x[:, indices[:, 0]] - x[:, indices[:, 1]]
+    if puntos_basicos:
+        diferencias = diferencias * 100
+    nombres = [f'{columnas[i]}-{columnas[j]}' for i, j in indices]
+    return pd.DataFrame(diferencias, index=matriz.index, columns=nombres)
+
+
+# ─── Cálculos pesados (se corren como trabajos, ver utils.trabajos) ────────
+
+MODELOS_DESCOMPOSICION = ('aditivo', 'multiplicativo')
+
+# Observaciones por ciclo anual -> frecuencia de la grilla regular (pandas Period)
+PERIODOS_DESCOMPOSICION = {12: 'M', 4: 'Q'}
+
+
+def descomposicion_estacional(df, periodo=12, modelo='aditivo'):
+    """
+    Descomposición clásica de una serie regular (ej. EMAE mensual): tendencia
+    por media móvil centrada (2 x `periodo` si el período es par), componente
+    estacional como promedio por mes (o trimestre) del calendario, y residuo.
+    La serie se lleva a una grilla regular antes de calcular: un mes faltante
+    queda como hueco en lugar de correr la estacionalidad de los siguientes.
+
+    df: DataFrame fecha/valor.
+    Retorna DataFrame indexado por fecha: valor, tendencia, estacional, residuo.
+    """
+    if modelo not in MODELOS_DESCOMPOSICION:
+        raise ValueError(f"Modelo inválido: {modelo}")
+    if periodo not in PERIODOS_DESCOMPOSICION:
+        raise ValueError(f"Período inválido: {periodo} (válidos: {sorted(PERIODOS_DESCOMPOSICION)})")
+    s = pd.Series(df['valor'].to_numpy(dtype=np.float64), index=pd.DatetimeIndex(df['fecha'], name='fecha'))
+    s = s[~s.index.duplicated(keep='last')].sort_index().dropna()
+    if len(s) < 2 * periodo:
+        raise ValueError(f"Se necesitan al menos {2 * periodo} observaciones para descomponer")
+
+    periodos = s.index.to_period(PERIODOS_DESCOMPOSICION[periodo])
+    ultimos = ~periodos.duplicated(keep='last')
+    s, periodos = s[ultimos], periodos[ultimos]
+    grilla = pd.period_range(periodos[0], periodos[-1], freq=periodos.freq)
+    x = pd.Series(s.to_numpy(), index=periodos).reindex(grilla).to_numpy()
+    # Estación según el calendario (ordinal % periodo = mes o trimestre - 1), no la posición en la serie
+    posicion = grilla.asi8 % periodo
+
+    if periodo % 2 == 0:
+        pesos = np.r_[0.5, np.ones(periodo - 1), 0.5] / periodo
+    else:
+        pesos = np.ones(periodo) / periodo
+    borde = len(pesos) // 2
+    tendencia = np.full(len(x), np.nan)
+    tendencia[borde:len(x) - borde] = np.convolve(x, pesos, mode='valid')
+
+    sin_tendencia = x / tendencia if modelo == 'multiplicativo' else x - tendencia
+    promedios = np.array([np.nanmean(sin_tendencia[posicion == p]) for p in range(periodo)])
+    # Normalizada: suma 0 (aditivo) o promedio 1 (multiplicativo) a lo largo del ciclo
+    if modelo == 'multiplicativo':
+        promedios = promedios / promedios.mean()
+        estacional = promedios[posicion]
+        residuo = x / (tendencia * estacional)
+    else:
+        promedios = promedios - promedios.mean()
+        estacional = promedios[posicion]
+        residuo = x - tendencia - estacional
+
+    # De vuelta a las fechas observadas (los huecos de la grilla no se devuelven)
+    observadas = grilla.get_indexer(periodos)
+    return pd.DataFrame({'valor': x[observadas], 'tendencia': tendencia[observadas],
+                         'estacional': estacional[observadas], 'residuo': residuo[observadas]},
+                        index=s.index)
+
+
+def regresion_movil(matriz, y, x, ventana, min_obs=None):
+    """
+    Regresión lineal móvil y = alfa + beta * x sobre columnas de una matriz
+    alineada (ej. BADLAR contra TPM). Solo usa filas con ambos valores.
+
+    Retorna DataFrame indexado por fecha: alfa, beta, r2, observaciones.
+    """
+    min_obs = ventana if min_obs is None else min_obs
+    ambas = matriz[[y, x]].dropna()
+    ventanas = ambas.rolling(ventana, min_periods=min_obs)
+    medias = ventanas.mean()
+    covarianza = ambas[y].rolling(ventana, min_periods=min_obs).cov(ambas[x])
+    varianzas = ventanas.var()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = covarianza / varianzas[x]
+        r2 = covarianza ** 2 / (varianzas[x] * varianzas[y])
+    return pd.DataFrame({
+        'alfa': medias[y] - beta * medias[x],
+        'beta': beta,
+        'r2': r2,
+        'observaciones': ambas[y].rolling(ventana, min_periods=1).count(),
+    }).reindex(matriz.index)
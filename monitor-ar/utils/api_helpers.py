@@ -1,27 +1,38 @@
 import os
-import pandas as pd
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import re
 import warnings
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .cache_manager import obtener_gestor
+from .salud import MedicionConsulta
+
+# pandas, requests y el parseo incremental se importan en el primer uso:
+# importar este módulo es barato para workers y CLI que quizás ni los usen.
 
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
 # Configuración de caché
-CACHE_DIR = '.cache'
-os.makedirs(CACHE_DIR, exist_ok=True)
+# (el directorio se crea recién al escribir)
+CACHE_DIR = os.environ.get('MONITOR_AR_CACHE_DIR', '.cache')
 
 def crear_sesion_con_reintentos():
-    """Crea sesión requests con estrategia de reintentos."""
+    """
+    Crea sesión requests con estrategia de reintentos.
+    Todas las solicitudes pasan por el limitador compartido del host (token bucket +
+    concurrencia AIMD); los 429/503 los maneja el limitador respetando Retry-After.
+    """
+    import requests
+    from urllib3.util.retry import Retry
+    from .limitador import AdaptadorLimitado
+
     sesion = requests.Session()
     reintentos = Retry(
         total=3,
         backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"]
+        status_forcelist=[500, 502, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=False
     )
-    adaptador = HTTPAdapter(max_retries=reintentos)
+    adaptador = AdaptadorLimitado(max_retries=reintentos)
     sesion.mount("http://", adaptador)
     sesion.mount("https://", adaptador)
     return sesion
@@ -30,97 +41,199 @@ def leer_cache_csv(nombre_archivo):
     """Lee un archivo CSV desde el directorio de caché."""
     ruta = os.path.join(CACHE_DIR, nombre_archivo)
     if os.path.exists(ruta):
+        import pandas as pd
         try:
             df = pd.read_csv(ruta)
+            obtener_gestor(CACHE_DIR).registrar_acceso(nombre_archivo)
             return df
         except Exception as e:
             print(f"⚠️ Error leyendo caché {nombre_archivo}: {e}")
             return None
     return None
 
-def escribir_cache_csv(df, nombre_archivo):
-    """Escribe un DataFrame en caché como CSV."""
+def escribir_cache_csv(df, nombre_archivo, fuente=None):
+    """Escribe un DataFrame en caché como CSV y lo registra en el índice de caché."""
     if df is None or df.empty:
         return
     ruta = os.path.join(CACHE_DIR, nombre_archivo)
     try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
         df.to_csv(ruta, index=False)
+        obtener_gestor(CACHE_DIR).registrar_escritura(nombre_archivo, fuente=fuente)
         print(f"✅ Caché guardado: {nombre_archivo}")
     except Exception as e:
         print(f"⚠️ Error escribiendo caché {nombre_archivo}: {e}")
 
-def obtener_tasas_bcra():
+def escribir_serie_cache(df, nombre_archivo, fuente=None):
     """
-    Obtiene tasas del BCRA v3 con fallback a caché.
-    Retorna dict con 3 DataFrames: {'TPM': df, 'BADLAR': df, 'PF_USD': df}
-    Cada DataFrame tiene columnas: fecha, valor
-    También retorna flag 'desde_cache' para cada serie.
+    Fusiona una descarga fecha/valor sobre la serie cacheada guardando la
+    historia de revisiones (ver utils.revisiones): solo se serializan los
+    meses que cambiaron, lo que quedó fuera del rango descargado se conserva y
+    los valores pisados quedan consultables por vintage.
     """
-    base_url = "https://api.bcra.gob.ar/estadisticascambiarias/v1.0"
-    
-    series = {
-        'TPM': {'endpoint': '/datos/tpm', 'cache': 'bcra_tpm.csv'},
-        'BADLAR': {'endpoint': '/datos/badlar', 'cache': 'bcra_badlar.csv'},
-        'PF_USD': {'endpoint': '/datos/tasasPasivas', 'cache': 'bcra_pf_usd.csv'}
-    }
+    if df is None or df.empty:
+        return
+    from .revisiones import obtener_historial
+    try:
+        resumen = obtener_historial(nombre_archivo, CACHE_DIR).fusionar(df)
+        obtener_gestor(CACHE_DIR).registrar_escritura(nombre_archivo, fuente=fuente, hash_contenido=resumen['hash'])
+        if resumen['revisadas'] or resumen['eliminadas']:
+            print(f"🔄 {nombre_archivo}: {resumen['revisadas']} observaciones revisadas, "
+                  f"{resumen['eliminadas']} eliminadas")
+        if resumen['cambio']:
+            print(f"✅ Caché guardado: {nombre_archivo} ({resumen['bytes_escritos']} bytes escritos)")
+    except Exception as e:
+        print(f"⚠️ Error escribiendo caché {nombre_archivo}: {e}")
+        return
+    if resumen['cambio']:
+        _evaluar_alertas(nombre_archivo)
+
+def _evaluar_alertas(nombre_archivo):
+    """Evalúa las reglas de alerta sobre la serie recién escrita; un error no afecta la escritura."""
+    from .alertas import evaluar_escritura
+    try:
+        evaluar_escritura(nombre_archivo, CACHE_DIR)
+    except Exception as e:
+        print(f"⚠️ Error evaluando alertas de {nombre_archivo}: {e}")
+
+# URLs base de las fuentes (sobreescribibles por entorno, ej. para apuntar al stub local)
+BCRA_BASE_URL = os.environ.get('MONITOR_AR_BCRA_URL', "https://api.bcra.gob.ar/estadisticascambiarias/v1.0")
+
+# Series de tasas BCRA: endpoint y archivo de caché
+SERIES_BCRA = {
+    'TPM': {'endpoint': '/datos/tpm', 'cache': 'bcra_tpm.csv'},
+    'BADLAR': {'endpoint': '/datos/badlar', 'cache': 'bcra_badlar.csv'},
+    'PF_USD': {'endpoint': '/datos/tasasPasivas', 'cache': 'bcra_pf_usd.csv'}
+}
+
+DATOS_GOB_BASE_URL = os.environ.get('MONITOR_AR_DATOS_GOB_URL', "https://apis.datos.gob.ar/series/api")
+EMAE_ID = '143.3_NO_PR_2004_A_21'
+EMAE_CACHE = 'emae.csv'
+
+def archivo_serie_datos_gob(serie_id):
+    """Archivo de caché de una serie de datos.gob agregada desde el catálogo."""
+    return 'datosgob_' + re.sub(r'[^\w.-]', '_', serie_id) + '.csv'
+
+def series_registradas():
+    """
+    Nombres de todas las series que el data layer sabe cachear: las fijas más
+    las agregadas por los usuarios desde el catálogo (por id de datos.gob).
+    """
+    from .catalogo import series_usuario
+    return list(SERIES_BCRA) + ['EMAE'] + [s['id'] for s in series_usuario()]
+
+def archivo_serie(nombre):
+    """Archivo de caché de una serie registrada."""
+    if nombre == 'EMAE':
+        return EMAE_CACHE
+    if nombre in SERIES_BCRA:
+        return SERIES_BCRA[nombre]['cache']
+    return archivo_serie_datos_gob(nombre)
+
+def version_serie(nombre):
+    """
+    Versión de contenido de una serie cacheada ('TPM', 'BADLAR', 'PF_USD', 'EMAE'
+    o el id de una serie agregada desde el catálogo).
+    Avanza solo cuando se escriben observaciones nuevas; 0 si no hay caché.
+    """
+    return obtener_gestor(CACHE_DIR).version(archivo_serie(nombre))
+
+def hash_serie(nombre):
+    """
+    Hash del contenido cacheado de una serie (None si no hay caché). A
+    diferencia de la versión, no cambia si los mismos datos se vuelven a
+    escribir (ej. tras desalojarla y descargarla de nuevo).
+    """
+    return obtener_gestor(CACHE_DIR).hash_contenido(archivo_serie(nombre))
+
+def leer_serie_cache(nombre, al=None):
+    """
+    Lee una serie registrada (ver series_registradas) desde caché, normalizada.
+    `al` (fecha o epoch, UTC) devuelve la serie tal como se conocía en ese
+    momento, deshaciendo las revisiones posteriores.
+    Retorna DataFrame con columnas fecha, valor, o None si no hay caché.
+    """
+    if al is not None:
+        from .revisiones import obtener_historial
+        df = obtener_historial(archivo_serie(nombre), CACHE_DIR).al(al)
+    else:
+        df = leer_cache_csv(archivo_serie(nombre))
+    if df is None or df.empty or 'fecha' not in df.columns or 'valor' not in df.columns:
+        return None
+    import pandas as pd
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+    return df.dropna().sort_values('fecha')
+
+def obtener_tasa_bcra(nombre, sesion=None):
+    """
+    Obtiene una serie de tasas del BCRA v3 con fallback a caché.
+    Retorna dict: {'data': DataFrame, 'desde_cache': bool}
+    DataFrame tiene columnas: fecha, valor
+    """
+    import pandas as pd
+    from .streaming import leer_json_streaming
+
+    config = SERIES_BCRA[nombre]
+    if sesion is None:
+        sesion = crear_sesion_con_reintentos()
     
-    sesion = crear_sesion_con_reintentos()
-    resultado = {}
+    url = BCRA_BASE_URL + config['endpoint']
+    df = None
+    desde_cache = False
+    medicion = MedicionConsulta(f'BCRA/{nombre}')
     
-    for nombre, config in series.items():
-        url = base_url + config['endpoint']
-        df = None
-        desde_cache = False
+    try:
+        print(f"🔄 Consultando BCRA: {nombre}...")
+        respuesta = medicion.respuesta = sesion.get(url, timeout=10, verify=False, stream=True)
+        respuesta.raise_for_status()
         
-        try:
-            print(f"🔄 Consultando BCRA: {nombre}...")
-            respuesta = sesion.get(url, timeout=10, verify=False)
-            respuesta.raise_for_status()
-            
-            data = respuesta.json()
-            
-            if 'results' in data and data['results']:
-                registros = data['results']
-                df = pd.DataFrame(registros)
-                
-                # Normalizar columnas
-                if 'fecha' in df.columns and 'valor' in df.columns:
-                    df = df[['fecha', 'valor']].copy()
-                    df['fecha'] = pd.to_datetime(df['fecha'])
-                    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                    df = df.dropna()
-                    df = df.sort_values('fecha')
-                    
-                    # Guardar en caché
-                    escribir_cache_csv(df, config['cache'])
-                    print(f"✅ {nombre}: {len(df)} registros obtenidos")
-                else:
-                    raise ValueError(f"Estructura inesperada en respuesta de {nombre}")
-            else:
-                raise ValueError(f"Sin resultados en API para {nombre}")
-                
-        except Exception as e:
-            print(f"❌ Error obteniendo {nombre} desde API: {e}")
-            print(f"🔄 Intentando leer desde caché...")
-            df = leer_cache_csv(config['cache'])
+        # Parseo incremental: solo fecha/valor de cada registro de 'results'
+        df = leer_json_streaming(respuesta, 'results')
+        medicion.detener()
+        
+        if df is not None and not df.empty:
+            # Guardar en caché
+            escribir_serie_cache(df, config['cache'], fuente='BCRA')
+            print(f"✅ {nombre}: {len(df)} registros obtenidos")
+        else:
+            raise ValueError(f"Sin resultados en API para {nombre}")
             
-            if df is not None and not df.empty:
-                # Normalizar caché
-                if 'fecha' in df.columns and 'valor' in df.columns:
-                    df['fecha'] = pd.to_datetime(df['fecha'])
-                    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                    df = df.dropna()
-                    desde_cache = True
-                    print(f"✅ {nombre}: {len(df)} registros desde caché")
-                else:
-                    df = None
+    except Exception as e:
+        medicion.fallo(e)
+        print(f"❌ Error obteniendo {nombre} desde API: {e}")
+        print(f"🔄 Intentando leer desde caché...")
+        df = leer_cache_csv(config['cache'])
         
-        resultado[nombre] = {
-            'data': df,
-            'desde_cache': desde_cache
-        }
+        if df is not None and not df.empty:
+            # Normalizar caché
+            if 'fecha' in df.columns and 'valor' in df.columns:
+                df['fecha'] = pd.to_datetime(df['fecha'])
+                df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+                df = df.dropna()
+                desde_cache = True
+                print(f"✅ {nombre}: {len(df)} registros desde caché")
+            else:
+                df = None
     
-    return resultado
+    medicion.registrar(desde_cache=desde_cache)
+    return {
+        'data': df,
+        'desde_cache': desde_cache
+    }
+
+def obtener_tasas_bcra():
+    """
+    Obtiene tasas del BCRA v3 con fallback a caché.
+    Retorna dict con 3 DataFrames: {'TPM': df, 'BADLAR': df, 'PF_USD': df}
+    Cada DataFrame tiene columnas: fecha, valor
+    También retorna flag 'desde_cache' para cada serie.
+    """
+    sesion = crear_sesion_con_reintentos()
+    # Consultas en paralelo: el limitador del host regula la concurrencia efectiva
+    with ThreadPoolExecutor(max_workers=len(SERIES_BCRA)) as pool:
+        futuros = {nombre: pool.submit(obtener_tasa_bcra, nombre, sesion) for nombre in SERIES_BCRA}
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
 
 def obtener_emae():
     """
@@ -128,40 +241,45 @@ def obtener_emae():
     Retorna dict: {'data': DataFrame, 'desde_cache': bool}
     DataFrame tiene columnas: fecha, valor
     """
-    url = "https://apis.datos.gob.ar/series/api/series/?ids=143.3_NO_PR_2004_A_21&limit=5000&format=csv"
-    cache_nombre = 'emae.csv'
+    return obtener_serie_datos_gob(EMAE_ID, nombre='EMAE')
+
+def obtener_serie_datos_gob(serie_id, nombre=None, sesion=None):
+    """
+    Obtiene cualquier serie de la API de series de datos.gob.ar por id, con
+    fallback a caché. `nombre` es la serie registrada (por defecto, el id).
+    Retorna dict: {'data': DataFrame, 'desde_cache': bool}
+    """
+    import pandas as pd
+    from .streaming import leer_csv_streaming
+
+    nombre = nombre or serie_id
+    url = f"{DATOS_GOB_BASE_URL}/series/?ids={serie_id}&limit=5000&format=csv"
+    cache_nombre = archivo_serie(nombre)
     
     df = None
     desde_cache = False
-    sesion = crear_sesion_con_reintentos()
+    if sesion is None:
+        sesion = crear_sesion_con_reintentos()
+    medicion = MedicionConsulta(f'datos.gob/{nombre}')
     
     try:
-        print(f"🔄 Consultando EMAE desde datos.gob.ar...")
-        respuesta = sesion.get(url, timeout=15)
+        print(f"🔄 Consultando {nombre} desde datos.gob.ar...")
+        respuesta = medicion.respuesta = sesion.get(url, timeout=15, stream=True)
         respuesta.raise_for_status()
         
-        from io import StringIO
-        df = pd.read_csv(StringIO(respuesta.text))
+        # Parseo incremental del CSV (formato datos.gob: indice_tiempo + id de serie)
+        df = leer_csv_streaming(respuesta, 'indice_tiempo', serie_id)
+        medicion.detener()
         
-        # Normalizar columnas (el CSV de datos.gob tiene formato específico)
-        if 'indice_tiempo' in df.columns and '143.3_NO_PR_2004_A_21' in df.columns:
-            df = df.rename(columns={
-                'indice_tiempo': 'fecha',
-                '143.3_NO_PR_2004_A_21': 'valor'
-            })
-            df = df[['fecha', 'valor']].copy()
-            df['fecha'] = pd.to_datetime(df['fecha'])
-            df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-            df = df.dropna()
-            df = df.sort_values('fecha')
-            
-            escribir_cache_csv(df, cache_nombre)
-            print(f"✅ EMAE: {len(df)} registros obtenidos")
+        if df is not None and not df.empty:
+            escribir_serie_cache(df, cache_nombre, fuente='datos.gob.ar')
+            print(f"✅ {nombre}: {len(df)} registros obtenidos")
         else:
-            raise ValueError("Estructura inesperada en respuesta de EMAE")
+            raise ValueError(f"Sin resultados en API para {nombre}")
             
     except Exception as e:
-        print(f"❌ Error obteniendo EMAE desde API: {e}")
+        medicion.fallo(e)
+        print(f"❌ Error obteniendo {nombre} desde API: {e}")
         print(f"🔄 Intentando leer desde caché...")
         df = leer_cache_csv(cache_nombre)
         
@@ -172,11 +290,26 @@ def obtener_emae():
                 df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
                 df = df.dropna()
                 desde_cache = True
-                print(f"✅ EMAE: {len(df)} registros desde caché")
+                print(f"✅ {nombre}: {len(df)} registros desde caché")
             else:
                 df = None
     
+    medicion.registrar(desde_cache=desde_cache)
     return {
         'data': df,
         'desde_cache': desde_cache
     }
+
+def obtener_series_usuario():
+    """
+    Obtiene en paralelo las series agregadas desde el catálogo.
+    Retorna dict {serie_id: {'data': DataFrame, 'desde_cache': bool}}
+    """
+    from .catalogo import series_usuario
+    ids = [s['id'] for s in series_usuario()]
+    if not ids:
+        return {}
+    sesion = crear_sesion_con_reintentos()
+    with ThreadPoolExecutor(max_workers=min(len(ids), 4)) as pool:
+        futuros = {serie_id: pool.submit(obtener_serie_datos_gob, serie_id, None, sesion) for serie_id in ids}
+        return {serie_id: futuro.result() for serie_id, futuro in futuros.items()}
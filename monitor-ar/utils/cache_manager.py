@@ -0,0 +1,474 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusión dentro del proceso
+    fcntl = None
+
+# Configuración del presupuesto de caché (sobreescribible por entorno)
+CACHE_MAX_BYTES = int(float(os.environ.get('MONITOR_AR_CACHE_MAX_MB', '50')) * 1024 * 1024)
+CACHE_TTL_SEGUNDOS = int(float(os.environ.get('MONITOR_AR_CACHE_TTL_DIAS', '30')) * 86400)
+
+# Series que usan los dashboards (y el snapshot de arranque): nunca se desalojan
+SERIES_FIJADAS = {
+    'bcra_tpm.csv',
+    'bcra_badlar.csv',
+    'bcra_pf_usd.csv',
+    'emae.csv',
+    'snapshot_app.bin',
+}
+
+# Carpetas internas con resultados derivados, que se regeneran a pedido
+# (trabajos de analítica, ZIPs de exportación): ante falta de espacio se
+# podan, de los más viejos, antes de desalojar series
+DERIVADOS = ('_trabajos', '_exportaciones')
+
+INDICE_NOMBRE = '_indice.json'
+BLOQUEO_NOMBRE = '_indice.lock'
+
+# Las lecturas no reescriben el índice cada vez: los accesos se acumulan en
+# memoria y se vuelcan como mucho cada este intervalo (o antes de desalojar)
+INTERVALO_ACCESOS = float(os.environ.get('MONITOR_AR_CACHE_INTERVALO_ACCESOS', '60'))
+
+
+class GestorCache:
+    """
+    Lleva un índice de las entradas del directorio de caché.
+    Por cada archivo registra tamaño, último acceso, fuente y una versión
+    monótona que solo avanza cuando cambia el contenido, y aplica el
+    presupuesto en disco con desalojo TTL + LRU.
+
+    Cada lectura-modificación-escritura del índice se hace bajo un flock sobre
+    _indice.lock, así varios procesos (workers, CLI) no pisan sus cambios.
+
+    El presupuesto cubre todo el directorio: además de las entradas cuenta
+    lo interno (prefijo '_': historia de revisiones, catálogo, resultados de
+    trabajos, exportaciones, salud de fuentes).
+    """
+
+    def __init__(self, directorio, max_bytes=CACHE_MAX_BYTES, ttl_segundos=CACHE_TTL_SEGUNDOS,
+                 fijadas=SERIES_FIJADAS, intervalo_accesos=INTERVALO_ACCESOS):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.fijadas = set(fijadas)
+        self.intervalo_accesos = intervalo_accesos
+        self._lock = threading.RLock()
+        self._cerrojo = None
+        self._indice = None
+        self._indice_firma = None
+        self._contador = 0
+        self._accesos = {}
+        self._ultimo_volcado = 0.0
+
+    # ─── Índice ────────────────────────────────────────────────────────────
+
+    @property
+    def ruta_indice(self):
+        return os.path.join(self.directorio, INDICE_NOMBRE)
+
+    def _firma_indice(self):
+        # El índice se publica con os.replace: cada escritura cambia el inodo,
+        # así que la firma detecta cambios aunque el mtime tenga poca resolución
+        try:
+            stat = os.stat(self.ruta_indice)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @contextmanager
+    def _bloqueo(self):
+        """Exclusión entre hilos y entre procesos para modificar el índice (reentrante)."""
+        with self._lock:
+            if self._cerrojo is not None:
+                yield
+                return
+            os.makedirs(self.directorio, exist_ok=True)
+            with open(os.path.join(self.directorio, BLOQUEO_NOMBRE), 'a') as cerrojo:
+                if fcntl is not None:
+                    fcntl.flock(cerrojo.fileno(), fcntl.LOCK_EX)
+                self._cerrojo = cerrojo
+                try:
+                    yield
+                finally:
+                    self._cerrojo = None
+
+    def _cargar(self):
+        # Recarga solo si otro proceso reescribió el índice (un stat por llamada)
+        firma = self._firma_indice()
+        if self._indice is not None and firma == self._indice_firma:
+            return self._indice
+        self._indice = {}
+        self._contador = None
+        if firma is not None:
+            try:
+                with open(self.ruta_indice, encoding='utf-8') as f:
+                    datos = json.load(f)
+                if 'entradas' in datos:
+                    self._indice, self._contador = datos['entradas'], datos['contador']
+                else:  # formato previo: solo las entradas
+                    self._indice = datos
+            except Exception as e:
+                print(f"⚠️ Índice de caché corrupto, se reconstruye: {e}")
+                self._indice = {}
+        if self._contador is None:
+            # Índice nuevo, perdido o de formato previo: el contador arranca del reloj
+            # (µs) para que ninguna versión nueva repita una ya servida
+            versiones = [info.get('version', 0) for info in self._indice.values()]
+            self._contador = max([int(time.time() * 1_000_000)] + versiones)
+        self._indice_firma = firma
+        return self._indice
+
+    def _nueva_version(self):
+        """
+        Próximo valor del contador global de versiones. Es único en todo el
+        directorio y sobrevive a desalojos: una serie desalojada y vuelta a
+        descargar nunca repite una versión que ya usaron los cachés de las páginas.
+        """
+        self._contador += 1
+        return self._contador
+
+    def _guardar(self):
+        # Siempre bajo _bloqueo(): el temporal fijo no lo comparten dos escritores
+        temporal = self.ruta_indice + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'contador': self._contador, 'entradas': self._indice}, f, indent=1, sort_keys=True)
+        os.replace(temporal, self.ruta_indice)
+        self._indice_firma = self._firma_indice()
+
+    def _aplicar_accesos(self, indice):
+        """Pasa al índice los accesos acumulados en memoria. Retorna True si cambió algo."""
+        cambio = False
+        for nombre, ts in self._accesos.items():
+            info = indice.get(nombre)
+            if info is not None and ts > info.get('ultimo_acceso', 0):
+                info['ultimo_acceso'] = ts
+                cambio = True
+        self._accesos.clear()
+        self._ultimo_volcado = time.monotonic()
+        return cambio
+
+    def sincronizar(self):
+        """Alinea el índice con los archivos presentes en disco."""
+        with self._bloqueo():
+            indice = self._cargar()
+            self._aplicar_accesos(indice)
+            en_disco = set()
+            if os.path.isdir(self.directorio):
+                for nombre in os.listdir(self.directorio):
+                    ruta = os.path.join(self.directorio, nombre)
+                    # Los archivos internos (prefijo '_': índice, estado de alertas) no son entradas
+                    if nombre.startswith('_') or nombre.endswith('.tmp') or not os.path.isfile(ruta):
+                        continue
+                    en_disco.add(nombre)
+                    if nombre not in indice:
+                        stat = os.stat(ruta)
+                        indice[nombre] = {
+                            'bytes': stat.st_size,
+                            'creado': stat.st_mtime,
+                            'ultimo_acceso': stat.st_mtime,
+                            'fuente': 'desconocida',
+                            'hash': _hash_archivo(ruta),
+                            'version': self._nueva_version(),
+                        }
+            for nombre in list(indice):
+                if nombre not in en_disco:
+                    del indice[nombre]
+            self._guardar()
+            return indice
+
+    def entradas(self):
+        """Copia del índice: {archivo: {bytes, creado, ultimo_acceso, fuente, hash, version}}."""
+        with self._lock:
+            entradas = {nombre: dict(info) for nombre, info in self._cargar().items()}
+            for nombre, ts in self._accesos.items():
+                if nombre in entradas:
+                    entradas[nombre]['ultimo_acceso'] = max(entradas[nombre].get('ultimo_acceso', 0), ts)
+            return entradas
+
+    def version(self, nombre_archivo):
+        """
+        Versión de contenido de la entrada (0 si no existe). Solo avanza cuando
+        una escritura cambia los datos, así que sirve como sondeo barato; sale
+        de un contador global, así que nunca se repite aunque la entrada se desaloje.
+        """
+        with self._lock:
+            info = self._cargar().get(nombre_archivo)
+            return info.get('version', 0) if info else 0
+
+    def fijadas_actuales(self):
+        """
+        Fijadas por configuración más las series que los usuarios agregaron
+        desde el catálogo: el dashboard las lee en cada render, así que no se
+        desalojan mientras sigan en _series_usuario.json.
+        """
+        from .api_helpers import archivo_serie_datos_gob
+        from .catalogo import series_usuario
+        return self.fijadas | {archivo_serie_datos_gob(s['id']) for s in series_usuario(self.directorio)}
+
+    def hash_contenido(self, nombre_archivo):
+        """Hash SHA-1 del contenido registrado para la entrada (None si no existe)."""
+        with self._lock:
+            info = self._cargar().get(nombre_archivo)
+            return info.get('hash') if info else None
+
+    def total_bytes(self):
+        """Bytes de las entradas más lo interno: lo que se compara contra el presupuesto."""
+        with self._lock:
+            return sum(info.get('bytes', 0) for info in self._cargar().values()) + self.bytes_internos()
+
+    def bytes_internos(self):
+        """Bytes de lo que no es entrada: archivos y carpetas con prefijo '_' y temporales."""
+        total = 0
+        try:
+            elementos = list(os.scandir(self.directorio))
+        except OSError:
+            return 0
+        for elemento in elementos:
+            if elemento.name.startswith('_') or elemento.name.endswith('.tmp'):
+                total += _bytes_ruta(elemento.path)
+        return total
+
+    # ─── Registro de uso ───────────────────────────────────────────────────
+
+    def registrar_acceso(self, nombre_archivo):
+        """
+        Marca una lectura de la entrada (alimenta el orden LRU). Se acumula en
+        memoria y se vuelca al índice cada `intervalo_accesos` segundos.
+        """
+        with self._lock:
+            self._accesos[nombre_archivo] = time.time()
+            if time.monotonic() - self._ultimo_volcado < self.intervalo_accesos:
+                return
+        self.volcar_accesos()
+
+    def volcar_accesos(self):
+        """Escribe en el índice los accesos pendientes."""
+        with self._lock:
+            if not self._accesos:
+                return
+            with self._bloqueo():
+                if self._aplicar_accesos(self._cargar()):
+                    self._guardar()
+
+    def registrar_escritura(self, nombre_archivo, fuente=None, hash_contenido=None):
+        """
+        Registra una escritura en caché y aplica el presupuesto.
+        La versión de la entrada avanza solo si el contenido cambió.
+        `hash_contenido` evita releer el archivo cuando quien escribe ya lo calculó
+        (las series con historia de revisiones usan el resumen de sus ventanas).
+        """
+        ruta = os.path.join(self.directorio, nombre_archivo)
+        if not os.path.exists(ruta):
+            return
+        with self._bloqueo():
+            indice = self._cargar()
+            self._aplicar_accesos(indice)
+            ahora = time.time()
+            info = indice.setdefault(nombre_archivo, {
+                'creado': ahora,
+                'fuente': 'desconocida',
+                'version': 0,
+            })
+            contenido = hash_contenido or _hash_archivo(ruta)
+            if contenido != info.get('hash'):
+                info['hash'] = contenido
+                info['version'] = self._nueva_version()
+            info['bytes'] = os.path.getsize(ruta)
+            info['ultimo_acceso'] = ahora
+            if fuente:
+                info['fuente'] = fuente
+            self._guardar()
+        # Las fusiones agregan deltas al log de revisiones: se colapsa al pasar MAX_VINTAGES
+        self.compactar(nombre_archivo)
+        self.aplicar_politica()
+
+    # ─── Compactación ──────────────────────────────────────────────────────
+
+    def compactar(self, nombre_archivo, max_vintages=None):
+        """
+        Colapsa la historia de revisiones de la entrada a sus últimos
+        `max_vintages` vintages (ver HistorialRevisiones.compactar); el CSV
+        vigente no cambia y la versión no avanza. Retorna bytes liberados.
+        """
+        from .revisiones import MAX_VINTAGES, HistorialRevisiones
+        historial = HistorialRevisiones(self.directorio, nombre_archivo)
+        return historial.compactar(MAX_VINTAGES if max_vintages is None else max_vintages)
+
+    def compactar_pendientes(self, max_vintages=None):
+        """Compacta la historia de todas las entradas que superan `max_vintages`."""
+        liberados = 0
+        for nombre in self.entradas():
+            try:
+                liberados += self.compactar(nombre, max_vintages)
+            except Exception as e:
+                print(f"⚠️ Error compactando {nombre}: {e}")
+        return liberados
+
+    # ─── Desalojo ──────────────────────────────────────────────────────────
+
+    def _eliminar(self, nombre_archivo):
+        ruta = os.path.join(self.directorio, nombre_archivo)
+        try:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        except OSError as e:
+            print(f"⚠️ No se pudo eliminar {nombre_archivo} de caché: {e}")
+            return False
+        from .revisiones import eliminar_historial
+        eliminar_historial(self.directorio, nombre_archivo)
+        self._cargar().pop(nombre_archivo, None)
+        return True
+
+    def aplicar_politica(self, ahora=None):
+        """
+        Aplica TTL y presupuesto en disco. Las series fijadas (incluidas las
+        agregadas desde el catálogo) nunca se desalojan.
+        Retorna la lista de archivos eliminados.
+        """
+        ahora = time.time() if ahora is None else ahora
+        eliminados = []
+        fijadas = self.fijadas_actuales()
+        with self._bloqueo():
+            indice = self._cargar()
+            # El LRU necesita los accesos recientes aunque todavía no se hayan volcado
+            volcados = self._aplicar_accesos(indice)
+
+            # 1) TTL: entradas sin acceso reciente
+            if self.ttl_segundos > 0:
+                for nombre, info in list(indice.items()):
+                    if nombre in fijadas:
+                        continue
+                    if ahora - info.get('ultimo_acceso', 0) > self.ttl_segundos:
+                        if self._eliminar(nombre):
+                            eliminados.append(nombre)
+
+            # 2) Presupuesto sobre todo el directorio: primero se compactan las
+            #    historias y se podan los derivados, después LRU de entradas
+            #    (cada una se lleva su historia)
+            total = sum(info.get('bytes', 0) for info in indice.values()) + self.bytes_internos()
+            if self.max_bytes > 0 and total > self.max_bytes:
+                total -= self.compactar_pendientes()
+            if self.max_bytes > 0 and total > self.max_bytes:
+                total -= self._podar_derivados(total - self.max_bytes)
+            if self.max_bytes > 0 and total > self.max_bytes:
+                from .revisiones import HistorialRevisiones
+                candidatos = sorted(
+                    (n for n in indice if n not in fijadas),
+                    key=lambda n: indice[n].get('ultimo_acceso', 0)
+                )
+                for nombre in candidatos:
+                    if total <= self.max_bytes:
+                        break
+                    tamanio = indice[nombre].get('bytes', 0)
+                    tamanio += HistorialRevisiones(self.directorio, nombre).bytes_en_disco()
+                    if self._eliminar(nombre):
+                        total -= tamanio
+                        eliminados.append(nombre)
+                if total > self.max_bytes:
+                    print(f"⚠️ Caché sobre presupuesto ({total} bytes) solo con series fijadas")
+
+            if eliminados or volcados:
+                self._guardar()
+            if eliminados:
+                print(f"🧹 Caché: {len(eliminados)} entradas desalojadas")
+        return eliminados
+
+
+    def _podar_derivados(self, exceso):
+        """Borra resultados derivados, de los más viejos, hasta liberar `exceso` bytes. Retorna bytes liberados."""
+        archivos = []
+        for carpeta in DERIVADOS:
+            try:
+                archivos.extend(e for e in os.scandir(os.path.join(self.directorio, carpeta))
+                                if e.is_file() and not e.name.endswith('.tmp'))
+            except OSError:
+                continue
+        liberados = 0
+        for entrada in sorted(archivos, key=lambda e: e.stat().st_mtime):
+            if liberados >= exceso:
+                break
+            try:
+                tamanio = entrada.stat().st_size
+                os.remove(entrada.path)
+                liberados += tamanio
+            except OSError:
+                pass
+        if liberados:
+            print(f"🧹 Caché: {liberados} bytes de resultados derivados podados")
+        return liberados
+
+
+def _bytes_ruta(ruta):
+    """Tamaño de un archivo, o la suma de los archivos de una carpeta (recursivo)."""
+    if not os.path.isdir(ruta):
+        try:
+            return os.path.getsize(ruta)
+        except OSError:
+            return 0
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        for archivo in archivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, archivo))
+            except OSError:
+                pass
+    return total
+
+
+def _hash_archivo(ruta):
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 16), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+_gestores = {}
+_gestores_lock = threading.Lock()
+
+
+def obtener_gestor(directorio=None):
+    """Gestor compartido para un directorio de caché (por defecto CACHE_DIR)."""
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    clave = os.path.abspath(directorio)
+    with _gestores_lock:
+        if clave not in _gestores:
+            gestor = GestorCache(directorio)
+            if os.path.isdir(directorio):
+                gestor.sincronizar()
+            # Los accesos pendientes no se pierden al salir del proceso
+            atexit.register(gestor.volcar_accesos)
+            _gestores[clave] = gestor
+        return _gestores[clave]
+
+
+def main():
+    """Resumen del estado de la caché, compactación y aplicación del presupuesto."""
+    gestor = obtener_gestor()
+    gestor.sincronizar()
+    liberados = gestor.compactar_pendientes()
+    eliminados = gestor.aplicar_politica()
+
+    fijadas = gestor.fijadas_actuales()
+    print(f"📦 Caché: {gestor.directorio}")
+    for nombre, info in sorted(gestor.entradas().items()):
+        marca = '📌' if nombre in fijadas else '  '
+        acceso = time.strftime('%Y-%m-%d %H:%M', time.localtime(info.get('ultimo_acceso', 0)))
+        print(f"   {marca} {nombre:<30} {info.get('bytes', 0):>10} B  {acceso}  {info.get('fuente')}")
+    print(f"   Total: {gestor.total_bytes()} / {gestor.max_bytes} bytes")
+    print(f"   Compactación: {liberados} bytes liberados | Desalojadas: {len(eliminados)}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
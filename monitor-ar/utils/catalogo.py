@@ -0,0 +1,371 @@
+import os
+import re
+import csv
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusión dentro del proceso
+    fcntl = None
+
+# Índice local del catálogo de series de datos.gob.ar (SQLite + FTS5) y
+# registro de las series que los usuarios agregan al dashboard.
+CATALOGO_NOMBRE = '_catalogo.sqlite'
+SERIES_USUARIO_NOMBRE = '_series_usuario.json'
+
+# Dump de metadatos de todas las series (sobreescribible por entorno)
+CATALOGO_URL = os.environ.get('MONITOR_AR_CATALOGO_URL')
+CATALOGO_DUMP = '/dump/series-tiempo-metadatos.csv'
+
+# Frecuencias del catálogo (ISO 8601 repetido) -> etiqueta
+FRECUENCIAS_CATALOGO = {
+    'R/P1D': 'diaria',
+    'R/P1W': 'semanal',
+    'R/P1M': 'mensual',
+    'R/P3M': 'trimestral',
+    'R/P6M': 'semestral',
+    'R/P1Y': 'anual',
+}
+
+# Columnas del dump -> columnas del índice
+COLUMNAS_DUMP = {
+    'serie_id': 'serie_id',
+    'serie_titulo': 'titulo',
+    'serie_descripcion': 'descripcion',
+    'serie_unidades': 'unidades',
+    'indice_tiempo_frecuencia': 'frecuencia',
+    'dataset_fuente': 'fuente',
+    'dataset_titulo': 'dataset',
+    'dataset_tema': 'tema',
+    'serie_indice_inicio': 'inicio',
+    'serie_indice_final': 'fin',
+    'serie_discontinuada': 'discontinuada',
+}
+COLUMNAS = list(COLUMNAS_DUMP.values())
+
+FILAS_POR_LOTE = 5000
+
+
+def _ruta_en_cache(nombre, directorio=None):
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    return os.path.join(directorio, nombre)
+
+
+def _url_dump():
+    if CATALOGO_URL:
+        return CATALOGO_URL
+    from .api_helpers import DATOS_GOB_BASE_URL
+    return DATOS_GOB_BASE_URL + CATALOGO_DUMP
+
+
+# ─── Construcción del índice ───────────────────────────────────────────────
+
+def _filas_dump(lineas):
+    """Filas normalizadas (tuplas en orden COLUMNAS) a partir de las líneas del CSV."""
+    for registro in csv.DictReader(lineas):
+        serie_id = (registro.get('serie_id') or '').strip()
+        if not serie_id:
+            continue
+        fila = {destino: (registro.get(origen) or '').strip() for origen, destino in COLUMNAS_DUMP.items()}
+        fila['frecuencia'] = FRECUENCIAS_CATALOGO.get(fila['frecuencia'], fila['frecuencia'])
+        fila['discontinuada'] = 1 if fila['discontinuada'].lower() in ('true', '1') else 0
+        yield tuple(fila[c] for c in COLUMNAS)
+
+
+def _crear_esquema(conexion):
+    conexion.executescript("""
+        CREATE TABLE series (
+            serie_id TEXT PRIMARY KEY, titulo TEXT, descripcion TEXT, unidades TEXT,
+            frecuencia TEXT, fuente TEXT, dataset TEXT, tema TEXT,
+            inicio TEXT, fin TEXT, discontinuada INTEGER
+        );
+        CREATE INDEX series_frecuencia ON series(frecuencia);
+        CREATE INDEX series_fuente ON series(fuente);
+        CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT);
+    """)
+    try:
+        conexion.execute("""
+            CREATE VIRTUAL TABLE series_fts USING fts5(
+                titulo, descripcion, dataset, fuente, tema,
+                content='series', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        return True
+    except sqlite3.OperationalError:
+        print("⚠️ SQLite sin FTS5: la búsqueda usará LIKE (más lenta)")
+        return False
+
+
+def construir_indice(lineas=None, directorio=None):
+    """
+    Construye el índice del catálogo a partir de las líneas del dump CSV de
+    metadatos (iterable de str). Sin `lineas`, descarga el dump en streaming.
+    El índice se arma en un archivo temporal y reemplaza al anterior de forma
+    atómica, así las búsquedas en curso nunca ven un índice a medio armar.
+    Retorna la cantidad de series indexadas.
+    """
+    respuesta = None
+    if lineas is None:
+        from .api_helpers import crear_sesion_con_reintentos
+        url = _url_dump()
+        print(f"🔄 Descargando catálogo de series: {url}")
+        respuesta = crear_sesion_con_reintentos().get(url, timeout=120, stream=True)
+        respuesta.raise_for_status()
+        respuesta.encoding = respuesta.encoding or 'utf-8'
+        lineas = respuesta.iter_lines(decode_unicode=True)
+
+    ruta = _ruta_en_cache(CATALOGO_NOMBRE, directorio)
+    directorio_indice = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio_indice, exist_ok=True)
+    # Temporal único por constructor: dos procesos reindexando a la vez no se pisan
+    fd, temporal = tempfile.mkstemp(dir=directorio_indice, prefix=os.path.basename(ruta) + '.', suffix='.tmp')
+    os.close(fd)
+
+    try:
+        total = _llenar_indice(temporal, lineas)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    finally:
+        if respuesta is not None:
+            respuesta.close()
+
+    print(f"✅ Catálogo indexado: {total} series")
+    return total
+
+
+def _llenar_indice(ruta, lineas):
+    conexion = sqlite3.connect(ruta)
+    try:
+        con_fts = _crear_esquema(conexion)
+        filas = _filas_dump(lineas)
+        total = 0
+        while True:
+            lote = [fila for _, fila in zip(range(FILAS_POR_LOTE), filas)]
+            if not lote:
+                break
+            conexion.executemany(
+                f"INSERT OR REPLACE INTO series ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+                lote
+            )
+            total += len(lote)
+        if con_fts:
+            conexion.execute("INSERT INTO series_fts(series_fts) VALUES ('rebuild')")
+        conexion.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('construido', str(time.time())),
+            ('fts', '1' if con_fts else '0'),
+        ])
+        conexion.commit()
+    finally:
+        conexion.close()
+    return total
+
+
+def construir_indice_desde_archivo(ruta_dump, directorio=None):
+    """Construye el índice desde un dump CSV ya descargado."""
+    with open(ruta_dump, encoding='utf-8', newline='') as f:
+        return construir_indice(f, directorio)
+
+
+# ─── Búsqueda ──────────────────────────────────────────────────────────────
+
+@contextmanager
+def _conexion(directorio=None):
+    """
+    Conexión de solo lectura al índice para una consulta: (conexión, con_fts),
+    o None si el índice no existe. Se cierra al salir del bloque: abrirla
+    cuesta menos que una búsqueda y no quedan conexiones ni descriptores
+    colgados de hilos de script que ya terminaron.
+    """
+    ruta = _ruta_en_cache(CATALOGO_NOMBRE, directorio)
+    if not os.path.exists(ruta):
+        yield None
+        return
+    conexion = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+    try:
+        conexion.row_factory = sqlite3.Row
+        con_fts = conexion.execute("SELECT valor FROM meta WHERE clave = 'fts'").fetchone()
+        yield conexion, bool(con_fts and con_fts[0] == '1')
+    finally:
+        conexion.close()
+
+
+def indice_disponible(directorio=None):
+    return os.path.exists(_ruta_en_cache(CATALOGO_NOMBRE, directorio))
+
+
+def _consulta_fts(texto):
+    """Cada palabra como prefijo, todas requeridas: 'emae desest' -> "emae"* AND "desest"*."""
+    palabras = re.findall(r'\w+', texto.lower())
+    return ' AND '.join(f'"{p}"*' for p in palabras)
+
+
+def buscar(texto='', frecuencia=None, fuente=None, limite=25, directorio=None):
+    """
+    Busca series por texto libre (título, descripción, dataset, fuente, tema),
+    con filtros exactos opcionales de frecuencia y fuente. Con texto, los
+    resultados vienen ordenados por relevancia (bm25).
+    Retorna lista de dicts con las columnas del índice.
+    """
+    condiciones, parametros = [], []
+    if frecuencia:
+        condiciones.append('s.frecuencia = ?')
+        parametros.append(frecuencia)
+    if fuente:
+        condiciones.append('s.fuente = ?')
+        parametros.append(fuente)
+
+    consulta = _consulta_fts(texto)
+    with _conexion(directorio) as abierta:
+        if abierta is None:
+            return []
+        conexion, con_fts = abierta
+        if consulta and con_fts:
+            sql = ("SELECT s.* FROM series_fts JOIN series s ON s.rowid = series_fts.rowid "
+                   "WHERE series_fts MATCH ?")
+            parametros.insert(0, consulta)
+            orden = " ORDER BY bm25(series_fts, 10.0, 1.0, 3.0, 2.0, 2.0)"
+        else:
+            sql = "SELECT s.* FROM series s WHERE 1 = 1"
+            for palabra in re.findall(r'\w+', texto.lower()):
+                sql += " AND (s.titulo LIKE ? OR s.descripcion LIKE ? OR s.serie_id LIKE ?)"
+                parametros.extend([f'%{palabra}%'] * 3)
+            orden = " ORDER BY s.discontinuada, s.titulo"
+
+        for condicion in condiciones:
+            sql += f" AND {condicion}"
+        sql += orden + " LIMIT ?"
+        parametros.append(limite)
+        return [dict(fila) for fila in conexion.execute(sql, parametros)]
+
+
+def obtener_metadatos(serie_id, directorio=None):
+    """Metadatos de una serie del catálogo (None si no está indexada)."""
+    with _conexion(directorio) as abierta:
+        if abierta is None:
+            return None
+        fila = abierta[0].execute("SELECT * FROM series WHERE serie_id = ?", (serie_id,)).fetchone()
+        return dict(fila) if fila else None
+
+
+def valores_filtro(columna, directorio=None):
+    """Valores distintos de 'frecuencia' o 'fuente', para los filtros de la búsqueda."""
+    if columna not in ('frecuencia', 'fuente'):
+        raise ValueError(f"Columna de filtro inválida: {columna}")
+    with _conexion(directorio) as abierta:
+        if abierta is None:
+            return []
+        filas = abierta[0].execute(
+            f"SELECT {columna}, COUNT(*) AS n FROM series WHERE {columna} != '' GROUP BY {columna} ORDER BY n DESC"
+        )
+        return [fila[0] for fila in filas]
+
+
+# ─── Series agregadas por los usuarios ─────────────────────────────────────
+
+_registro_lock = threading.Lock()
+
+
+@contextmanager
+def _bloqueo_registro(directorio=None):
+    """Exclusión del registro entre hilos (lock) y entre procesos (flock)."""
+    ruta = _ruta_en_cache(SERIES_USUARIO_NOMBRE, directorio)
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    with _registro_lock, open(ruta + '.lock', 'a') as cerrojo:
+        if fcntl is not None:
+            fcntl.flock(cerrojo.fileno(), fcntl.LOCK_EX)
+        yield
+
+
+def series_usuario(directorio=None):
+    """Series agregadas desde el catálogo: lista de {'id', 'titulo', 'frecuencia', 'unidades'}."""
+    ruta = _ruta_en_cache(SERIES_USUARIO_NOMBRE, directorio)
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"⚠️ Registro de series de usuario ilegible: {e}")
+        return []
+
+
+def _guardar_series_usuario(series, directorio=None):
+    ruta = _ruta_en_cache(SERIES_USUARIO_NOMBRE, directorio)
+    directorio_registro = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio_registro, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio_registro, prefix=os.path.basename(ruta) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(series, f, indent=1, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def agregar_serie_usuario(serie_id, titulo=None, frecuencia=None, unidades=None, directorio=None):
+    """Agrega una serie de datos.gob al dashboard (completa los metadatos del índice si faltan)."""
+    metadatos = obtener_metadatos(serie_id, directorio) or {}
+    with _bloqueo_registro(directorio):
+        series = [s for s in series_usuario(directorio) if s['id'] != serie_id]
+        series.append({
+            'id': serie_id,
+            'titulo': titulo or metadatos.get('titulo') or serie_id,
+            'frecuencia': frecuencia or metadatos.get('frecuencia'),
+            'unidades': unidades or metadatos.get('unidades'),
+        })
+        _guardar_series_usuario(series, directorio)
+    return series
+
+
+def quitar_serie_usuario(serie_id, directorio=None):
+    with _bloqueo_registro(directorio):
+        series = [s for s in series_usuario(directorio) if s['id'] != serie_id]
+        _guardar_series_usuario(series, directorio)
+    return series
+
+
+def main():
+    """Construye el índice del catálogo o busca en él."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Catálogo de series de datos.gob.ar")
+    parser.add_argument('--construir', action='store_true', help="descargar el dump y reconstruir el índice")
+    parser.add_argument('--dump', help="construir desde este archivo CSV en lugar de descargarlo")
+    parser.add_argument('--buscar', help="texto a buscar")
+    parser.add_argument('--frecuencia')
+    parser.add_argument('--fuente')
+    args = parser.parse_args()
+
+    if args.dump:
+        construir_indice_desde_archivo(args.dump)
+    elif args.construir:
+        construir_indice()
+
+    if args.buscar is not None or args.frecuencia or args.fuente:
+        inicio = time.perf_counter()
+        resultados = buscar(args.buscar or '', args.frecuencia, args.fuente)
+        print(f"🔎 {len(resultados)} resultados en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        for r in resultados:
+            print(f"   {r['serie_id']:<32} [{r['frecuencia']}] {r['titulo']} — {r['fuente']}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
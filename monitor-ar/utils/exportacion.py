@@ -0,0 +1,167 @@
+import os
+import io
+import json
+import time
+import hashlib
+import zipfile
+import tempfile
+
+# Filas leídas y escritas por bloque: la memoria de una exportación queda
+# acotada por este número, no por el largo ni la cantidad de series
+FILAS_POR_BLOQUE = 50_000
+
+FORMATOS = ('csv', 'parquet')
+
+# ZIPs armados para descargar desde el dashboard: quedan en disco (no en
+# memoria ni en st.cache_data), se comparten entre sesiones y se conservan
+# solo los más recientes
+EXPORTACIONES_DIR = '_exportaciones'
+MAX_EXPORTACIONES = 8
+
+
+def _leer_bloques(ruta, desde=None, hasta=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Itera el CSV de caché en bloques normalizados (fecha, valor) y filtrados por fecha."""
+    import pandas as pd
+
+    desde = pd.Timestamp(desde) if desde is not None else None
+    hasta = pd.Timestamp(hasta) if hasta is not None else None
+    for bloque in pd.read_csv(ruta, usecols=['fecha', 'valor'], chunksize=filas_por_bloque):
+        bloque['fecha'] = pd.to_datetime(bloque['fecha'], errors='coerce')
+        bloque['valor'] = pd.to_numeric(bloque['valor'], errors='coerce')
+        bloque = bloque.dropna()
+        if desde is not None:
+            bloque = bloque[bloque['fecha'] >= desde]
+        if hasta is not None:
+            bloque = bloque[bloque['fecha'] <= hasta]
+        if not bloque.empty:
+            yield bloque
+
+
+def _escribir_csv(zip_salida, miembro, bloques):
+    filas = 0
+    with zip_salida.open(miembro, 'w') as binario, \
+            io.TextIOWrapper(binario, encoding='utf-8', newline='') as f:
+        f.write('fecha,valor\n')
+        for bloque in bloques:
+            bloque.to_csv(f, header=False, index=False, date_format='%Y-%m-%d')
+            filas += len(bloque)
+    return filas
+
+
+def _escribir_parquet(zip_salida, miembro, bloques):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow)")
+
+    esquema = pa.schema([('fecha', pa.date32()), ('valor', pa.float64())])
+    filas = 0
+    with zip_salida.open(miembro, 'w') as f:
+        escritor = pq.ParquetWriter(f, esquema, compression='zstd')
+        try:
+            # Un row group por bloque: nunca se arma la serie completa en memoria
+            for bloque in bloques:
+                tabla = pa.table({
+                    'fecha': pa.array(bloque['fecha'].dt.date, type=pa.date32()),
+                    'valor': pa.array(bloque['valor'].to_numpy(), type=pa.float64()),
+                })
+                escritor.write_table(tabla)
+                filas += len(bloque)
+        finally:
+            escritor.close()
+    return filas
+
+
+def exportar_series(destino, nombres=None, formato='csv', desde=None, hasta=None,
+                    filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Exporta series cacheadas a un ZIP con un archivo por serie y un metadata.json.
+
+    destino: ruta o archivo binario abierto (BytesIO, stdout.buffer, ...).
+    nombres: series a exportar (por defecto, todas las registradas con caché).
+    desde / hasta: filtro de fechas inclusivo (str o Timestamp).
+
+    Cada serie se lee del CSV de caché y se escribe en el ZIP bloque a bloque.
+    Retorna dict: {'series': {nombre: filas}, 'omitidas': [nombres sin caché]}
+    """
+    from .api_helpers import CACHE_DIR, archivo_serie, series_registradas, version_serie
+
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}")
+    nombres = list(nombres) if nombres is not None else series_registradas()
+    escribir = _escribir_csv if formato == 'csv' else _escribir_parquet
+    # El Parquet ya viene comprimido: comprimirlo de nuevo solo gasta CPU
+    compresion = zipfile.ZIP_DEFLATED if formato == 'csv' else zipfile.ZIP_STORED
+
+    resumen = {'series': {}, 'omitidas': []}
+    metadata = {'exportado': time.strftime('%Y-%m-%dT%H:%M:%S'), 'formato': formato,
+                'desde': str(desde) if desde is not None else None,
+                'hasta': str(hasta) if hasta is not None else None, 'series': {}}
+
+    with zipfile.ZipFile(destino, 'w', compression=compresion) as zip_salida:
+        for nombre in nombres:
+            ruta = os.path.join(CACHE_DIR, archivo_serie(nombre))
+            if not os.path.exists(ruta):
+                resumen['omitidas'].append(nombre)
+                continue
+            miembro = f'{nombre}.{formato}'
+            filas = escribir(zip_salida, miembro, _leer_bloques(ruta, desde, hasta, filas_por_bloque))
+            resumen['series'][nombre] = filas
+            metadata['series'][nombre] = {'archivo': miembro, 'filas': filas,
+                                          'version_cache': version_serie(nombre)}
+            print(f"📦 Exportada {nombre}: {filas} filas")
+        zip_salida.writestr('metadata.json', json.dumps(metadata, indent=2, ensure_ascii=False))
+
+    return resumen
+
+
+def _podar_exportaciones(carpeta, conservar):
+    try:
+        archivos = [e for e in os.scandir(carpeta) if e.name.endswith('.zip')]
+    except OSError:
+        return
+    archivos.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entrada in archivos[conservar:]:
+        try:
+            os.remove(entrada.path)
+        except OSError:
+            pass
+
+
+def exportacion_en_disco(nombres, formato='csv', desde=None, hasta=None, directorio=None,
+                         max_exportaciones=MAX_EXPORTACIONES):
+    """
+    Arma el ZIP de exportación en _exportaciones/ del directorio de caché y
+    retorna su ruta. El nombre sale de las series, sus versiones, el formato y
+    el filtro: si ese ZIP ya existe (de esta u otra sesión) se reutiliza.
+
+    Se escribe a un temporal único y se publica con os.replace, así una
+    descarga nunca ve un ZIP a medio escribir.
+    """
+    from .api_helpers import CACHE_DIR, version_serie
+
+    carpeta = os.path.join(directorio or CACHE_DIR, EXPORTACIONES_DIR)
+    nombres = list(nombres)
+    contenido = json.dumps([nombres, [version_serie(n) for n in nombres], formato,
+                            str(desde) if desde is not None else None,
+                            str(hasta) if hasta is not None else None])
+    ruta = os.path.join(carpeta, hashlib.sha1(contenido.encode()).hexdigest()[:20] + '.zip')
+    if os.path.exists(ruta):
+        os.utime(ruta)
+        return ruta
+
+    os.makedirs(carpeta, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            exportar_series(f, nombres, formato, desde, hasta)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    _podar_exportaciones(carpeta, max_exportaciones)
+    return ruta
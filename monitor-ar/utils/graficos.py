@@ -0,0 +1,178 @@
+import os
+import numpy as np
+import plotly
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# A partir de estos puntos por serie se usa WebGL (Scattergl) en lugar de SVG
+UMBRAL_WEBGL = 5000
+
+# Decimales que muestran los gráficos (hovertemplate '%{y:.2f}')
+DECIMALES_DISPLAY = 2
+
+# Reporte de bytes de payload antes/después de optimizar (MONITOR_AR_REPORTE_PAYLOAD=1)
+REPORTAR_PAYLOAD = os.environ.get('MONITOR_AR_REPORTE_PAYLOAD', '0') == '1'
+
+# plotly>=6 serializa arrays numpy como typed arrays base64 ('bdata') en lugar de listas JSON
+PLOTLY_TYPED_ARRAYS = int(plotly.__version__.split('.')[0]) >= 6
+
+# Layout compartido por los paneles estilo terminal
+LAYOUT_TERMINAL = dict(
+    template='plotly_dark',
+    showlegend=False,
+    paper_bgcolor='#0e1117',
+    plot_bgcolor='#1a1d23',
+)
+
+
+def crear_panel_multiple(series, columnas=None, altura_fila=300, compartir_x=True,
+                         compartir_y=False, webgl=None, margen=None, optimizar=True):
+    """
+    Dibuja N series como una sola figura en grilla de subplots (small multiples).
+    Un único layout/template para todo el panel en lugar de una figura por serie.
+
+    series: lista de dicts {'nombre', 'titulo', 'df', 'color'}; df con columnas fecha, valor.
+            Las series sin datos dejan su celda vacía con el título.
+    columnas: celdas por fila (por defecto, todas en una fila).
+    compartir_x: ejes de fecha vinculados (zoom/pan en una celda mueve todas).
+    compartir_y: mismo eje Y en cada fila (solo si las series tienen escala comparable).
+    webgl: True/False fuerza Scattergl; None lo activa solo para series > UMBRAL_WEBGL.
+    optimizar: aplica optimizar_payload (fechas compactas, typed arrays).
+    """
+    n = max(len(series), 1)
+    columnas = columnas or n
+    filas = -(-n // columnas)
+
+    fig = make_subplots(
+        rows=filas,
+        cols=columnas,
+        shared_yaxes=compartir_y,
+        subplot_titles=[s.get('titulo', s['nombre']) for s in series],
+        horizontal_spacing=0.04 if compartir_y else 0.08,
+        vertical_spacing=0.12,
+    )
+
+    for idx, s in enumerate(series):
+        df = s.get('df')
+        if df is None or df.empty:
+            continue
+        usar_webgl = webgl if webgl is not None else len(df) > UMBRAL_WEBGL
+        traza = go.Scattergl if usar_webgl else go.Scatter
+        fig.add_trace(
+            traza(
+                x=df['fecha'],
+                y=df['valor'],
+                mode='lines',
+                name=s['nombre'],
+                line=dict(color=s.get('color', '#00ff41'), width=2),
+                hovertemplate='<b>%{x|%Y-%m-%d}</b><br>%{y:.2f}<extra></extra>'
+            ),
+            row=idx // columnas + 1,
+            col=idx % columnas + 1,
+        )
+
+    if compartir_x:
+        fig.update_xaxes(matches='x')
+
+    fig.update_layout(
+        height=altura_fila * filas,
+        margin=margen or dict(l=0, r=0, t=30, b=0),
+        **LAYOUT_TERMINAL
+    )
+    if optimizar:
+        optimizar_payload(fig, etiqueta='panel múltiple')
+    return fig
+
+
+# Claves de layout del template que afectan a gráficos cartesianos 2D. El resto
+# (geo, polar, scene, ternary, colorscales...) no se usa y solo agrega bytes.
+CLAVES_TEMPLATE_CARTESIANO = {
+    'annotationdefaults', 'autotypenumbers', 'colorway', 'font', 'hoverlabel',
+    'hovermode', 'paper_bgcolor', 'plot_bgcolor', 'shapedefaults', 'title',
+    'xaxis', 'yaxis',
+}
+
+
+def medir_payload(fig):
+    """Bytes del JSON de la figura tal como viaja al navegador."""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def _fechas_compactas(valores):
+    """
+    Fechas como strings con la mínima resolución que no pierde información:
+    'YYYY-MM' para series mensuales, 'YYYY-MM-DD' para diarias.
+    Retorna None si los valores no son fechas.
+    """
+    arr = np.asarray(valores)
+    if arr.dtype == object and len(arr) and hasattr(arr[0], 'strftime'):
+        arr = np.array([np.datetime64(v, 's') for v in arr])
+    if not np.issubdtype(arr.dtype, np.datetime64):
+        return None
+    segundos = arr.astype('datetime64[s]')
+    dias = segundos.astype('datetime64[D]')
+    if (segundos != dias).any():
+        return np.datetime_as_string(segundos, unit='s').tolist()
+    meses = dias.astype('datetime64[M]')
+    if (dias == meses).all():
+        return np.datetime_as_string(meses, unit='M').tolist()
+    return np.datetime_as_string(dias, unit='D').tolist()
+
+
+def _valores_compactos(valores, decimales):
+    """
+    Valores redondeados a la precisión de display. Con typed arrays se envían
+    como float32 (4 bytes por punto) si el rango lo permite sin perder los
+    decimales mostrados; sin typed arrays, como floats cortos en JSON.
+    """
+    arr = np.round(np.asarray(valores, dtype=float), decimales)
+    if PLOTLY_TYPED_ARRAYS:
+        if np.nanmax(np.abs(arr), initial=0) < 1e5:
+            return arr.astype(np.float32)
+        return arr
+    return arr.tolist()
+
+
+def _podar_template(fig):
+    """
+    Deja en el template solo los defaults de los tipos de traza presentes y
+    las claves de layout cartesianas. El aspecto visual no cambia.
+    """
+    template = fig.layout.template
+    if template is None:
+        return
+    tpl = template.to_plotly_json()
+    tipos = {traza.type for traza in fig.data}
+    fig.layout.template = go.layout.Template(
+        data={k: v for k, v in tpl.get('data', {}).items() if k in tipos},
+        layout={k: v for k, v in tpl.get('layout', {}).items() if k in CLAVES_TEMPLATE_CARTESIANO},
+    )
+
+
+def optimizar_payload(fig, decimales=DECIMALES_DISPLAY, reportar=None, etiqueta='figura'):
+    """
+    Reduce el JSON de la figura que viaja por el websocket de Streamlit:
+    fechas compactas, valores redondeados a la precisión de display,
+    typed arrays (base64) donde Plotly los soporta y template podado a lo
+    que usa la figura. Modifica y retorna `fig`.
+    """
+    reportar = REPORTAR_PAYLOAD if reportar is None else reportar
+    antes = medir_payload(fig) if reportar else None
+
+    for traza in fig.data:
+        if getattr(traza, 'x', None) is not None:
+            fechas = _fechas_compactas(traza.x)
+            if fechas is not None:
+                traza.x = fechas
+        if getattr(traza, 'y', None) is not None:
+            try:
+                traza.y = _valores_compactos(traza.y, decimales)
+            except (TypeError, ValueError):
+                pass
+
+    _podar_template(fig)
+
+    if reportar:
+        despues = medir_payload(fig)
+        print(f"📦 Payload {etiqueta}: {antes} → {despues} bytes ({antes / max(despues, 1):.1f}x)")
+    return fig
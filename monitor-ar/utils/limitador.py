@@ -0,0 +1,267 @@
+import time
+import weakref
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+# Límites por host: tasa sostenida (req/s), ráfaga, concurrencia máxima y
+# latencia objetivo (s) por encima de la cual se reduce la concurrencia.
+LIMITES_HOST = {
+    'api.bcra.gob.ar': {'tasa': 4.0, 'rafaga': 4, 'max_concurrencia': 4, 'latencia_objetivo': 3.0},
+    'apis.datos.gob.ar': {'tasa': 2.0, 'rafaga': 2, 'max_concurrencia': 2, 'latencia_objetivo': 5.0},
+    'infra.datos.gob.ar': {'tasa': 1.0, 'rafaga': 1, 'max_concurrencia': 1, 'latencia_objetivo': 10.0},
+}
+LIMITE_POR_DEFECTO = {'tasa': 2.0, 'rafaga': 2, 'max_concurrencia': 2, 'latencia_objetivo': 5.0}
+
+# Respuestas que indican throttling del lado del servidor
+STATUS_THROTTLING = (429, 503)
+
+# Tope de espera ante un Retry-After desmedido
+MAX_RETRY_AFTER = 120.0
+
+
+class CuboTokens:
+    """Token bucket thread-safe. `pausar` bloquea el cubo hasta un instante (Retry-After)."""
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad)
+        self._tokens = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._pausado_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def _reponer(self, ahora):
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def adquirir(self, timeout=None):
+        """Toma un token, esperando lo necesario. Retorna False si vence `timeout`."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._reponer(ahora)
+                if ahora < self._pausado_hasta:
+                    espera = self._pausado_hasta - ahora
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                else:
+                    espera = (1 - self._tokens) / self.tasa
+            if limite is not None and time.monotonic() + espera > limite:
+                return False
+            time.sleep(espera)
+
+    def pausar(self, segundos):
+        """Suspende la entrega de tokens durante `segundos` (acumulativo con pausas previas)."""
+        with self._lock:
+            self._pausado_hasta = max(self._pausado_hasta, time.monotonic() + segundos)
+            self._tokens = 0.0
+
+
+class ConcurrenciaAIMD:
+    """
+    Límite de concurrencia adaptativo: suma 1/limite por respuesta sana
+    (≈ +1 por ronda) y lo divide a la mitad ante throttling o latencia alta,
+    como mucho una vez por ventana para no colapsar por fallas simultáneas.
+    """
+
+    def __init__(self, maximo, minimo=1, latencia_objetivo=5.0, ventana=2.0):
+        self.maximo = float(maximo)
+        self.minimo = float(minimo)
+        self.latencia_objetivo = latencia_objetivo
+        self.ventana = ventana
+        self.limite = float(maximo)
+        self._en_curso = 0
+        self._ultima_reduccion = 0.0
+        self._cond = threading.Condition()
+
+    def adquirir(self):
+        with self._cond:
+            while self._en_curso >= int(self.limite):
+                self._cond.wait()
+            self._en_curso += 1
+
+    def liberar(self):
+        with self._cond:
+            self._en_curso -= 1
+            self._cond.notify()
+
+    def registrar(self, latencia, status):
+        """Ajusta el límite según el resultado de una solicitud."""
+        with self._cond:
+            ahora = time.monotonic()
+            congestion = status in STATUS_THROTTLING or latencia > self.latencia_objetivo
+            if congestion:
+                if ahora - self._ultima_reduccion >= self.ventana:
+                    self.limite = max(self.minimo, self.limite / 2)
+                    self._ultima_reduccion = ahora
+            elif status is not None and status < 500:
+                anterior = int(self.limite)
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+                if int(self.limite) > anterior:
+                    self._cond.notify_all()
+
+
+class LimitadorHost:
+    """Token bucket + concurrencia AIMD para un host, compartido por todas las sesiones."""
+
+    def __init__(self, host, tasa, rafaga, max_concurrencia, latencia_objetivo):
+        self.host = host
+        self.cubo = CuboTokens(tasa, rafaga)
+        self.concurrencia = ConcurrenciaAIMD(max_concurrencia, latencia_objetivo=latencia_objetivo)
+        self.throttles = 0
+        self.solicitudes = 0
+        self._lock = threading.Lock()
+
+    def tomar_turno(self):
+        """Espera cupo de concurrencia y un token. El cupo se devuelve con Turno.terminar."""
+        self.concurrencia.adquirir()
+        try:
+            self.cubo.adquirir()
+        except BaseException:
+            self.concurrencia.liberar()
+            raise
+        return Turno(self)
+
+    def registrar(self, latencia, status, retry_after=None):
+        with self._lock:
+            self.solicitudes += 1
+            if status in STATUS_THROTTLING:
+                self.throttles += 1
+        self.concurrencia.registrar(latencia, status)
+        if retry_after:
+            self.cubo.pausar(min(retry_after, MAX_RETRY_AFTER))
+
+    def estado(self):
+        with self._lock:
+            solicitudes, throttles = self.solicitudes, self.throttles
+        return {
+            'host': self.host,
+            'tasa': self.cubo.tasa,
+            'limite_concurrencia': round(self.concurrencia.limite, 2),
+            'solicitudes': solicitudes,
+            'throttles': throttles,
+        }
+
+
+class Turno:
+    """
+    Cupo de concurrencia tomado por una solicitud. Se devuelve una sola vez,
+    registrando la latencia desde que se obtuvo el turno hasta ese momento.
+    """
+
+    def __init__(self, limitador):
+        self.limitador = limitador
+        self.inicio = time.monotonic()
+        self._terminado = False
+        self._lock = threading.Lock()
+
+    def terminar(self, status, retry_after=None, registrar=True):
+        with self._lock:
+            if self._terminado:
+                return
+            self._terminado = True
+        try:
+            if registrar:
+                self.limitador.registrar(time.monotonic() - self.inicio, status, retry_after)
+        finally:
+            self.limitador.concurrencia.liberar()
+
+    def atar(self, respuesta):
+        """
+        Mantiene el cupo hasta que se consuma o cierre el cuerpo de la respuesta:
+        con stream=True la descarga ocurre después de que send() retorna.
+        urllib3 llama a release_conn al agotar el cuerpo y requests al cerrar la
+        respuesta; si nadie lo hace, el cupo se devuelve al recolectarla.
+        """
+        status = respuesta.status_code
+        raw = respuesta.raw
+        liberar_conexion = getattr(raw, 'release_conn', None)
+        if liberar_conexion is None:
+            self.terminar(status)
+            return
+
+        def release_conn():
+            self.terminar(status)
+            liberar_conexion()
+
+        raw.release_conn = release_conn
+        weakref.finalize(respuesta, self.terminar, status)
+
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+
+def obtener_limitador(host):
+    """Limitador compartido del host (se crea con LIMITES_HOST la primera vez)."""
+    with _limitadores_lock:
+        if host not in _limitadores:
+            config = LIMITES_HOST.get(host, LIMITE_POR_DEFECTO)
+            _limitadores[host] = LimitadorHost(host, **config)
+        return _limitadores[host]
+
+
+def estado_limitadores():
+    """Estado actual de todos los limitadores (para diagnóstico)."""
+    with _limitadores_lock:
+        return [lim.estado() for lim in _limitadores.values()]
+
+
+def parsear_retry_after(valor):
+    """Segundos a esperar según un header Retry-After (segundos o fecha HTTP)."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+        return max(0.0, fecha.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptadorLimitado(HTTPAdapter):
+    """
+    HTTPAdapter que pasa cada solicitud por el limitador del host. Las respuestas
+    429/503 se reintentan acá (no en urllib3) para que cada reintento también
+    consuma un token y respete el Retry-After en lugar de sumar carga.
+    """
+
+    def __init__(self, *args, reintentos_throttling=3, backoff=1.0, **kwargs):
+        self.reintentos_throttling = reintentos_throttling
+        self.backoff = backoff
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        limitador = obtener_limitador(urlparse(request.url).hostname or '')
+        intento = 0
+        while True:
+            turno = limitador.tomar_turno()
+            try:
+                respuesta = super().send(request, **kwargs)
+            except BaseException:
+                turno.terminar(None)
+                raise
+
+            if respuesta.status_code not in STATUS_THROTTLING:
+                # El cupo y la latencia cubren también la descarga del cuerpo
+                turno.atar(respuesta)
+                return respuesta
+
+            espera = parsear_retry_after(respuesta.headers.get('Retry-After'))
+            if espera is None:
+                espera = self.backoff * (2 ** intento)
+            turno.terminar(respuesta.status_code, retry_after=espera)
+
+            if intento >= self.reintentos_throttling:
+                return respuesta
+            intento += 1
+            print(f"⏳ {limitador.host}: {respuesta.status_code}, reintento {intento} en {espera:.1f}s")
+            respuesta.close()
@@ -0,0 +1,573 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusión dentro del proceso
+    fcntl = None
+
+# Historia de revisiones (vintages) de las series cacheadas.
+#
+# El CSV de caché sigue siendo la vista vigente de la serie, en formato canónico
+# (fecha YYYY-MM-DD, valor con repr de float). Junto a él, en _revisiones/:
+#   <serie>.ventanas.json   hash, offset y largo en bytes de cada mes calendario del CSV
+#   <serie>.deltas.csv      log append-only: vintage, fecha, anterior, nuevo
+#
+# Las ventanas son meses calendario (no bloques de N filas), así que agregar
+# un día no corre las ventanas siguientes. Al refrescar solo se comparan los
+# meses que cubre la descarga: lo que quedó fuera de su rango (ej. el día que
+# salió de una ventana móvil de 365 días) se conserva sin cambios, no se da
+# de baja. Los meses iguales ni se parsean ni se vuelven a serializar: el CSV
+# nuevo se arma en un temporal copiando sus bytes tal cual, y se publica con
+# os.replace, así un lector nunca ve un archivo a medio escribir. Al log solo
+# van las observaciones que cambiaron.
+REVISIONES_DIR = '_revisiones'
+FORMATO_INDICE = 2
+ENCABEZADO = 'fecha,valor\n'
+COLUMNAS_DELTAS = ['vintage', 'fecha', 'anterior', 'nuevo']
+BLOQUE_COPIA = 1 << 20
+
+# Vintages con deltas que se conservan por serie al compactar: los más viejos
+# se colapsan en la vista base y las consultas anteriores a ellos quedan fuera
+# de la historia (ver HistorialRevisiones.compactar)
+MAX_VINTAGES = int(os.environ.get('MONITOR_AR_REVISIONES_VINTAGES', '24'))
+
+
+def _formatear(df):
+    """Normaliza una serie fecha/valor y la lleva a líneas CSV canónicas (sin '\\n')."""
+    import pandas as pd
+
+    df = df[['fecha', 'valor']].copy()
+    df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+    df = df.dropna().sort_values('fecha', kind='stable').drop_duplicates('fecha', keep='last')
+    return (df['fecha'].dt.strftime('%Y-%m-%d') + ',' + df['valor'].map(repr)).tolist()
+
+
+def _hash_ventana(lineas):
+    return hashlib.sha1(('\n'.join(lineas) + '\n').encode()).hexdigest()[:16]
+
+
+def _por_mes(lineas):
+    """{'YYYY-MM': [líneas]} en orden, para líneas canónicas ya ordenadas."""
+    meses = {}
+    for linea in lineas:
+        meses.setdefault(linea[:7], []).append(linea)
+    return meses
+
+
+def _ventana(mes, offset, lineas):
+    datos = ''.join(linea + '\n' for linea in lineas).encode('utf-8')
+    return {'mes': mes, 'offset': offset, 'bytes': len(datos), 'filas': len(lineas),
+            'hash': _hash_ventana(lineas)}, datos
+
+
+def _combinar(anteriores, nuevas):
+    """
+    Vista resultante de fusionar una descarga: las líneas previas fuera del
+    rango de fechas descargado se conservan; dentro del rango manda la descarga.
+    """
+    if not nuevas:
+        return list(anteriores)
+    desde, hasta = nuevas[0][:10], nuevas[-1][:10]
+    fuera = [linea for linea in anteriores if not desde <= linea[:10] <= hasta]
+    # Las líneas empiezan con la fecha ISO y no se repiten: ordenar el texto ordena por fecha
+    return sorted(fuera + nuevas) if fuera else list(nuevas)
+
+
+def _hash_vista(hashes_ventanas):
+    return hashlib.sha1(''.join(hashes_ventanas).encode()).hexdigest()
+
+
+def hash_csv(datos):
+    """
+    Hash de un CSV canónico (bytes) a partir de sus meses: el mismo que
+    `fusionar` informa en su resumen y queda en el índice de caché.
+    """
+    lineas = datos.decode('utf-8').splitlines()[1:]
+    return _hash_vista(_hash_ventana(bloque) for bloque in _por_mes(lineas).values())
+
+
+def _a_dict(lineas):
+    filas = {}
+    for linea in lineas:
+        fecha, valor = linea.split(',', 1)
+        filas[fecha] = float(valor)
+    return filas
+
+
+def _diferencias(anteriores, nuevas):
+    """[(fecha, anterior, nuevo)] ordenadas por fecha; None marca alta o baja."""
+    cambios = []
+    for fecha in sorted(anteriores.keys() | nuevas.keys()):
+        anterior, nuevo = anteriores.get(fecha), nuevas.get(fecha)
+        if anterior != nuevo:
+            cambios.append((fecha, anterior, nuevo))
+    return cambios
+
+
+def _escribir(fd, datos):
+    vista = memoryview(datos)
+    while vista:
+        vista = vista[os.write(fd, vista):]
+
+
+def _leer_rango(fd, offset, largo):
+    os.lseek(fd, offset, os.SEEK_SET)
+    partes = []
+    while largo > 0:
+        parte = os.read(fd, min(largo, BLOQUE_COPIA))
+        if not parte:
+            raise ValueError("CSV de caché más corto que su índice de ventanas")
+        partes.append(parte)
+        largo -= len(parte)
+    return b''.join(partes)
+
+
+def _copiar_rango(origen, destino, offset, largo):
+    """Agrega a `destino` los bytes [offset, offset + largo) de `origen` (fds), sin pasarlos por Python si se puede."""
+    copiar = getattr(os, 'copy_file_range', None)
+    while largo > 0:
+        n = 0
+        if copiar is not None:
+            try:
+                n = copiar(origen, destino, min(largo, BLOQUE_COPIA), offset)
+            except OSError:
+                copiar = None
+        if not n:
+            datos = _leer_rango(origen, offset, min(largo, BLOQUE_COPIA))
+            _escribir(destino, datos)
+            n = len(datos)
+        offset += n
+        largo -= n
+
+
+class HistorialRevisiones:
+    """
+    Historia de vintages de una serie cacheada (un CSV fecha/valor).
+
+    `fusionar` incorpora una descarga nueva serializando solo los meses que
+    cambiaron; `al` reconstruye la serie tal como se conocía en un momento
+    dado deshaciendo los deltas posteriores.
+    """
+
+    def __init__(self, directorio, nombre_archivo):
+        self.directorio = directorio
+        self.nombre_archivo = nombre_archivo
+        base = os.path.splitext(nombre_archivo)[0]
+        self.ruta_csv = os.path.join(directorio, nombre_archivo)
+        self.ruta_ventanas = os.path.join(directorio, REVISIONES_DIR, base + '.ventanas.json')
+        self.ruta_deltas = os.path.join(directorio, REVISIONES_DIR, base + '.deltas.csv')
+        self._lock = threading.Lock()
+
+    # ─── Estado en disco ───────────────────────────────────────────────────
+
+    @contextmanager
+    def _bloqueo(self):
+        os.makedirs(os.path.dirname(self.ruta_ventanas), exist_ok=True)
+        with self._lock, open(self.ruta_ventanas + '.lock', 'a') as cerrojo:
+            if fcntl is not None:
+                fcntl.flock(cerrojo.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _estado_csv(self):
+        try:
+            stat = os.stat(self.ruta_csv)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def indice(self):
+        """Índice de ventanas, o None si falta o no corresponde al CSV en disco."""
+        try:
+            with open(self.ruta_ventanas, encoding='utf-8') as f:
+                indice = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if indice.get('csv') != self._estado_csv() or indice.get('formato') != FORMATO_INDICE:
+            return None
+        return indice
+
+    def _guardar_indice(self, indice):
+        indice['csv'] = self._estado_csv()
+        indice['formato'] = FORMATO_INDICE
+        self._escribir_indice(indice)
+
+    def _escribir_indice(self, indice):
+        temporal = self.ruta_ventanas + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, separators=(',', ':'))
+        os.replace(temporal, self.ruta_ventanas)
+
+    def _leer_indice_crudo(self):
+        try:
+            with open(self.ruta_ventanas, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _anotar_deltas(self, vintage, cambios):
+        if not cambios:
+            return
+        nuevo_archivo = not os.path.exists(self.ruta_deltas)
+        with open(self.ruta_deltas, 'a', encoding='utf-8') as f:
+            if nuevo_archivo:
+                f.write(','.join(COLUMNAS_DELTAS) + '\n')
+            for fecha, anterior, nuevo in cambios:
+                f.write(f"{vintage},{fecha},{'' if anterior is None else repr(anterior)},"
+                        f"{'' if nuevo is None else repr(nuevo)}\n")
+
+    def bytes_en_disco(self):
+        """Bytes que ocupa la historia (índice de ventanas y log de deltas), sin el CSV."""
+        total = 0
+        for ruta in (self.ruta_ventanas, self.ruta_deltas, self.ruta_ventanas + '.lock'):
+            try:
+                total += os.path.getsize(ruta)
+            except OSError:
+                pass
+        return total
+
+    def compactar(self, max_vintages=MAX_VINTAGES):
+        """
+        Colapsa la historia dejando los deltas de los últimos `max_vintages`
+        vintages: los anteriores se descartan y el origen pasa al último
+        vintage descartado. Las consultas desde ese momento dan lo mismo que
+        antes; las anteriores quedan fuera de la historia (serie vacía).
+        Retorna bytes liberados.
+        """
+        if not os.path.exists(self.ruta_ventanas):
+            return 0
+        with self._bloqueo():
+            indice = self._leer_indice_crudo()
+            vintages = indice.get('vintages', [])
+            if len(vintages) <= max_vintages:
+                return 0
+            corte = vintages[len(vintages) - max_vintages - 1]['vintage']
+            antes = self.bytes_en_disco()
+
+            if os.path.exists(self.ruta_deltas):
+                fd, temporal = tempfile.mkstemp(dir=os.path.dirname(self.ruta_deltas), suffix='.tmp')
+                try:
+                    with open(self.ruta_deltas, encoding='utf-8') as entrada, \
+                            os.fdopen(fd, 'w', encoding='utf-8', newline='') as salida:
+                        salida.write(next(entrada, ','.join(COLUMNAS_DELTAS) + '\n'))
+                        for linea in entrada:
+                            if float(linea.split(',', 1)[0]) > corte:
+                                salida.write(linea)
+                    os.replace(temporal, self.ruta_deltas)
+                except BaseException:
+                    try:
+                        os.remove(temporal)
+                    except OSError:
+                        pass
+                    raise
+
+            # Sin reestampar el estado del CSV: si el índice ya no le correspondía, sigue sin corresponderle
+            indice['vintages'] = vintages[len(vintages) - max_vintages:]
+            indice['origen'] = corte
+            self._escribir_indice(indice)
+            liberados = antes - self.bytes_en_disco()
+        print(f"🧹 {self.nombre_archivo}: historia compactada a {max_vintages} vintages ({liberados} bytes liberados)")
+        return liberados
+
+    def _reiniciar_historia(self):
+        if os.path.exists(self.ruta_deltas):
+            os.remove(self.ruta_deltas)
+
+    # ─── Escritura ─────────────────────────────────────────────────────────
+
+    def fusionar(self, df, vintage=None):
+        """
+        Incorpora una descarga (DataFrame fecha/valor) como vintage nuevo.
+        Las observaciones previas fuera del rango de fechas descargado quedan igual.
+
+        Retorna dict: {'vintage', 'nuevas', 'revisadas', 'eliminadas',
+                       'bytes_escritos', 'bytes_copiados', 'hash', 'cambio': bool}
+        `bytes_escritos` son los de los meses que cambiaron; `bytes_copiados`,
+        los de los meses iguales copiados tal cual al CSV nuevo.
+        `hash` resume los hashes de ventana: identifica el contenido sin releer el CSV.
+        """
+        vintage = float(time.time() if vintage is None else vintage)
+        lineas = _formatear(df)
+
+        with self._bloqueo():
+            indice = self.indice()
+            if indice is None:
+                previo = self._leer_indice_crudo()
+                cambios, ventanas, escritos, origen_base = self._reconstruir(lineas)
+                copiados = 0
+                if cambios is None:
+                    # Sin vista previa: la historia arranca con esta descarga
+                    cambios, origen, vintages = [], vintage, []
+                else:
+                    origen = previo.get('origen', origen_base)
+                    vintages = previo.get('vintages', [])
+            else:
+                fusion = self._fusionar_meses(lineas, indice['ventanas'])
+                if fusion is None:
+                    return self._resumen(vintage, [], 0, 0, indice['ventanas'], cambio=False)
+                cambios, ventanas, escritos, copiados = fusion
+                origen = indice.get('origen', vintage)
+                vintages = indice.get('vintages', [])
+
+            self._anotar_deltas(vintage, cambios)
+            resumen = self._resumen(vintage, cambios, escritos, copiados, ventanas, cambio=True)
+            if cambios:
+                vintages.append({k: resumen[k] for k in ('vintage', 'nuevas', 'revisadas', 'eliminadas')})
+            self._guardar_indice({'ventanas': ventanas, 'origen': origen, 'vintages': vintages})
+        return resumen
+
+    @contextmanager
+    def _temporal(self):
+        """fd de un temporal único junto al CSV; al salir sin error reemplaza el CSV."""
+        os.makedirs(self.directorio, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, prefix=self.nombre_archivo + '.', suffix='.tmp')
+        try:
+            try:
+                yield fd
+            finally:
+                os.close(fd)
+            os.replace(temporal, self.ruta_csv)
+        except BaseException:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+    def _reconstruir(self, lineas):
+        """
+        Sin índice válido: el CSV en disco (si hay) es el vintage anterior.
+        Pasa al adoptar un caché previo o si algo externo reescribió el CSV.
+        La reescritura en formato canónico lo compacta: una observación por
+        fecha (la última escrita), ordenadas.
+        Retorna (cambios, o None si no había vista previa; ventanas; bytes escritos;
+        mtime de la vista previa).
+        """
+        import pandas as pd
+
+        anteriores = None
+        origen_base = None
+        if os.path.exists(self.ruta_csv):
+            try:
+                base = pd.read_csv(self.ruta_csv)
+                if {'fecha', 'valor'} <= set(base.columns):
+                    anteriores = _formatear(base)
+                    origen_base = os.path.getmtime(self.ruta_csv)
+            except Exception as e:
+                print(f"⚠️ Caché ilegible para {self.nombre_archivo}, se reemplaza: {e}")
+        if anteriores is None and os.path.exists(self.ruta_deltas):
+            # El CSV se desalojó: sin la vista vigente los deltas viejos no se pueden deshacer
+            print(f"⚠️ {self.nombre_archivo}: caché ausente, se reinicia su historia de revisiones")
+            self._reiniciar_historia()
+
+        vigentes = _combinar(anteriores or [], lineas)
+        ventanas = []
+        offset = len(ENCABEZADO)
+        with self._temporal() as fd:
+            _escribir(fd, ENCABEZADO.encode('utf-8'))
+            for mes, bloque in _por_mes(vigentes).items():
+                ventana, datos = _ventana(mes, offset, bloque)
+                _escribir(fd, datos)
+                ventanas.append(ventana)
+                offset += len(datos)
+        if anteriores is None:
+            return None, ventanas, offset, None
+        return _diferencias(_a_dict(anteriores), _a_dict(vigentes)), ventanas, offset, origen_base
+
+    def _fusionar_meses(self, lineas, ventanas_previas):
+        """
+        Fusión con índice válido: solo se leen y comparan los meses que cubre
+        la descarga (los de borde, mezclados con lo previo fuera del rango).
+        Retorna None si nada cambió; si no, (cambios, ventanas, bytes escritos, bytes copiados).
+        """
+        if not lineas:
+            return None
+        previas = {v['mes']: v for v in ventanas_previas}
+        nuevas = _por_mes(lineas)
+        primer_mes, ultimo_mes = lineas[0][:7], lineas[-1][:7]
+
+        plan = []  # (mes, ventana previa, líneas nuevas o None si se copia tal cual)
+        cambios = []
+        fd_previo = os.open(self.ruta_csv, os.O_RDONLY)
+        try:
+            def leer(ventana):
+                return _leer_rango(fd_previo, ventana['offset'], ventana['bytes']).decode('utf-8').splitlines()
+
+            for mes in sorted(previas.keys() | nuevas.keys()):
+                previa = previas.get(mes)
+                if not primer_mes <= mes <= ultimo_mes:
+                    plan.append((mes, previa, None))
+                    continue
+                anteriores = None
+                candidata = nuevas.get(mes, [])
+                if previa is not None and mes in (primer_mes, ultimo_mes):
+                    anteriores = leer(previa)
+                    candidata = _combinar(anteriores, candidata)
+                if previa is not None and _hash_ventana(candidata) == previa['hash']:
+                    plan.append((mes, previa, None))
+                    continue
+                if anteriores is None:
+                    anteriores = leer(previa) if previa is not None else []
+                cambios.extend(_diferencias(_a_dict(anteriores), _a_dict(candidata)))
+                plan.append((mes, previa, candidata))
+
+            if not cambios:
+                return None
+
+            ventanas = []
+            escritos = copiados = 0
+            offset = len(ENCABEZADO)
+            with self._temporal() as fd:
+                _escribir(fd, ENCABEZADO.encode('utf-8'))
+                for mes, previa, candidata in plan:
+                    if candidata is None:
+                        # Mes sin cambios: se copian sus bytes tal cual
+                        _copiar_rango(fd_previo, fd, previa['offset'], previa['bytes'])
+                        ventanas.append(dict(previa, offset=offset))
+                        copiados += previa['bytes']
+                        offset += previa['bytes']
+                    elif candidata:
+                        ventana, datos = _ventana(mes, offset, candidata)
+                        _escribir(fd, datos)
+                        ventanas.append(ventana)
+                        escritos += len(datos)
+                        offset += len(datos)
+        finally:
+            os.close(fd_previo)
+        return cambios, ventanas, escritos, copiados
+
+    def _resumen(self, vintage, cambios, escritos, copiados, ventanas, cambio):
+        return {
+            'vintage': vintage,
+            'nuevas': sum(1 for _, anterior, _ in cambios if anterior is None),
+            'revisadas': sum(1 for _, anterior, nuevo in cambios if anterior is not None and nuevo is not None),
+            'eliminadas': sum(1 for _, _, nuevo in cambios if nuevo is None),
+            'bytes_escritos': escritos,
+            'bytes_copiados': copiados,
+            'hash': _hash_vista(v['hash'] for v in ventanas),
+            'cambio': cambio,
+        }
+
+    # ─── Consultas ─────────────────────────────────────────────────────────
+
+    def vintages(self):
+        """[{'vintage', 'nuevas', 'revisadas', 'eliminadas'}] de cada refresco que cambió la serie."""
+        return list(self._leer_indice_crudo().get('vintages', []))
+
+    def origen(self):
+        """Epoch desde el que hay historia (None si la serie nunca se fusionó)."""
+        return self._leer_indice_crudo().get('origen')
+
+    def deltas(self, desde=None):
+        """Log de cambios como DataFrame (vintage como datetime, fecha, anterior, nuevo)."""
+        import pandas as pd
+
+        if not os.path.exists(self.ruta_deltas):
+            return pd.DataFrame(columns=COLUMNAS_DELTAS)
+        deltas = pd.read_csv(self.ruta_deltas)
+        if desde is not None:
+            deltas = deltas[deltas['vintage'] > _epoch(desde)]
+        deltas['vintage'] = pd.to_datetime(deltas['vintage'], unit='s')
+        deltas['fecha'] = pd.to_datetime(deltas['fecha'])
+        return deltas.reset_index(drop=True)
+
+    def al(self, momento):
+        """
+        La serie tal como se conocía en `momento` (epoch, str o Timestamp UTC):
+        la vista vigente con los deltas posteriores deshechos.
+        DataFrame fecha/valor, vacío si `momento` es anterior al origen; None sin caché.
+        """
+        import pandas as pd
+
+        if not os.path.exists(self.ruta_csv):
+            return None
+        momento = _epoch(momento)
+        vigente = pd.read_csv(self.ruta_csv)
+        vigente['fecha'] = pd.to_datetime(vigente['fecha'])
+        origen = self.origen()
+        if origen is not None and momento < origen:
+            return vigente.iloc[0:0]
+        if not os.path.exists(self.ruta_deltas):
+            return vigente
+
+        deltas = pd.read_csv(self.ruta_deltas)
+        posteriores = deltas[deltas['vintage'] > momento]
+        if posteriores.empty:
+            return vigente
+        # Deshacer en orden inverso deja cada fecha con el `anterior` de su primer delta posterior
+        primeros = posteriores.drop_duplicates('fecha', keep='first')
+        primeros = primeros.assign(fecha=pd.to_datetime(primeros['fecha']))
+        sin_tocar = vigente[~vigente['fecha'].isin(primeros['fecha'])]
+        restauradas = primeros.loc[primeros['anterior'].notna(), ['fecha', 'anterior']].rename(
+            columns={'anterior': 'valor'})
+        return pd.concat([sin_tocar, restauradas]).sort_values('fecha').reset_index(drop=True)
+
+
+def _epoch(momento):
+    if isinstance(momento, (int, float)):
+        return float(momento)
+    import pandas as pd
+    return pd.Timestamp(momento).timestamp()
+
+
+_historiales = {}
+_historiales_lock = threading.Lock()
+
+
+def obtener_historial(nombre_archivo, directorio=None):
+    """Historial compartido de un archivo de caché (por defecto en CACHE_DIR)."""
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    clave = (os.path.abspath(directorio), nombre_archivo)
+    with _historiales_lock:
+        if clave not in _historiales:
+            _historiales[clave] = HistorialRevisiones(directorio, nombre_archivo)
+        return _historiales[clave]
+
+
+def eliminar_historial(directorio, nombre_archivo):
+    """Borra la historia de revisiones de un archivo (al desalojarlo de la caché)."""
+    historial = HistorialRevisiones(directorio, nombre_archivo)
+    for ruta in (historial.ruta_ventanas, historial.ruta_deltas, historial.ruta_ventanas + '.lock'):
+        try:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        except OSError as e:
+            print(f"⚠️ No se pudo eliminar {ruta}: {e}")
+
+
+def main():
+    """Vintages de una serie y, opcionalmente, la serie tal como se conocía en una fecha."""
+    import argparse
+    from .api_helpers import archivo_serie, series_registradas
+
+    parser = argparse.ArgumentParser(description="Historia de revisiones de series cacheadas")
+    parser.add_argument('serie', choices=series_registradas())
+    parser.add_argument('--al', help="mostrar la serie tal como se conocía en esta fecha (YYYY-MM-DD[THH:MM])")
+    args = parser.parse_args()
+
+    historial = obtener_historial(archivo_serie(args.serie))
+    vintages = historial.vintages()
+    print(f"📦 {args.serie}: {len(vintages)} vintages con cambios")
+    for v in vintages:
+        cuando = time.strftime('%Y-%m-%d %H:%M', time.localtime(v['vintage']))
+        print(f"   {cuando}  +{v['nuevas']} nuevas  ~{v['revisadas']} revisadas  -{v['eliminadas']} eliminadas")
+    if args.al:
+        df = historial.al(args.al)
+        if df is None:
+            print("❌ Sin caché para la serie")
+            return 1
+        print(df.tail(12).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import os
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusión dentro del proceso
+    fcntl = None
+
+# Buffer circular persistente de resultados de consultas a las fuentes.
+# Archivo: header (MAGIA, capacidad, escritos) + `capacidad` registros de tamaño fijo.
+# Registro: ts, latencia_ms, bytes, status HTTP (0 = sin respuesta), ok, desde_cache, fuente.
+# Las fuentes de más de 32 bytes se guardan como prefijo + '~' + hash (ver clave_fuente).
+MAGIA = b'MARSALD1'
+_HEADER = struct.Struct('<8sQQ')
+_REGISTRO = struct.Struct('<dfIhBB32s4x')
+LARGO_FUENTE = 32
+_LARGO_HASH = 8
+
+SALUD_NOMBRE = '_salud_fuentes.bin'
+CAPACIDAD = int(os.environ.get('MONITOR_AR_SALUD_REGISTROS', '20000'))
+
+COLUMNAS = ['ts', 'latencia_ms', 'bytes', 'status', 'ok', 'desde_cache', 'fuente']
+
+
+def clave_fuente(fuente):
+    """
+    Nombre de la fuente tal como entra en el registro (a lo sumo LARGO_FUENTE
+    bytes UTF-8). Los nombres largos (p. ej. 'datos.gob/<id de catálogo>') se
+    acortan a un prefijo legible más un hash del nombre completo, así dos
+    series distintas con el mismo prefijo no se mezclan en una sola fila.
+    """
+    codificada = fuente.encode('utf-8')
+    if len(codificada) <= LARGO_FUENTE:
+        return fuente
+    sufijo = '~' + hashlib.blake2b(codificada, digest_size=_LARGO_HASH // 2).hexdigest()
+    prefijo = codificada[:LARGO_FUENTE - len(sufijo)].decode('utf-8', 'ignore')
+    return prefijo + sufijo
+
+
+class RegistroSalud:
+    """
+    Buffer circular de resultados en un archivo mapeado en memoria. Ocupa
+    siempre capacidad x 56 bytes; al llenarse pisa los registros más viejos.
+    Las escrituras se serializan entre hilos (lock) y entre procesos (flock).
+    """
+
+    def __init__(self, ruta, capacidad=CAPACIDAD):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        self._archivo = open(ruta, 'a+b')
+        with self._bloqueo():
+            self._archivo.seek(0, os.SEEK_END)
+            if self._archivo.tell() < _HEADER.size:
+                self._inicializar(capacidad)
+            self._mm = mmap.mmap(self._archivo.fileno(), 0)
+            magia, self.capacidad, _ = _HEADER.unpack_from(self._mm, 0)
+            esperado = _HEADER.size + self.capacidad * _REGISTRO.size
+            if magia != MAGIA or len(self._mm) != esperado:
+                print(f"⚠️ Registro de salud inválido, se reinicia: {ruta}")
+                self._mm.close()
+                self._inicializar(capacidad)
+                self._mm = mmap.mmap(self._archivo.fileno(), 0)
+                self.capacidad = capacidad
+
+    def _inicializar(self, capacidad):
+        self._archivo.truncate(0)
+        self._archivo.write(_HEADER.pack(MAGIA, capacidad, 0))
+        self._archivo.truncate(_HEADER.size + capacidad * _REGISTRO.size)
+        self._archivo.flush()
+
+    @contextmanager
+    def _bloqueo(self, exclusivo=True):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._archivo.fileno(), fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+
+    def escritos(self):
+        """Total de registros escritos desde que se creó el archivo."""
+        return _HEADER.unpack_from(self._mm, 0)[2]
+
+    def __len__(self):
+        return min(self.escritos(), self.capacidad)
+
+    def registrar(self, fuente, latencia_ms, status, bytes_recibidos=0, ok=True, desde_cache=False, ts=None):
+        with self._lock, self._bloqueo():
+            escritos = self.escritos()
+            offset = _HEADER.size + (escritos % self.capacidad) * _REGISTRO.size
+            _REGISTRO.pack_into(
+                self._mm, offset,
+                time.time() if ts is None else ts,
+                latencia_ms,
+                min(max(int(bytes_recibidos or 0), 0), 0xFFFFFFFF),
+                int(status),
+                bool(ok),
+                bool(desde_cache),
+                clave_fuente(fuente).encode('utf-8'),
+            )
+            _HEADER.pack_into(self._mm, 0, MAGIA, self.capacidad, escritos + 1)
+
+    def leer(self, desde=None):
+        """
+        Registros vigentes como DataFrame ordenado por tiempo (columnas COLUMNAS,
+        ts como datetime). `desde` filtra por timestamp epoch.
+        """
+        import numpy as np
+        import pandas as pd
+
+        tipo = np.dtype({'names': ['ts', 'latencia_ms', 'bytes', 'status', 'ok', 'desde_cache', 'fuente'],
+                         'formats': ['<f8', '<f4', '<u4', '<i2', 'u1', 'u1', 'S32'],
+                         'offsets': [0, 8, 12, 16, 18, 19, 20],
+                         'itemsize': _REGISTRO.size})
+        with self._lock, self._bloqueo(exclusivo=False):
+            n = len(self)
+            datos = np.frombuffer(self._mm, dtype=tipo, count=n, offset=_HEADER.size).copy()
+
+        if desde is not None:
+            datos = datos[datos['ts'] >= desde]
+        datos = datos[np.argsort(datos['ts'], kind='stable')]
+        return pd.DataFrame({
+            'ts': pd.to_datetime(datos['ts'], unit='s'),
+            'latencia_ms': datos['latencia_ms'].astype(np.float64),
+            'bytes': datos['bytes'].astype(np.int64),
+            'status': datos['status'].astype(np.int64),
+            'ok': datos['ok'].astype(bool),
+            'desde_cache': datos['desde_cache'].astype(bool),
+            'fuente': [f.rstrip(b'\0').decode('utf-8', 'replace') for f in datos['fuente']],
+        }, columns=COLUMNAS)
+
+    def cerrar(self):
+        with self._lock:
+            self._mm.close()
+            self._archivo.close()
+
+
+_registros = {}
+_registros_lock = threading.Lock()
+
+
+def obtener_registro(directorio=None):
+    """Registro de salud compartido para un directorio de caché (por defecto CACHE_DIR)."""
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    clave = os.path.abspath(directorio)
+    with _registros_lock:
+        if clave not in _registros:
+            _registros[clave] = RegistroSalud(os.path.join(directorio, SALUD_NOMBRE))
+        return _registros[clave]
+
+
+class MedicionConsulta:
+    """
+    Mide una consulta a una fuente y la anota en el registro de salud.
+
+    Uso con fallback a caché:
+        medicion = MedicionConsulta('BCRA/TPM')
+        try:
+            medicion.respuesta = sesion.get(...)
+            ...  # parseo
+            medicion.detener()  # la escritura en caché local no cuenta como latencia
+            ...
+        except Exception as e:
+            medicion.fallo(e)
+            ...  # fallback
+        medicion.registrar(desde_cache=...)
+
+    O como context manager, si el error se propaga (registra al salir).
+    Anotar nunca interrumpe la consulta: los errores del registro solo se loguean.
+    """
+
+    def __init__(self, fuente, directorio=None):
+        self.fuente = fuente
+        self.directorio = directorio
+        self.respuesta = None
+        self._inicio = time.perf_counter()
+        self._latencia = None
+        self._error = None
+        self._registrada = False
+
+    def detener(self):
+        """Congela la latencia en este punto (si no estaba congelada ya)."""
+        if self._latencia is None:
+            self._latencia = time.perf_counter() - self._inicio
+
+    def fallo(self, error):
+        """Marca la consulta como fallida; la latencia se congela en este punto."""
+        self.detener()
+        self._error = error
+
+    def _status(self):
+        respuesta = getattr(self._error, 'response', None)
+        if respuesta is None:
+            respuesta = self.respuesta
+        return respuesta.status_code if respuesta is not None else 0
+
+    def _bytes(self):
+        try:
+            return self.respuesta.raw.tell()
+        except Exception:
+            return 0
+
+    def registrar(self, desde_cache=False):
+        if self._registrada:
+            return
+        self._registrada = True
+        self.detener()
+        latencia = self._latencia
+        try:
+            obtener_registro(self.directorio).registrar(
+                self.fuente, latencia * 1000, self._status(), self._bytes(),
+                ok=self._error is None, desde_cache=desde_cache,
+            )
+        except Exception as e:
+            print(f"⚠️ No se pudo anotar la consulta a {self.fuente}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        if error is not None:
+            self.fallo(error)
+        self.registrar()
+        return False
+
+
+# ─── Agregados para la página de salud ─────────────────────────────────────
+
+def resumen_fuentes(df):
+    """
+    Una fila por fuente: consultas, percentiles de latencia, tasa de error,
+    proporción servida desde caché, bytes promedio y últimas consultas.
+    """
+    import pandas as pd
+
+    if df.empty:
+        return pd.DataFrame(columns=['consultas', 'p50_ms', 'p95_ms', 'p99_ms', 'tasa_error',
+                                     'tasa_cache', 'bytes_promedio', 'ultima_consulta', 'ultimo_ok'])
+    grupos = df.groupby('fuente')
+    latencia = grupos['latencia_ms']
+    resumen = pd.DataFrame({
+        'consultas': grupos.size(),
+        'p50_ms': latencia.quantile(0.50),
+        'p95_ms': latencia.quantile(0.95),
+        'p99_ms': latencia.quantile(0.99),
+        'tasa_error': 1 - grupos['ok'].mean(),
+        'tasa_cache': grupos['desde_cache'].mean(),
+        'bytes_promedio': grupos['bytes'].mean(),
+        'ultima_consulta': grupos['ts'].max(),
+        'ultimo_ok': df[df['ok']].groupby('fuente')['ts'].max(),
+    })
+    return resumen.sort_index()
+
+
+def latencia_en_el_tiempo(df, periodo='1h'):
+    """Por fuente y período: consultas, p50/p95 de latencia y tasa de error."""
+    import pandas as pd
+
+    if df.empty:
+        return pd.DataFrame(columns=['fuente', 'ts', 'consultas', 'p50_ms', 'p95_ms', 'tasa_error'])
+    grupos = df.groupby(['fuente', pd.Grouper(key='ts', freq=periodo)])
+    return pd.DataFrame({
+        'consultas': grupos.size(),
+        'p50_ms': grupos['latencia_ms'].quantile(0.50),
+        'p95_ms': grupos['latencia_ms'].quantile(0.95),
+        'tasa_error': 1 - grupos['ok'].mean(),
+    }).reset_index()
+
+
+def antiguedad_series(ahora=None):
+    """
+    Antigüedad de cada serie cacheada: última observación, última escritura
+    del archivo de caché y días transcurridos desde cada una.
+    """
+    import pandas as pd
+    from .api_helpers import CACHE_DIR, archivo_serie, leer_serie_cache, series_registradas
+
+    # Todo en UTC sin zona, igual que los ts del registro
+    ahora = pd.Timestamp(time.time(), unit='s') if ahora is None else pd.Timestamp(ahora)
+    filas = []
+    for nombre in series_registradas():
+        ruta = os.path.join(CACHE_DIR, archivo_serie(nombre))
+        df = leer_serie_cache(nombre) if os.path.exists(ruta) else None
+        ultima_obs = df['fecha'].iloc[-1] if df is not None and not df.empty else pd.NaT
+        escrita = pd.Timestamp(os.path.getmtime(ruta), unit='s') if os.path.exists(ruta) else pd.NaT
+        filas.append({
+            'serie': nombre,
+            'ultima_observacion': ultima_obs,
+            'dias_desde_observacion': (ahora - ultima_obs).days if pd.notna(ultima_obs) else None,
+            'ultima_escritura': escrita,
+            'horas_desde_escritura': round((ahora - escrita).total_seconds() / 3600, 1) if pd.notna(escrita) else None,
+        })
+    return pd.DataFrame(filas)
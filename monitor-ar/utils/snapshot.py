@@ -0,0 +1,218 @@
+import os
+import json
+import mmap
+import time
+import struct
+import tempfile
+import threading
+
+# Formato del bundle:
+#   MAGIA (8 bytes) | largo del header (uint64 LE) | header JSON | bloques alineados a 8 bytes
+# Cada serie ocupa dos bloques contiguos: n int64 (días desde epoch) + n float64 (valores).
+# Cada figura es un bloque de bytes con su JSON de Plotly ya optimizado.
+MAGIA = b'MARSNAP1'
+_PREFIJO = struct.Struct('<8sQ')
+
+
+def _alinear(n):
+    return (n + 7) & ~7
+
+
+def escribir_snapshot(ruta, series, derivados=None, figuras=None):
+    """
+    Escribe el bundle de forma atómica (archivo temporal + rename).
+
+    series: {nombre: {'data': DataFrame fecha/valor, 'desde_cache': bool, 'actualizado': ts}}
+    derivados: dict JSON-serializable con indicadores calculados.
+    figuras: {nombre: str JSON de la figura}.
+    """
+    import numpy as np
+
+    bloques = []
+    offset = 0
+    header = {'creado': time.time(), 'series': {}, 'derivados': derivados or {}, 'figuras': {}}
+
+    for nombre, info in series.items():
+        df = info.get('data')
+        if df is None or df.empty:
+            continue
+        dias = df['fecha'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        valores = df['valor'].to_numpy(dtype=np.float64)
+        header['series'][nombre] = {
+            'offset': offset,
+            'n': len(df),
+            'desde_cache': bool(info.get('desde_cache', False)),
+            'actualizado': info.get('actualizado', header['creado']),
+        }
+        bloques.append(dias.tobytes() + valores.tobytes())
+        offset += len(bloques[-1])
+
+    for nombre, fig_json in (figuras or {}).items():
+        datos = fig_json.encode('utf-8')
+        header['figuras'][nombre] = {'offset': offset, 'bytes': len(datos)}
+        relleno = _alinear(len(datos)) - len(datos)
+        bloques.append(datos + b'\0' * relleno)
+        offset += len(bloques[-1])
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    inicio_datos = _alinear(_PREFIJO.size + len(header_bytes))
+
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    # Temporal único por escritor: dos procesos refrescando a la vez no se pisan
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix=os.path.basename(ruta) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREFIJO.pack(MAGIA, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * (inicio_datos - _PREFIJO.size - len(header_bytes)))
+            for bloque in bloques:
+                f.write(bloque)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+class SnapshotMapeado:
+    """
+    Bundle mapeado en memoria. Solo se parsea el header al abrir; cada serie
+    o figura se lee del mapa recién cuando se pide (y se memoriza).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, largo = _PREFIJO.unpack_from(self._mm, 0)
+        if magia != MAGIA:
+            raise ValueError(f"{ruta} no es un snapshot de Monitor AR")
+        self.header = json.loads(self._mm[_PREFIJO.size:_PREFIJO.size + largo])
+        self._base = _alinear(_PREFIJO.size + largo)
+        self._series = {}
+
+    @property
+    def creado(self):
+        return self.header['creado']
+
+    def edad(self):
+        """Segundos desde que se escribió el snapshot."""
+        return time.time() - self.creado
+
+    def series_disponibles(self):
+        return list(self.header['series'])
+
+    def info_serie(self, nombre):
+        return self.header['series'].get(nombre)
+
+    def serie(self, nombre):
+        """DataFrame fecha/valor de la serie (None si no está en el bundle)."""
+        if nombre in self._series:
+            return self._series[nombre]
+        info = self.header['series'].get(nombre)
+        if info is None:
+            return None
+        import numpy as np
+        import pandas as pd
+
+        inicio = self._base + info['offset']
+        n = info['n']
+        dias = np.frombuffer(self._mm, dtype=np.int64, count=n, offset=inicio)
+        valores = np.frombuffer(self._mm, dtype=np.float64, count=n, offset=inicio + 8 * n)
+        df = pd.DataFrame({
+            'fecha': pd.to_datetime(dias, unit='D'),
+            'valor': valores.copy(),
+        })
+        self._series[nombre] = df
+        return df
+
+    def derivado(self, nombre, defecto=None):
+        return self.header['derivados'].get(nombre, defecto)
+
+    def figura_json(self, nombre):
+        """JSON de la figura tal como se guardó (None si no está)."""
+        info = self.header['figuras'].get(nombre)
+        if info is None:
+            return None
+        inicio = self._base + info['offset']
+        return self._mm[inicio:inicio + info['bytes']].decode('utf-8')
+
+    def cerrar(self):
+        self._series.clear()
+        self._mm.close()
+
+
+def abrir_snapshot(ruta):
+    """Abre el bundle si existe y es válido; None en caso contrario."""
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return SnapshotMapeado(ruta)
+    except Exception as e:
+        print(f"⚠️ Snapshot inválido {ruta}: {e}")
+        return None
+
+
+class SnapshotVivo:
+    """
+    Acceso al snapshot vigente: vuelve a mapear el archivo solo cuando cambió
+    en disco (un stat por consulta). Los mapas viejos siguen válidos para
+    quien los tenga, porque el reemplazo es atómico.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._snapshot = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def actual(self):
+        try:
+            mtime = os.stat(self.ruta).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if mtime != self._mtime:
+                self._snapshot = abrir_snapshot(self.ruta)
+                self._mtime = mtime
+            return self._snapshot
+
+
+class RefrescoSegundoPlano:
+    """
+    Ejecuta `funcion` en un hilo daemon cada `intervalo` segundos. Con
+    `inmediato=True` corre también al iniciar; si no, la primera vez es
+    recién al cumplirse el intervalo.
+    """
+
+    def __init__(self, funcion, intervalo, nombre='refresco-snapshot', inmediato=True):
+        self.funcion = funcion
+        self.intervalo = intervalo
+        self.inmediato = inmediato
+        self.ultimo_ok = None
+        self.ultimo_error = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name=nombre, daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+
+    def _bucle(self):
+        if not self.inmediato:
+            self._detener.wait(self.intervalo)
+        while not self._detener.is_set():
+            try:
+                self.funcion()
+                self.ultimo_ok = time.time()
+                self.ultimo_error = None
+            except Exception as e:
+                self.ultimo_error = str(e)
+                print(f"⚠️ Error refrescando snapshot: {e}")
+            self._detener.wait(self.intervalo)
@@ -0,0 +1,170 @@
+import re
+import csv
+import json
+from array import array
+from datetime import date
+
+# Días entre 0001-01-01 (ordinal 1) y 1970-01-01: ordinal → días desde epoch
+_ORDINAL_EPOCH = date(1970, 1, 1).toordinal()
+
+TAMANIO_BLOQUE = 64 * 1024
+
+
+class SerieTipada:
+    """
+    Acumulador de observaciones en arrays tipados (int64 días desde epoch +
+    float64 valores): 16 bytes por observación, sin DataFrame intermedio.
+    """
+
+    def __init__(self):
+        self.dias = array('q')
+        self.valores = array('d')
+
+    def agregar(self, fecha, valor):
+        """Agrega una observación; descarta filas sin fecha o valor numérico."""
+        if fecha is None or valor is None or valor == '':
+            return
+        try:
+            v = float(valor)
+            d = date.fromisoformat(str(fecha)[:10]).toordinal() - _ORDINAL_EPOCH
+        except (TypeError, ValueError):
+            return
+        if v != v:  # NaN
+            return
+        self.dias.append(d)
+        self.valores.append(v)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def a_dataframe(self):
+        """DataFrame fecha/valor ordenado por fecha (None si no hay observaciones)."""
+        if not len(self):
+            return None
+        import numpy as np
+        import pandas as pd
+
+        dias = np.frombuffer(self.dias, dtype=np.int64)
+        valores = np.frombuffer(self.valores, dtype=np.float64)
+        orden = np.argsort(dias, kind='stable')
+        return pd.DataFrame({
+            'fecha': pd.to_datetime(dias[orden], unit='D'),
+            'valor': valores[orden],
+        })
+
+
+def _lineas(respuesta):
+    if respuesta.encoding is None:
+        respuesta.encoding = 'utf-8'
+    for linea in respuesta.iter_lines(chunk_size=TAMANIO_BLOQUE, decode_unicode=True):
+        if linea:
+            yield linea
+
+
+def leer_csv_streaming(respuesta, columna_fecha, columna_valor):
+    """
+    Parsea un CSV fila a fila desde una respuesta `stream=True`, quedándose
+    solo con fecha y valor. `columna_valor` puede ser el nombre de la columna
+    o una función que recibe el header y devuelve el nombre.
+    Retorna DataFrame fecha/valor (None si no hay filas válidas).
+    Lanza ValueError si faltan las columnas.
+    """
+    try:
+        lector = csv.reader(_lineas(respuesta))
+        header = [c.lstrip('\ufeff').strip() for c in next(lector, [])]
+        if callable(columna_valor):
+            columna_valor = columna_valor(header)
+        if columna_fecha not in header or columna_valor not in header:
+            raise ValueError(f"Columnas {columna_fecha}/{columna_valor} ausentes en CSV")
+        i_fecha = header.index(columna_fecha)
+        i_valor = header.index(columna_valor)
+        ancho = max(i_fecha, i_valor)
+
+        serie = SerieTipada()
+        for fila in lector:
+            if len(fila) > ancho:
+                serie.agregar(fila[i_fecha], fila[i_valor])
+        return serie.a_dataframe()
+    finally:
+        respuesta.close()
+
+
+def _fecha_valor(elemento):
+    if isinstance(elemento, dict):
+        return elemento.get('fecha'), elemento.get('valor')
+    if isinstance(elemento, (list, tuple)) and len(elemento) >= 2:
+        return elemento[0], elemento[1]
+    return None, None
+
+
+def iterar_array_json(bloques, clave):
+    """
+    Itera los elementos del array `clave` de un objeto JSON a medida que llegan
+    los bloques, sin materializar el documento. Solo retiene en memoria el
+    elemento en curso y el bloque pendiente.
+    """
+    decoder = json.JSONDecoder()
+    patron = re.compile(r'"%s"\s*:\s*\[' % re.escape(clave))
+    buffer = ''
+    fuente = iter(bloques)
+
+    def leer_mas():
+        nonlocal buffer
+        bloque = next(fuente, None)
+        if bloque is None:
+            return False
+        buffer += bloque.decode('utf-8') if isinstance(bloque, bytes) else bloque
+        return True
+
+    # 1) Avanzar hasta el inicio del array
+    while True:
+        encontrado = patron.search(buffer)
+        if encontrado:
+            buffer = buffer[encontrado.end():]
+            break
+        if not leer_mas():
+            return
+
+    # 2) Decodificar elemento por elemento
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            buffer, pos = '', 0
+            if not leer_mas():
+                return
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            elemento, fin = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Elemento incompleto: traer más datos (o fallar si no hay más)
+            buffer, pos = buffer[pos:], 0
+            if not leer_mas():
+                raise
+            continue
+        yield elemento
+        pos = fin
+        if pos > TAMANIO_BLOQUE:
+            buffer, pos = buffer[pos:], 0
+
+
+def leer_json_streaming(respuesta, clave):
+    """
+    Parsea el array `clave` ('results' de BCRA, 'data' de datos.gob) desde una
+    respuesta `stream=True`, guardando solo fecha/valor en arrays tipados.
+    Acepta registros dict ({'fecha', 'valor', ...}) o filas [fecha, valor].
+    Retorna DataFrame fecha/valor (None si el array falta o está vacío).
+    """
+    try:
+        if respuesta.encoding is None:
+            respuesta.encoding = 'utf-8'
+        serie = SerieTipada()
+        bloques = respuesta.iter_content(chunk_size=TAMANIO_BLOQUE, decode_unicode=True)
+        for elemento in iterar_array_json(bloques, clave):
+            serie.agregar(*_fecha_valor(elemento))
+        return serie.a_dataframe()
+    finally:
+        respuesta.close()
@@ -0,0 +1,295 @@
+import io
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Trabajos de analítica pesada (descomposición estacional, regresiones móviles,
+# remuestreos largos) que no deben correr en el hilo del script de Streamlit.
+#
+# Cada trabajo corre en un pool de procesos (sin GIL compartido) y su resultado
+# se guarda en _trabajos/<clave>.pkl. La clave sale del trabajo, sus parámetros
+# y el hash de contenido de las series de entrada: mientras los datos no
+# cambien, pedir el mismo trabajo devuelve el resultado ya calculado, desde
+# cualquier sesión o proceso (aunque la serie se haya desalojado y vuelto a
+# descargar igual). Las páginas envían el trabajo y sondean su estado.
+TRABAJOS_DIR = '_trabajos'
+MAX_WORKERS = int(os.environ.get('MONITOR_AR_TRABAJOS_WORKERS', '0')) or max(1, (os.cpu_count() or 2) - 1)
+MAX_RESULTADOS = 200
+MAX_RESULTADOS_EN_MEMORIA = 16
+
+ESTADOS = ('listo', 'en_curso', 'error', 'desconocido')
+
+
+# ─── Trabajos disponibles ──────────────────────────────────────────────────
+# Funciones de módulo (el worker las importa por nombre): reciben
+# {nombre: DataFrame fecha/valor} y los parámetros del trabajo.
+
+def _descomposicion(series, periodo=12, modelo='aditivo'):
+    from .analitica import descomposicion_estacional
+    (df,) = series.values()
+    return descomposicion_estacional(df, periodo, modelo)
+
+
+def _regresion_movil(series, ventana=60, frecuencia='habil'):
+    from .analitica import alinear_series, regresion_movil
+    y, x = series
+    return regresion_movil(alinear_series(series, frecuencia), y, x, ventana)
+
+
+def _remuestreo(series, frecuencia='mensual', metodo='promedio', desde=None, hasta=None):
+    from .analitica import alinear_series
+    return alinear_series(series, frecuencia, metodo, desde=desde, hasta=hasta)
+
+
+# nombre -> (función, cantidad de series de entrada o None si acepta cualquiera)
+TRABAJOS = {
+    'descomposicion': (_descomposicion, 1),
+    'regresion_movil': (_regresion_movil, 2),
+    'remuestreo': (_remuestreo, None),
+}
+
+
+def _leer_serie(directorio, nombre, hash_esperado=None):
+    """
+    Lee una serie cacheada dentro del worker. No pasa por leer_serie_cache:
+    los workers no deben competir con la app por escribir el índice de caché.
+
+    El CSV se publica siempre con os.replace (ver utils.revisiones), así que
+    una sola lectura ve una vista completa. Si se pasa `hash_esperado`, se
+    verifica que esa vista sea la del envío: si una revisión llegó en el
+    medio, el trabajo falla en vez de guardar el resultado bajo una clave
+    que no le corresponde (el próximo envío ya usa la clave nueva).
+    """
+    import pandas as pd
+    from .api_helpers import archivo_serie
+    from .revisiones import hash_csv
+
+    ruta = os.path.join(directorio, archivo_serie(nombre))
+    try:
+        with open(ruta, 'rb') as f:
+            datos = f.read()
+    except FileNotFoundError:
+        raise ValueError(f"Serie sin caché: {nombre}")
+    # Un CSV que nunca pasó por la historia de revisiones se registra con el SHA-1 del archivo
+    if hash_esperado is not None and hash_esperado not in (hash_csv(datos), hashlib.sha1(datos).hexdigest()):
+        raise ValueError(f"La serie {nombre} cambió desde que se encoló el trabajo")
+    df = pd.read_csv(io.BytesIO(datos), usecols=['fecha', 'valor'])
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+    return df.dropna().sort_values('fecha')
+
+
+def _ejecutar(trabajo, nombres, parametros, directorio, ruta_resultado, hashes=None):
+    """Punto de entrada en el proceso worker. Retorna segundos de cómputo."""
+    inicio = time.perf_counter()
+    funcion, _ = TRABAJOS[trabajo]
+    hashes = hashes or [None] * len(nombres)
+    series = {nombre: _leer_serie(directorio, nombre, h) for nombre, h in zip(nombres, hashes)}
+    resultado = funcion(series, **parametros)
+    temporal = f'{ruta_resultado}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta_resultado)
+    return time.perf_counter() - inicio
+
+
+def clave_trabajo(trabajo, nombres, parametros, hashes):
+    """Clave de contenido: cambia si cambia el trabajo, un parámetro o los datos de una serie."""
+    contenido = json.dumps([trabajo, list(nombres), list(hashes), parametros], sort_keys=True, default=str)
+    return hashlib.sha1(contenido.encode()).hexdigest()[:20]
+
+
+class GestorTrabajos:
+    """
+    Envía trabajos a un pool de procesos y guarda sus resultados por clave.
+
+    El pool se crea recién con el primer trabajo que no está calculado, con
+    contexto 'spawn': hacer fork de un proceso con los hilos de Streamlit
+    puede dejar locks tomados en el hijo.
+    """
+
+    def __init__(self, directorio, max_workers=MAX_WORKERS):
+        self.directorio = directorio
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._futuros = {}
+        self._errores = {}
+        self._memoria = OrderedDict()
+
+    @property
+    def ruta_resultados(self):
+        return os.path.join(self.directorio, TRABAJOS_DIR)
+
+    def _ruta(self, clave):
+        return os.path.join(self.ruta_resultados, clave + '.pkl')
+
+    def _ejecutor(self):
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    # ─── Envío ─────────────────────────────────────────────────────────────
+
+    def enviar(self, trabajo, nombres, reintentar=False, **parametros):
+        """
+        Encola un trabajo sobre series cacheadas y retorna su clave.
+        Si el resultado ya existe o el mismo trabajo está en curso, no encola nada.
+        Un trabajo que falló solo se reencola con `reintentar=True`: las páginas
+        lo envían en cada rerun y no deben repetir un error en bucle.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        from .api_helpers import hash_serie
+
+        if trabajo not in TRABAJOS:
+            raise ValueError(f"Trabajo desconocido: {trabajo}")
+        nombres = list(nombres)
+        esperadas = TRABAJOS[trabajo][1]
+        if esperadas is not None and len(nombres) != esperadas:
+            raise ValueError(f"{trabajo} espera {esperadas} series, recibió {len(nombres)}")
+
+        hashes = [hash_serie(n) for n in nombres]
+        clave = clave_trabajo(trabajo, nombres, parametros, hashes)
+        with self._lock:
+            if clave in self._futuros or os.path.exists(self._ruta(clave)):
+                return clave
+            if clave in self._errores and not reintentar:
+                return clave
+            self._errores.pop(clave, None)
+            os.makedirs(self.ruta_resultados, exist_ok=True)
+            argumentos = (_ejecutar, trabajo, nombres, parametros, self.directorio, self._ruta(clave), hashes)
+            try:
+                futuro = self._ejecutor().submit(*argumentos)
+            except BrokenProcessPool:
+                # Un worker murió (ej. sin memoria): se descarta el pool y se arma otro
+                print("⚠️ Pool de trabajos roto, se reinicia")
+                self._pool = None
+                futuro = self._ejecutor().submit(*argumentos)
+            self._futuros[clave] = futuro
+            print(f"🔄 Trabajo {trabajo} ({', '.join(nombres)}) encolado: {clave}")
+        futuro.add_done_callback(lambda f: self._terminado(clave, trabajo, f))
+        return clave
+
+    def _terminado(self, clave, trabajo, futuro):
+        with self._lock:
+            self._futuros.pop(clave, None)
+            try:
+                segundos = futuro.result()
+            except Exception as e:
+                self._errores[clave] = f"{type(e).__name__}: {e}"
+                print(f"❌ Trabajo {trabajo} ({clave}) falló: {e}")
+                return
+        print(f"✅ Trabajo {trabajo} ({clave}) listo en {segundos:.2f} s")
+        self._podar()
+
+    def _podar(self):
+        """Deja solo los MAX_RESULTADOS resultados más recientes en disco."""
+        try:
+            archivos = [e for e in os.scandir(self.ruta_resultados) if e.name.endswith('.pkl')]
+        except OSError:
+            return
+        if len(archivos) <= MAX_RESULTADOS:
+            return
+        archivos.sort(key=lambda e: e.stat().st_mtime)
+        for entrada in archivos[:len(archivos) - MAX_RESULTADOS]:
+            try:
+                os.remove(entrada.path)
+            except OSError:
+                pass
+
+    # ─── Sondeo ────────────────────────────────────────────────────────────
+
+    def estado(self, clave):
+        """'listo', 'en_curso', 'error' o 'desconocido' (nunca enviado en este proceso)."""
+        if clave in self._memoria or os.path.exists(self._ruta(clave)):
+            return 'listo'
+        with self._lock:
+            if clave in self._futuros:
+                return 'en_curso'
+            if clave in self._errores:
+                return 'error'
+        return 'desconocido'
+
+    def error(self, clave):
+        """Mensaje de error de un trabajo fallido (None si no falló)."""
+        with self._lock:
+            return self._errores.get(clave)
+
+    def esperar(self, clave, timeout=None):
+        """Bloquea hasta que el trabajo termine (para CLI y pruebas; las páginas sondean)."""
+        from concurrent.futures import wait
+        with self._lock:
+            futuro = self._futuros.get(clave)
+        if futuro is not None:
+            wait([futuro], timeout=timeout)
+            # El callback de fin corre en otro hilo: darle ocasión de anotar el resultado
+            limite = time.monotonic() + 1
+            while self.estado(clave) == 'en_curso' and time.monotonic() < limite:
+                time.sleep(0.01)
+        return self.estado(clave)
+
+    def resultado(self, clave):
+        """Resultado de un trabajo listo (None si todavía no está). Se memoriza en proceso."""
+        with self._lock:
+            if clave in self._memoria:
+                self._memoria.move_to_end(clave)
+                return self._memoria[clave]
+        try:
+            with open(self._ruta(clave), 'rb') as f:
+                resultado = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._memoria[clave] = resultado
+            while len(self._memoria) > MAX_RESULTADOS_EN_MEMORIA:
+                self._memoria.popitem(last=False)
+        return resultado
+
+    def cerrar(self, esperar=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+
+_gestores = {}
+_gestores_lock = threading.Lock()
+
+
+def obtener_gestor_trabajos(directorio=None):
+    """Gestor de trabajos compartido para un directorio de caché (por defecto CACHE_DIR)."""
+    if directorio is None:
+        from .api_helpers import CACHE_DIR
+        directorio = CACHE_DIR
+    clave = os.path.abspath(directorio)
+    with _gestores_lock:
+        if clave not in _gestores:
+            _gestores[clave] = GestorTrabajos(directorio)
+        return _gestores[clave]
+
+
+def main():
+    """Precalcula los trabajos estándar sobre la caché actual (ej. desde cron)."""
+    from .api_helpers import series_registradas
+
+    gestor = obtener_gestor_trabajos()
+    claves = [
+        gestor.enviar('descomposicion', ['EMAE']),
+        gestor.enviar('regresion_movil', ['BADLAR', 'TPM']),
+        gestor.enviar('remuestreo', series_registradas()),
+    ]
+    estados = [gestor.esperar(clave) for clave in claves]
+    gestor.cerrar()
+    return 0 if all(estado == 'listo' for estado in estados) else 1
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
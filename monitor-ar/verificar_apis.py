@@ -1,3 +1,7 @@
+"""
+Verificación manual contra las APIs reales (requiere red).
+Las pruebas automatizadas, offline, están en tests/ (correr con `pytest`).
+"""
 import sys
 from datetime import datetime
 from utils.api_helpers import obtener_tasas_bcra, obtener_emae
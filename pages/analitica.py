@@ -0,0 +1,134 @@
+import streamlit as st
+from utils.api_helpers import version_serie, series_registradas
+from utils.trabajos import obtener_gestor_trabajos
+
+st.set_page_config(
+    page_title="Monitor AR - Analítica",
+    page_icon="🧮",
+    layout="wide"
+)
+
+# Estilo oscuro tipo terminal Bloomberg
+st.markdown("""
+<style>
+    .stApp {
+        background-color: #0e1117;
+        color: #00ff41;
+    }
+    h1, h2, h3 {
+        color: #00ff41;
+        font-family: 'Courier New', monospace;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+st.title("🧮 Monitor AR - Analítica")
+st.caption("Cálculos pesados en segundo plano: se calculan una vez por contenido de las series y se reutilizan")
+st.markdown("---")
+
+# Cada cuánto se consulta el estado de un trabajo en curso (segundos)
+INTERVALO_SONDEO = 2
+
+gestor = obtener_gestor_trabajos()
+
+@st.fragment(run_every=INTERVALO_SONDEO)
+def esperar_trabajo(clave, descripcion):
+    """Sondea un trabajo en curso; al terminar rerenderiza la página con el resultado."""
+    estado = gestor.estado(clave)
+    if estado == 'listo':
+        st.rerun()
+    elif estado == 'error':
+        st.error(f"❌ {descripcion}: {gestor.error(clave)}")
+        if st.button("🔁 Reintentar", key=f"reintentar_{clave}"):
+            st.session_state[f'reintentar_{descripcion}'] = True
+            st.rerun()
+    else:
+        st.info(f"⏳ {descripcion}: calculando en segundo plano...")
+
+def resultado_trabajo(descripcion, trabajo, nombres, **parametros):
+    """
+    Envía el trabajo (no hace nada si ya está calculado o en curso) y retorna
+    su resultado, o None mientras se calcula.
+    """
+    faltantes = [n for n in nombres if not version_serie(n)]
+    if faltantes:
+        st.warning(f"⚠️ {descripcion}: sin caché para {', '.join(faltantes)}. Abrí el dashboard para descargarlas.")
+        return None
+    reintentar = st.session_state.pop(f'reintentar_{descripcion}', False)
+    clave = gestor.enviar(trabajo, nombres, reintentar=reintentar, **parametros)
+    if gestor.estado(clave) == 'listo':
+        return gestor.resultado(clave)
+    esperar_trabajo(clave, descripcion)
+    return None
+
+def figura_descomposicion(df):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from utils.graficos import optimizar_payload
+
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        subplot_titles=("Serie y tendencia", "Componente estacional", "Residuo"))
+    fig.add_trace(go.Scatter(x=df.index, y=df['valor'], name='EMAE', line=dict(color='#00ff41')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['tendencia'], name='Tendencia', line=dict(color='#ff9800')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['estacional'], name='Estacional', line=dict(color='#2196f3')), row=2, col=1)
+    fig.add_trace(go.Bar(x=df.index, y=df['residuo'], name='Residuo', marker_color='#9e9e9e'), row=3, col=1)
+    fig.update_layout(template='plotly_dark', height=700, showlegend=False, margin=dict(l=50, r=20, t=50, b=40))
+    return optimizar_payload(fig, etiqueta="descomposición EMAE")
+
+def figura_regresion(df, y, x):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from utils.graficos import optimizar_payload
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=(f"Beta de {y} sobre {x}", "R²"))
+    fig.add_trace(go.Scatter(x=df.index, y=df['beta'], name='Beta', line=dict(color='#00ff41')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=df['r2'], name='R²', line=dict(color='#ff9800')), row=2, col=1)
+    fig.update_layout(template='plotly_dark', height=500, showlegend=False, margin=dict(l=50, r=20, t=50, b=40))
+    return optimizar_payload(fig, etiqueta=f"regresión {y}~{x}")
+
+# ─── Descomposición estacional del EMAE ────────────────────────────────────
+
+st.subheader("📈 EMAE: descomposición estacional")
+modelo = st.radio("Modelo", ['aditivo', 'multiplicativo'], horizontal=True)
+descomposicion = resultado_trabajo("Descomposición EMAE", 'descomposicion', ['EMAE'], modelo=modelo)
+if descomposicion is not None:
+    st.plotly_chart(figura_descomposicion(descomposicion), use_container_width=True)
+
+st.markdown("---")
+
+# ─── Regresión móvil entre tasas ───────────────────────────────────────────
+
+st.subheader("📉 Regresión móvil entre tasas")
+col_y, col_x, col_ventana = st.columns(3)
+tasas = ['BADLAR', 'TPM', 'PF_USD']
+y = col_y.selectbox("Variable explicada", tasas, index=0)
+x = col_x.selectbox("Variable explicativa", [t for t in tasas if t != y], index=0)
+ventana = col_ventana.select_slider("Ventana (días hábiles)", [20, 60, 120, 250], value=60)
+regresion = resultado_trabajo(f"Regresión {y}~{x}", 'regresion_movil', [y, x], ventana=ventana)
+if regresion is not None:
+    ultima = regresion.dropna().tail(1)
+    if not ultima.empty:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Beta", f"{ultima['beta'].iloc[0]:.3f}")
+        col2.metric("Alfa", f"{ultima['alfa'].iloc[0]:.2f}")
+        col3.metric("R²", f"{ultima['r2'].iloc[0]:.2f}")
+    st.plotly_chart(figura_regresion(regresion, y, x), use_container_width=True)
+
+st.markdown("---")
+
+# ─── Remuestreo de todas las series ────────────────────────────────────────
+
+st.subheader("🗓️ Series remuestreadas")
+frecuencia = st.radio("Frecuencia", ['mensual', 'trimestral'], horizontal=True)
+nombres = [n for n in series_registradas() if version_serie(n)]
+if nombres:
+    remuestreo = resultado_trabajo("Remuestreo", 'remuestreo', nombres, frecuencia=frecuencia)
+    if remuestreo is not None:
+        st.dataframe(remuestreo.sort_index(ascending=False), use_container_width=True)
+else:
+    st.info("ℹ️ Todavía no hay series en caché.")
+
+st.markdown("---")
+st.caption("🧮 Los cálculos corren en procesos aparte y se guardan por contenido de las series: "
+           "solo se recalculan cuando llega un dato nuevo o una revisión.")
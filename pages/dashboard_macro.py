@@ -1,8 +1,7 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime
-from utils.api_helpers import obtener_tasas_bcra, obtener_emae
+from datetime import date, datetime
+from utils.api_helpers import (obtener_tasa_bcra, obtener_emae, obtener_serie_datos_gob, version_serie,
+                               leer_serie_cache, series_registradas)
 
 st.set_page_config(
     page_title="Monitor AR - Dashboard Macro",
@@ -43,195 +42,339 @@ st.markdown("""
 st.title("📊 Monitor AR - Dashboard Macroeconómico")
 st.markdown("---")
 
-# Obtener datos
-with st.spinner("Cargando datos de tasas BCRA..."):
-    tasas_bcra = obtener_tasas_bcra()
+# Intervalos de refresco por panel (segundos). Las tasas BCRA se publican a diario;
+# el EMAE es mensual, así que se consulta con mucha menos frecuencia.
+INTERVALO_TASAS = 15 * 60
+INTERVALO_EMAE = 6 * 60 * 60
 
-with st.spinner("Cargando datos de EMAE..."):
-    emae_data = obtener_emae()
+# Sondeo de versiones de series: barato (lee el índice de caché), así que los
+# paneles lo hacen seguido y solo rearman el gráfico si la serie cambió.
+INTERVALO_SONDEO = 30
 
-# === SECCIÓN: TASAS BCRA ===
-st.header("💰 Tasas de Interés (BCRA)")
+# Origen de datos por panel, para el aviso de caché del footer
+if 'paneles_desde_cache' not in st.session_state:
+    st.session_state['paneles_desde_cache'] = {}
+
+@st.cache_data(ttl=INTERVALO_TASAS, show_spinner=False)
+def cargar_tasa(nombre):
+    """Tasa BCRA compartida entre sesiones; se reconsulta cada INTERVALO_TASAS."""
+    return obtener_tasa_bcra(nombre)
+
+@st.cache_data(ttl=INTERVALO_EMAE, show_spinner=False)
+def cargar_emae():
+    """EMAE compartido entre sesiones; se reconsulta cada INTERVALO_EMAE."""
+    return obtener_emae()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def serie_por_version(nombre, version):
+    """Serie leída de caché para una versión dada; solo se relee cuando la versión avanza."""
+    return leer_serie_cache(nombre)
+
+def clave_contenido(df):
+    """
+    Clave de contenido de un DataFrame sin versión de caché (ej. si la escritura
+    en caché falló): cambia con los datos, así las figuras no quedan fijadas.
+    """
+    import pandas as pd
+
+    if df is None or df.empty:
+        return None
+    return ('contenido', len(df), int(pd.util.hash_pandas_object(df, index=False).sum()))
+
+def datos_vigentes(nombre, info):
+    """
+    DataFrame a mostrar y su clave de versión. Si la serie está en caché se usa
+    la versión vigente (que pudo escribir otra sesión o proceso); si no, lo
+    obtenido en vivo, con una clave derivada del contenido.
+    """
+    version = version_serie(nombre)
+    if version:
+        df = serie_por_version(nombre, version)
+        if df is not None:
+            return df, version
+    df = info.get('data')
+    return df, clave_contenido(df)
 
-col1, col2, col3 = st.columns(3)
+# Paneles de tasas: (clave de serie, título, color)
+PANELES_TASAS = [
+    ('TPM', "Tasa de Política Monetaria (TPM)", '#00ff41'),
+    ('BADLAR', "BADLAR", '#ffa500'),
+    ('PF_USD', "Plazo Fijo USD", '#00bfff'),
+]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def figura_tasas(versiones, _series):
+    """
+    Figura única (small multiples) de las tasas, cacheada por la tupla de
+    claves de versión de las series (los DataFrames no se hashean).
+    """
+    from utils.graficos import crear_panel_multiple
+
+    return crear_panel_multiple(_series)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def figura_emae(version, _df):
+    """Figura EMAE, cacheada por la clave de versión de la serie (el DataFrame no se hashea)."""
+    import plotly.graph_objects as go
+    from utils.graficos import optimizar_payload
+
+    fig_emae = go.Figure()
+    fig_emae.add_trace(go.Scatter(
+        x=_df['fecha'],
+        y=_df['valor'],
+        mode='lines',
+        name='EMAE',
+        line=dict(color='#00ff41', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(0, 255, 65, 0.1)'
+    ))
+    fig_emae.update_layout(
+        template='plotly_dark',
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0),
+        showlegend=False,
+        paper_bgcolor='#0e1117',
+        plot_bgcolor='#1a1d23',
+        yaxis_title="Índice (base 2004=100)"
+    )
+    return optimizar_payload(fig_emae, etiqueta='EMAE')
+
+@st.fragment(run_every=INTERVALO_SONDEO)
+def panel_tasas():
+    """
+    Panel de tasas BCRA. Se recalcula solo, sin rerun del resto de la página.
+    Cada sondeo compara las versiones de las series; el gráfico se rearma solo si cambiaron.
+    """
+    columnas = st.columns(len(PANELES_TASAS))
+    series = []
+    versiones = []
+    
+    for col, (nombre, titulo, color) in zip(columnas, PANELES_TASAS):
+        info = cargar_tasa(nombre)
+        df, version = datos_vigentes(nombre, info)
+        desde_cache = info.get('desde_cache', False)
+        st.session_state['paneles_desde_cache'][nombre] = desde_cache
+        series.append({'nombre': nombre, 'titulo': titulo, 'df': df, 'color': color})
+        versiones.append(version)
+        
+        with col:
+            titulo_html = titulo
+            if desde_cache:
+                titulo_html += ' <span class="cache-badge">CACHE</span>'
+            
+            st.markdown(f"### {titulo_html}", unsafe_allow_html=True)
+            
+            if df is not None and not df.empty:
+                ultimo_valor = df.iloc[-1]['valor']
+                ultima_fecha = df.iloc[-1]['fecha'].strftime('%Y-%m-%d')
+                
+                st.metric(
+                    label=f"Última tasa ({ultima_fecha})",
+                    value=f"{ultimo_valor:.2f}%"
+                )
+            else:
+                st.warning(f"⚠️ No hay datos disponibles para {titulo}")
+    
+    if any(s['df'] is not None and not s['df'].empty for s in series):
+        st.plotly_chart(figura_tasas(tuple(versiones), series), use_container_width=True)
 
-# TPM
-with col1:
-    tpm_info = tasas_bcra.get('TPM', {})
-    df_tpm = tpm_info.get('data')
-    cache_tpm = tpm_info.get('desde_cache', False)
+@st.fragment(run_every=INTERVALO_SONDEO)
+def panel_emae():
+    """
+    Panel EMAE. Se recalcula solo, sin rerun del resto de la página.
+    Cada sondeo compara la versión de la serie; el gráfico se rearma solo si cambió.
+    """
+    emae_data = cargar_emae()
+    df_emae, version = datos_vigentes('EMAE', emae_data)
+    cache_emae = emae_data.get('desde_cache', False)
+    st.session_state['paneles_desde_cache']['EMAE'] = cache_emae
     
-    titulo_tpm = "Tasa de Política Monetaria (TPM)"
-    if cache_tpm:
-        titulo_tpm += ' <span class="cache-badge">CACHE</span>'
+    titulo_emae = "Estimador Mensual de Actividad Económica"
+    if cache_emae:
+        titulo_emae += ' <span class="cache-badge">CACHE</span>'
     
-    st.markdown(f"### {titulo_tpm}", unsafe_allow_html=True)
+    st.markdown(f"### {titulo_emae}", unsafe_allow_html=True)
     
-    if df_tpm is not None and not df_tpm.empty:
-        ultimo_valor = df_tpm.iloc[-1]['valor']
-        ultima_fecha = df_tpm.iloc[-1]['fecha'].strftime('%Y-%m-%d')
+    if df_emae is not None and not df_emae.empty:
+        ultimo_valor = df_emae.iloc[-1]['valor']
+        ultima_fecha = df_emae.iloc[-1]['fecha'].strftime('%Y-%m-%d')
         
-        st.metric(
-            label=f"Última tasa ({ultima_fecha})",
-            value=f"{ultimo_valor:.2f}%"
-        )
+        col1, col2 = st.columns([1, 3])
         
-        fig_tpm = go.Figure()
-        fig_tpm.add_trace(go.Scatter(
-            x=df_tpm['fecha'],
-            y=df_tpm['valor'],
-            mode='lines',
-            name='TPM',
-            line=dict(color='#00ff41', width=2)
-        ))
-        fig_tpm.update_layout(
-            template='plotly_dark',
-            height=300,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=False,
-            paper_bgcolor='#0e1117',
-            plot_bgcolor='#1a1d23'
-        )
-        st.plotly_chart(fig_tpm, use_container_width=True)
+        with col1:
+            st.metric(
+                label=f"Último valor ({ultima_fecha})",
+                value=f"{ultimo_valor:.2f}"
+            )
+            st.caption(f"Base 2004 = 100")
+            st.caption(f"Total de observaciones: {len(df_emae)}")
+        
+        with col2:
+            st.plotly_chart(figura_emae(version, df_emae), use_container_width=True)
     else:
-        st.warning("⚠️ No hay datos disponibles para TPM")
+        st.warning("⚠️ No hay datos disponibles para EMAE. Verifique su conexión o intente más tarde.")
+
+@st.cache_data(ttl=INTERVALO_EMAE, show_spinner=False)
+def cargar_serie_catalogo(serie_id):
+    """Serie agregada desde el catálogo, compartida entre sesiones."""
+    return obtener_serie_datos_gob(serie_id)
 
-# BADLAR
-with col2:
-    badlar_info = tasas_bcra.get('BADLAR', {})
-    df_badlar = badlar_info.get('data')
-    cache_badlar = badlar_info.get('desde_cache', False)
+@st.cache_data(show_spinner=False, max_entries=16)
+def figura_series_usuario(claves, _series):
+    """Small multiples de las series agregadas, cacheado por (id, versión) de cada una."""
+    from utils.graficos import crear_panel_multiple
+
+    return crear_panel_multiple(_series, compartir_x=False)
+
+@st.fragment
+def panel_catalogo():
+    """
+    Búsqueda en el índice local del catálogo de datos.gob.ar. Cada búsqueda es
+    una consulta SQLite de milisegundos: no hay solicitudes a la API por tecla.
+    """
+    from utils.catalogo import (indice_disponible, construir_indice, buscar, valores_filtro,
+                                agregar_serie_usuario)
     
-    titulo_badlar = "BADLAR"
-    if cache_badlar:
-        titulo_badlar += ' <span class="cache-badge">CACHE</span>'
+    if not indice_disponible():
+        st.info("ℹ️ El índice del catálogo todavía no se descargó (se hace una sola vez).")
+        if st.button("⬇️ Descargar catálogo de series"):
+            with st.spinner("Descargando e indexando el catálogo de datos.gob.ar..."):
+                try:
+                    construir_indice()
+                except Exception as e:
+                    st.error(f"⚠️ No se pudo descargar el catálogo: {e}")
+                    return
+            st.rerun()
+        return
     
-    st.markdown(f"### {titulo_badlar}", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        texto = st.text_input("Buscar series", placeholder="ej. emae desestacionalizado, tipo de cambio, ipc")
+    with col2:
+        frecuencia = st.selectbox("Frecuencia", ['(todas)'] + valores_filtro('frecuencia'))
+    with col3:
+        fuente = st.selectbox("Fuente", ['(todas)'] + valores_filtro('fuente'))
     
-    if df_badlar is not None and not df_badlar.empty:
-        ultimo_valor = df_badlar.iloc[-1]['valor']
-        ultima_fecha = df_badlar.iloc[-1]['fecha'].strftime('%Y-%m-%d')
-        
-        st.metric(
-            label=f"Última tasa ({ultima_fecha})",
-            value=f"{ultimo_valor:.2f}%"
-        )
-        
-        fig_badlar = go.Figure()
-        fig_badlar.add_trace(go.Scatter(
-            x=df_badlar['fecha'],
-            y=df_badlar['valor'],
-            mode='lines',
-            name='BADLAR',
-            line=dict(color='#ffa500', width=2)
-        ))
-        fig_badlar.update_layout(
-            template='plotly_dark',
-            height=300,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=False,
-            paper_bgcolor='#0e1117',
-            plot_bgcolor='#1a1d23'
-        )
-        st.plotly_chart(fig_badlar, use_container_width=True)
-    else:
-        st.warning("⚠️ No hay datos disponibles para BADLAR")
+    resultados = buscar(
+        texto,
+        frecuencia=None if frecuencia == '(todas)' else frecuencia,
+        fuente=None if fuente == '(todas)' else fuente
+    )
+    if not resultados:
+        st.caption("Sin resultados para esa búsqueda.")
+        return
+    
+    opciones = {
+        f"{r['titulo']} · {r['frecuencia']} · {r['fuente']} ({r['serie_id']})": r['serie_id']
+        for r in resultados
+    }
+    elegida = st.selectbox(f"Resultados ({len(resultados)})", list(opciones))
+    if st.button("➕ Agregar al dashboard"):
+        agregar_serie_usuario(opciones[elegida])
+        st.rerun()
 
-# Plazo Fijo USD
-with col3:
-    pf_usd_info = tasas_bcra.get('PF_USD', {})
-    df_pf_usd = pf_usd_info.get('data')
-    cache_pf_usd = pf_usd_info.get('desde_cache', False)
+def panel_series_usuario():
+    """Series agregadas desde el catálogo, en una sola figura."""
+    from utils.catalogo import series_usuario, quitar_serie_usuario
     
-    titulo_pf = "Plazo Fijo USD"
-    if cache_pf_usd:
-        titulo_pf += ' <span class="cache-badge">CACHE</span>'
+    registradas = series_usuario()
+    if not registradas:
+        st.caption("Todavía no se agregaron series desde el catálogo.")
+        return
     
-    st.markdown(f"### {titulo_pf}", unsafe_allow_html=True)
+    series = []
+    claves = []
+    for registrada in registradas:
+        info = cargar_serie_catalogo(registrada['id'])
+        df, version = datos_vigentes(registrada['id'], info)
+        titulo = registrada['titulo']
+        if info.get('desde_cache'):
+            titulo += ' (caché)'
+        series.append({'nombre': registrada['id'], 'titulo': titulo, 'df': df})
+        claves.append((registrada['id'], version))
     
-    if df_pf_usd is not None and not df_pf_usd.empty:
-        ultimo_valor = df_pf_usd.iloc[-1]['valor']
-        ultima_fecha = df_pf_usd.iloc[-1]['fecha'].strftime('%Y-%m-%d')
-        
-        st.metric(
-            label=f"Última tasa ({ultima_fecha})",
-            value=f"{ultimo_valor:.2f}%"
-        )
+    if any(s['df'] is not None and not s['df'].empty for s in series):
+        st.plotly_chart(figura_series_usuario(tuple(claves), series), use_container_width=True)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        quitar = st.selectbox("Serie agregada", [r['id'] for r in registradas],
+                              format_func=lambda i: next(r['titulo'] for r in registradas if r['id'] == i))
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("🗑️ Quitar"):
+            quitar_serie_usuario(quitar)
+            st.rerun()
+
+def abrir_exportacion(nombres, formato, desde, hasta):
+    """
+    ZIP para st.download_button como archivo abierto: Streamlit lo lee recién
+    al hacer clic, sin copia propia en el proceso. Si ya se podó, se vuelve a armar.
+    """
+    from utils.exportacion import exportacion_en_disco
+
+    return open(exportacion_en_disco(nombres, formato, desde, hasta), 'rb')
+
+@st.fragment
+def panel_exportacion():
+    """Exportación de series cacheadas. Sus widgets solo rerunnean este fragmento."""
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        nombres = st.multiselect("Series", series_registradas(), default=series_registradas())
+    with col2:
+        rango = st.date_input("Rango de fechas", value=(date(2004, 1, 1), date.today()))
+    with col3:
+        formato = st.radio("Formato", ['csv', 'parquet'], horizontal=True)
+    
+    desde, hasta = (rango + (None, None))[:2] if isinstance(rango, tuple) else (rango, None)
+    
+    if st.button("📦 Preparar exportación", disabled=not nombres):
+        from utils.exportacion import exportacion_en_disco
         
-        fig_pf = go.Figure()
-        fig_pf.add_trace(go.Scatter(
-            x=df_pf_usd['fecha'],
-            y=df_pf_usd['valor'],
-            mode='lines',
-            name='PF USD',
-            line=dict(color='#00bfff', width=2)
-        ))
-        fig_pf.update_layout(
-            template='plotly_dark',
-            height=300,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=False,
-            paper_bgcolor='#0e1117',
-            plot_bgcolor='#1a1d23'
+        # En la sesión solo quedan los parámetros y la ruta; el ZIP vive en disco
+        parametros = {'nombres': list(nombres), 'formato': formato,
+                      'desde': str(desde) if desde else None, 'hasta': str(hasta) if hasta else None}
+        st.session_state['exportacion'] = {**parametros, 'ruta': exportacion_en_disco(**parametros)}
+    
+    exportacion = st.session_state.get('exportacion')
+    if exportacion:
+        parametros = {k: exportacion[k] for k in ('nombres', 'formato', 'desde', 'hasta')}
+        st.download_button(
+            "⬇️ Descargar ZIP",
+            data=lambda: abrir_exportacion(**parametros),
+            file_name=f"monitor_ar_series_{date.today():%Y%m%d}_{exportacion['formato']}.zip",
+            mime="application/zip"
         )
-        st.plotly_chart(fig_pf, use_container_width=True)
-    else:
-        st.warning("⚠️ No hay datos disponibles para Plazo Fijo USD")
+
+# === SECCIÓN: TASAS BCRA ===
+st.header("💰 Tasas de Interés (BCRA)")
+
+panel_tasas()
 
 st.markdown("---")
 
 # === SECCIÓN: EMAE ===
 st.header("📈 Actividad Económica (EMAE)")
 
-df_emae = emae_data.get('data')
-cache_emae = emae_data.get('desde_cache', False)
+panel_emae()
 
-titulo_emae = "Estimador Mensual de Actividad Económica"
-if cache_emae:
-    titulo_emae += ' <span class="cache-badge">CACHE</span>'
+st.markdown("---")
 
-st.markdown(f"### {titulo_emae}", unsafe_allow_html=True)
+# === SECCIÓN: CATÁLOGO DATOS.GOB ===
+st.header("🔎 Catálogo de series (datos.gob.ar)")
 
-if df_emae is not None and not df_emae.empty:
-    ultimo_valor = df_emae.iloc[-1]['valor']
-    ultima_fecha = df_emae.iloc[-1]['fecha'].strftime('%Y-%m-%d')
-    
-    col1, col2 = st.columns([1, 3])
-    
-    with col1:
-        st.metric(
-            label=f"Último valor ({ultima_fecha})",
-            value=f"{ultimo_valor:.2f}"
-        )
-        st.caption(f"Base 2004 = 100")
-        st.caption(f"Total de observaciones: {len(df_emae)}")
-    
-    with col2:
-        fig_emae = go.Figure()
-        fig_emae.add_trace(go.Scatter(
-            x=df_emae['fecha'],
-            y=df_emae['valor'],
-            mode='lines',
-            name='EMAE',
-            line=dict(color='#00ff41', width=2),
-            fill='tozeroy',
-            fillcolor='rgba(0, 255, 65, 0.1)'
-        ))
-        fig_emae.update_layout(
-            template='plotly_dark',
-            height=400,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=False,
-            paper_bgcolor='#0e1117',
-            plot_bgcolor='#1a1d23',
-            yaxis_title="Índice (base 2004=100)"
-        )
-        st.plotly_chart(fig_emae, use_container_width=True)
-else:
-    st.warning("⚠️ No hay datos disponibles para EMAE. Verifique su conexión o intente más tarde.")
+panel_catalogo()
+panel_series_usuario()
+
+st.markdown("---")
+
+# === SECCIÓN: EXPORTACIÓN ===
+st.header("💾 Exportar series")
+
+panel_exportacion()
 
 # Footer
 st.markdown("---")
 st.caption("🔄 Los datos se actualizan automáticamente desde fuentes oficiales (BCRA, datos.gob.ar)")
-if any([cache_tpm, cache_badlar, cache_pf_usd, cache_emae]):
+if any(st.session_state['paneles_desde_cache'].values()):
     st.caption("⚠️ Algunos datos provienen de caché local debido a problemas de conectividad")
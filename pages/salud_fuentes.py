@@ -0,0 +1,113 @@
+import time
+import streamlit as st
+from utils.salud import obtener_registro, resumen_fuentes, latencia_en_el_tiempo, antiguedad_series
+from utils.limitador import estado_limitadores
+
+st.set_page_config(
+    page_title="Monitor AR - Salud de Fuentes",
+    page_icon="🩺",
+    layout="wide"
+)
+
+# Estilo oscuro tipo terminal Bloomberg
+st.markdown("""
+<style>
+    .stApp {
+        background-color: #0e1117;
+        color: #00ff41;
+    }
+    h1, h2, h3 {
+        color: #00ff41;
+        font-family: 'Courier New', monospace;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+st.title("🩺 Monitor AR - Salud de Fuentes")
+st.caption("Latencia, errores, uso de caché y antigüedad de cada serie, a partir del registro de consultas")
+st.markdown("---")
+
+INTERVALO_REFRESCO = 60
+
+# Ventanas de análisis: etiqueta -> (segundos hacia atrás, período de agregación)
+VENTANAS = {
+    "Última hora": (3600, '5min'),
+    "Últimas 24 horas": (86400, '1h'),
+    "Últimos 7 días": (7 * 86400, '6h'),
+    "Todo el registro": (None, '1D'),
+}
+
+def grafico_por_fuente(serie_tiempo, columna, titulo, eje_y, formato='%{y:.0f}'):
+    """Una línea por fuente a lo largo del tiempo."""
+    import plotly.graph_objects as go
+    from utils.graficos import optimizar_payload
+
+    fig = go.Figure()
+    for fuente, grupo in serie_tiempo.groupby('fuente'):
+        fig.add_trace(go.Scatter(
+            x=grupo['ts'], y=grupo[columna], mode='lines+markers', name=fuente,
+            hovertemplate=f'<b>%{{x|%Y-%m-%d %H:%M}}</b><br>{formato}<extra>{fuente}</extra>'
+        ))
+    fig.update_layout(
+        template='plotly_dark', title=titulo, yaxis_title=eje_y, height=350,
+        hovermode='x unified', margin=dict(l=50, r=20, t=50, b=40),
+        legend=dict(orientation='h', y=1.12)
+    )
+    return optimizar_payload(fig, etiqueta=titulo)
+
+ventana = st.radio("Ventana", list(VENTANAS), index=1, horizontal=True)
+
+@st.fragment(run_every=INTERVALO_REFRESCO)
+def panel_salud():
+    """Panel de salud; relee el registro (barato: archivo mapeado) en cada refresco."""
+    segundos, periodo = VENTANAS[ventana]
+    df = obtener_registro().leer(desde=time.time() - segundos if segundos else None)
+
+    if df.empty:
+        st.info("ℹ️ Todavía no hay consultas registradas en esta ventana.")
+    else:
+        resumen = resumen_fuentes(df)
+
+        # Totales
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Consultas", f"{len(df)}")
+        col2.metric("Latencia p95", f"{df['latencia_ms'].quantile(0.95):.0f} ms")
+        col3.metric("Tasa de error", f"{1 - df['ok'].mean():.1%}")
+        col4.metric("Servido desde caché", f"{df['desde_cache'].mean():.1%}")
+
+        st.subheader("📋 Por fuente")
+        st.dataframe(
+            resumen.style.format({
+                'p50_ms': '{:.0f}', 'p95_ms': '{:.0f}', 'p99_ms': '{:.0f}',
+                'tasa_error': '{:.1%}', 'tasa_cache': '{:.1%}', 'bytes_promedio': '{:,.0f}',
+            }),
+            use_container_width=True
+        )
+
+        serie_tiempo = latencia_en_el_tiempo(df, periodo)
+        col_lat, col_err = st.columns(2)
+        with col_lat:
+            st.plotly_chart(grafico_por_fuente(serie_tiempo, 'p95_ms', "Latencia p95", "ms"),
+                            use_container_width=True)
+        with col_err:
+            st.plotly_chart(grafico_por_fuente(serie_tiempo, 'tasa_error', "Tasa de error", "proporción",
+                                               '%{y:.0%}'),
+                            use_container_width=True)
+
+        errores = df[~df['ok']].tail(20).iloc[::-1]
+        if not errores.empty:
+            with st.expander(f"⚠️ Últimos errores ({len(errores)})"):
+                st.dataframe(errores, use_container_width=True, hide_index=True)
+
+    st.subheader("⏳ Antigüedad de las series en caché")
+    st.dataframe(antiguedad_series(), use_container_width=True, hide_index=True)
+
+    limitadores = estado_limitadores()
+    if limitadores:
+        st.subheader("🚦 Limitadores por host (este proceso)")
+        st.dataframe(limitadores, use_container_width=True, hide_index=True)
+
+panel_salud()
+
+st.markdown("---")
+st.caption(f"🔄 Se actualiza cada {INTERVALO_REFRESCO} s. Las latencias incluyen la descarga y el parseo de cada serie.")